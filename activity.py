@@ -0,0 +1,131 @@
+"""
+Telegram Lead Scraper - Channel Activity
+Summarises a channel's recent posts into average views, posts per day and the
+time of the last post. The sampled message window is kept per channel so a
+re-sample only needs the posts newer than the last sampled message ID.
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable, NamedTuple, Optional
+
+# Messages kept per channel for the activity figures
+ACTIVITY_WINDOW = 50
+
+
+class Post(NamedTuple):
+    """One sampled message: its ID, post time (ISO, UTC) and view count (None in groups)."""
+    message_id: int
+    posted_at: str
+    views: Optional[int]
+
+
+def init_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the activity tables if they don't exist."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_activity (
+            channel_id INTEGER PRIMARY KEY,
+            last_message_id INTEGER,
+            sampled_posts INTEGER,
+            avg_views REAL,
+            posts_per_day REAL,
+            last_post_date TEXT,
+            sampled_at TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_activity_views ON lead_activity (avg_views DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_activity_posts ON lead_activity (posts_per_day DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_activity_last_post ON lead_activity (last_post_date DESC)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_activity_posts (
+            channel_id INTEGER,
+            message_id INTEGER,
+            posted_at TEXT,
+            views INTEGER,
+            PRIMARY KEY (channel_id, message_id)
+        ) WITHOUT ROWID
+    """)
+
+
+def summarize(posts: list[Post], now: Optional[datetime] = None) -> dict:
+    """
+    Compute the activity figures for a window of posts. Posts per day is taken
+    over the span from the oldest sampled post to now, so a channel that went
+    quiet scores low even if it once posted often.
+    """
+    if not posts:
+        return {'sampled_posts': 0, 'avg_views': None, 'posts_per_day': 0.0, 'last_post_date': None}
+    now = now or datetime.now(timezone.utc)
+    dates = [datetime.fromisoformat(post.posted_at) for post in posts]
+    views = [post.views for post in posts if post.views is not None]
+    span_days = max((now - min(dates)).total_seconds() / 86400, 1.0)
+    return {
+        'sampled_posts': len(posts),
+        'avg_views': round(sum(views) / len(views), 1) if views else None,
+        'posts_per_day': round(len(posts) / span_days, 3),
+        'last_post_date': max(dates).isoformat(),
+    }
+
+
+def last_message_ids(cursor: sqlite3.Cursor, channel_ids: Iterable[int]) -> dict[int, int]:
+    """Return {channel_id: last sampled message ID} for channels sampled before."""
+    ids = list(channel_ids)
+    if not ids:
+        return {}
+    placeholders = ", ".join("?" * len(ids))
+    cursor.execute(
+        f"SELECT channel_id, last_message_id FROM lead_activity WHERE channel_id IN ({placeholders})",
+        ids
+    )
+    return dict(cursor.fetchall())
+
+
+def record_posts(
+    cursor: sqlite3.Cursor,
+    channel_id: int,
+    posts: list[Post],
+    window: int = ACTIVITY_WINDOW
+) -> dict:
+    """
+    Merge newly fetched posts into the channel's window, trim it to the newest
+    `window` messages and store the recomputed figures. Returns the figures.
+    """
+    cursor.executemany(
+        "INSERT OR REPLACE INTO lead_activity_posts (channel_id, message_id, posted_at, views) VALUES (?, ?, ?, ?)",
+        [(channel_id, post.message_id, post.posted_at, post.views) for post in posts]
+    )
+    cursor.execute("""
+        DELETE FROM lead_activity_posts
+        WHERE channel_id = ? AND message_id NOT IN (
+            SELECT message_id FROM lead_activity_posts WHERE channel_id = ? ORDER BY message_id DESC LIMIT ?
+        )
+    """, (channel_id, channel_id, window))
+    cursor.execute(
+        "SELECT message_id, posted_at, views FROM lead_activity_posts WHERE channel_id = ?",
+        (channel_id,)
+    )
+    stored = [Post(*row) for row in cursor.fetchall()]
+    figures = summarize(stored)
+    cursor.execute("""
+        INSERT OR REPLACE INTO lead_activity (
+            channel_id, last_message_id, sampled_posts, avg_views, posts_per_day, last_post_date, sampled_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (
+        channel_id,
+        max((post.message_id for post in stored), default=None),
+        figures['sampled_posts'],
+        figures['avg_views'],
+        figures['posts_per_day'],
+        figures['last_post_date'],
+        datetime.now().isoformat(),
+    ))
+    return figures
+
+
+def load_activity(cursor: sqlite3.Cursor) -> dict[int, dict]:
+    """Return {channel_id: activity figures} for every sampled channel."""
+    cursor.execute("SELECT channel_id, avg_views, posts_per_day, last_post_date FROM lead_activity")
+    return {
+        channel_id: {'avg_views': avg_views, 'posts_per_day': posts_per_day, 'last_post_date': last_post_date}
+        for channel_id, avg_views, posts_per_day, last_post_date in cursor.fetchall()
+    }
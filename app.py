@@ -10,13 +10,32 @@ import random
 from datetime import datetime
 from typing import Optional
 
+import crawl
+import vocab
+from checkpoint import DONE, STOPPED, CrawlCheckpoint
+from client_pool import TelegramClientPool, discover_sessions
+from jobs import ACTIVE_STATES, CANCELLED, FAILED, PAUSED, Job, JobContext, JobManager
+from loop_runner import LoopRunner
 from scraper import (
+    RECLASSIFY_WORKERS,
     TelegramScraper,
     TgstatScraper,
     get_all_leads,
+    get_categories,
+    get_change_token,
+    get_lead_stats,
     get_leads_count,
+    get_sync_status,
+    get_top_leads,
     init_database,
-    upsert_lead
+    migrate_scores,
+    rebuild_duplicate_index,
+    reclassify_leads,
+    reextract_contacts,
+    retry_parked_leads,
+    scores_outdated,
+    upsert_lead,
+    use_request_budget
 )
 
 # Page configuration
@@ -38,15 +57,65 @@ def init_session_state():
         'phone_code_hash': None,
         'scraper': None,
         'scraper_type': 'Tgstat Scraper (Web)', # Default to Tgstat
-        'scraping_in_progress': False,
-        'status_messages': [],
-        'flood_wait_count': 0,
         'demo_mode': False
     }
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
+# How often the jobs panel refreshes while a job is active (seconds); jobs
+# write their progress at most 4 times a second (see progress.py)
+JOB_POLL_SECONDS = 1
+JOB_STATE_ICONS = {
+    "queued": "⏳",
+    "running": "🔄",
+    "paused": "⏸️",
+    "cancelled": "⏹️",
+    "done": "✅",
+    "failed": "❌",
+}
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """
+    The process-wide job manager. Its background loop outlives reruns, browser
+    reloads and sessions, so scrape jobs keep running while the page changes.
+    """
+    return JobManager(LoopRunner("scrape-jobs"))
+
+
+def get_loop_runner() -> LoopRunner:
+    """Return the background event loop that jobs and scraper clients live on."""
+    return get_job_manager().runner
+
+
+@st.cache_resource
+def start_score_migration() -> str:
+    """
+    Re-score leads stored under an older lead score formula (see
+    migrate_scores) as a background job, once per server process.
+    """
+    async def run(ctx: JobContext) -> None:
+        loop = asyncio.get_running_loop()
+        # migrate_scores reports from its worker thread; the reporter lives on the loop
+        status = lambda message: loop.call_soon_threadsafe(ctx.status, message)
+        ctx.status("♻️ Re-scoring stored leads with the new lead score formula...")
+        total = await asyncio.to_thread(migrate_scores, status_callback=status)
+        ctx.status(f"✅ Re-scored {total} leads.")
+    
+    return get_job_manager().submit("Re-score stored leads", run)
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the background loop and wait for the result.
+    The Telegram and HTTP clients live on that loop, so they survive reruns
+    and can be used by scrape jobs.
+    """
+    return get_loop_runner().run(coro)
+
+
 def load_css():
     """Load custom CSS."""
     st.markdown("""
@@ -94,6 +163,7 @@ def render_sidebar():
     api_id = st.session_state.api_id
     api_hash = st.session_state.api_hash
     phone = st.session_state.phone
+    extra_sessions = []
     
     scraper_type = st.sidebar.selectbox(
         "Scraping Method",
@@ -125,6 +195,15 @@ def render_sidebar():
             placeholder="+1234567890"
         )
         
+        # Other accounts already signed in (their .session files sit next to the app)
+        extra_choices = [name for name in discover_sessions() if name != "telegram_scraper"]
+        if extra_choices:
+            extra_sessions = st.sidebar.multiselect(
+                "Extra Accounts",
+                extra_choices,
+                help="Authorised .session files to spread keywords over. Each account gets its own request budget and FloodWait."
+            )
+        
         # Authentication status
         st.sidebar.markdown("---")
         if st.session_state.authenticated:
@@ -157,6 +236,7 @@ def render_sidebar():
         'api_id': api_id,
         'api_hash': api_hash,
         'phone': phone,
+        'extra_sessions': extra_sessions,
         'max_requests': max_requests if max_requests > 0 else None,
         'demo_mode': demo_mode,
         'scraper_type': scraper_type,
@@ -188,24 +268,6 @@ def render_search_params():
         "🎮 Games / بازی": "games",
     }
     
-    # Persian keyword mappings
-    PERSIAN_KEYWORDS = {
-        "کریپتو": "crypto", "ارز دیجیتال": "crypto", "بیتکوین": "crypto",
-        "تکنولوژی": "tech", "برنامه نویسی": "tech", "فناوری": "tech",
-        "اخبار": "news", "خبر": "news",
-        "کسب و کار": "business", "استارتاپ": "business", "بازاریابی": "business",
-        "آموزش": "education", "یادگیری": "education",
-        "سرگرمی": "entertainment", "تفریح": "entertainment",
-        "موسیقی": "music", "آهنگ": "music",
-        "ورزش": "sport", "فوتبال": "sport",
-        "طراحی": "design", "گرافیک": "design",
-        "غذا": "food", "آشپزی": "food",
-        "سفر": "travel", "گردشگری": "travel",
-        "مد": "fashion", "لباس": "fashion",
-        "سلامت": "health", "پزشکی": "health",
-        "بازی": "games", "گیم": "games",
-    }
-    
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -253,6 +315,24 @@ def render_search_params():
             value=True,
             help="Focus on commercial channels (shops, companies, brands) - filter out personal/hobby channels"
         )
+        
+        # Tgstat discovery results are cached per keyword (see discovery_cache.py)
+        refresh_discovery = st.checkbox(
+            "🔄 Refresh Discovery Cache",
+            value=False,
+            help="Tgstat only: ignore cached search results for these keywords and search again"
+        )
+        
+        # Snowball discovery from mentions in the found bios
+        snowball = st.checkbox(
+            "🕸️ Follow Mentions (Snowball)",
+            value=False,
+            help="After searching, visit the channels mentioned (@handles, t.me links) in the found bios"
+        )
+        crawl_depth, crawl_budget = crawl.MAX_DEPTH, crawl.CRAWL_BUDGET
+        if snowball:
+            crawl_depth = st.slider("Mention Depth", min_value=1, max_value=4, value=crawl.MAX_DEPTH)
+            crawl_budget = st.number_input("Max Channel Lookups", min_value=10, max_value=1000, value=crawl.CRAWL_BUDGET, step=10)
     
     # Map region to domain
     region_domain = "ir.tgstat.com" if "Iranian" in region else "tgstat.com"
@@ -265,14 +345,15 @@ def render_search_params():
     if category_slug:
         final_keywords.append(category_slug)
     
-    # Process user keywords
+    # Process user keywords (Persian mappings come from vocab/persian_keywords.json)
+    persian_keywords = vocab.get_mapping(vocab.PERSIAN_KEYWORDS)
     if keywords:
         for kw in keywords.split(','):
             kw = kw.strip()
             if kw:
                 # Check if it's Persian and map it
-                if kw in PERSIAN_KEYWORDS:
-                    final_keywords.append(PERSIAN_KEYWORDS[kw])
+                if kw in persian_keywords:
+                    final_keywords.append(persian_keywords[kw])
                 else:
                     final_keywords.append(kw.lower())
     
@@ -285,7 +366,11 @@ def render_search_params():
         'category_tag': category_slug,
         'region': region_domain,
         'safe_mode': safe_mode,
-        'business_mode': business_mode
+        'business_mode': business_mode,
+        'refresh_discovery': refresh_discovery,
+        'snowball': snowball,
+        'crawl_depth': crawl_depth,
+        'crawl_budget': int(crawl_budget)
     }
 
 
@@ -348,15 +433,9 @@ async def sign_in_user(code: str, password: Optional[str] = None) -> bool:
         return False
 
 
-async def run_scraper(config: dict, search_params: dict, progress_bar, status_text):
-    """Run the scraping process."""
-    if config.get('demo_mode'):
-        # Mock scraping logic
-        st.session_state.scraping_in_progress = True
-        st.session_state.status_messages = []
-        
-        status_text.markdown("**Status:** 🎮 Running in Demo Mode...")
-        
+def demo_job(search_params: dict) -> Job:
+    """Build a job that simulates a scrape with fake leads (demo mode)."""
+    async def run(ctx: JobContext) -> None:
         keywords = search_params['keywords']
         if not keywords:
             keywords = ["demo_crypto", "demo_forex"]
@@ -364,47 +443,48 @@ async def run_scraper(config: dict, search_params: dict, progress_bar, status_te
         total_steps = len(keywords) * 5 # Simulate 5 results per keyword
         current_step = 0
         
-        try:
-            for keyword in keywords:
-                msg = f"🔎 Searching for '{keyword}'..."
-                st.session_state.status_messages.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
-                status_text.markdown(f"**Status:** {msg}")
-                await asyncio.sleep(1.5)
-                
-                # Generate fake results
-                for i in range(5):
-                    await asyncio.sleep(0.8)
-                    current_step += 1
-                    progress = min(current_step / total_steps, 0.95)
-                    progress_bar.progress(progress, text=f"Processing '{keyword}'...")
-                    
-                    channel_id = random.randint(1000000000, 9999999999)
-                    username = f"{keyword}_{i}"
-                    title = f"Demo {keyword.title()} Channel {i+1}"
-                    
-                    mock_lead = {
-                        'channel_id': channel_id,
-                        'username': username,
-                        'title': title,
-                        'category_tag': search_params['category_tag'],
-                        'members_count': random.randint(1000, 50000),
-                        'bio_text': f"This is a demo channel for {keyword}. Contact @admin_{username}",
-                        'admin_contact': f"@admin_{username}"
-                    }
-                    
-                    # Save to DB
-                    upsert_lead(**mock_lead)
-                    
-                    msg_found = f"✅ Found: {title}..."
-                    st.session_state.status_messages.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg_found}")
+        ctx.status("🎮 Running in Demo Mode...")
+        for keyword in keywords:
+            ctx.status(f"🔎 Searching for '{keyword}'...")
+            await asyncio.sleep(1.5)
             
-            progress_bar.progress(1.0, text="Complete!")
-            status_text.markdown("**Status:** 🎉 Scraping complete!")
-            st.session_state.status_messages.append(f"[{datetime.now().strftime('%H:%M:%S')}] 🎉 Scraping complete!")
-            
-        finally:
-            st.session_state.scraping_in_progress = False
-        return
+            # Generate fake results
+            for i in range(5):
+                await ctx.checkpoint()
+                await asyncio.sleep(0.8)
+                current_step += 1
+                ctx.set_progress(min(current_step / total_steps, 0.95))
+                
+                channel_id = random.randint(1000000000, 9999999999)
+                username = f"{keyword}_{i}"
+                title = f"Demo {keyword.title()} Channel {i+1}"
+                
+                mock_lead = {
+                    'channel_id': channel_id,
+                    'username': username,
+                    'title': title,
+                    'category_tag': search_params['category_tag'],
+                    'members_count': random.randint(1000, 50000),
+                    'bio_text': f"This is a demo channel for {keyword}. Contact @admin_{username}",
+                    'admin_contact': f"@admin_{username}"
+                }
+                
+                # Save to DB
+                upsert_lead(**mock_lead)
+                ctx.saved(mock_lead)
+                ctx.status(f"✅ Found: {title}...")
+        
+        ctx.status("🎉 Scraping complete!")
+    return run
+
+
+def scrape_job(config: dict, search_params: dict) -> Optional[Job]:
+    """
+    Build a background job that runs a scrape with the session's scraper.
+    Returns None (after showing why) if the scrape can't start.
+    """
+    if config.get('demo_mode'):
+        return demo_job(search_params)
 
     # Real scraping logic
     scraper = st.session_state.scraper
@@ -415,91 +495,301 @@ async def run_scraper(config: dict, search_params: dict, progress_bar, status_te
              st.session_state.scraper = scraper
         else:
             st.error("❌ Scraper not initialized")
-            return
+            return None
 
     
-    # Set max requests limit if applicable
-    if hasattr(scraper, 'set_max_requests'):
-        scraper.set_max_requests(config['max_requests'])
-    
     keywords = search_params['keywords']
     total_keywords = len(keywords)
     
     if total_keywords == 0:
         st.warning("⚠️ Please enter at least one keyword")
-        return
-    
-    st.session_state.scraping_in_progress = True
-    st.session_state.status_messages = []
-    st.session_state.flood_wait_count = 0
-    
-    results = []
-    
-    def status_callback(message: str):
-        st.session_state.status_messages.append(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
-        status_text.markdown(f"**Status:** {message}")
+        return None
     
-    def flood_callback(seconds: int):
-        st.session_state.flood_wait_count += 1
+    # Spread keywords over several accounts when extra sessions are selected
+    pool = None
+    if isinstance(scraper, TelegramScraper) and config.get('extra_sessions'):
+        pool = TelegramClientPool([scraper] + [
+            TelegramScraper(
+                api_id=scraper.api_id,
+                api_hash=scraper.api_hash,
+                phone="",
+                session_name=name,
+                entity_cache=scraper.cache
+            )
+            for name in config['extra_sessions']
+        ])
     
-    try:
-        for i, keyword in enumerate(keywords):
-            progress = (i / total_keywords)
-            progress_bar.progress(progress, text=f"Searching: {keyword}")
-            
-            status_callback(f"🔎 Searching for '{keyword}'...")
+    async def run(ctx: JobContext) -> None:
+        # The job's own request limit (per account when using a pool); jobs
+        # running side by side on the same scraper don't share or reset it
+        use_request_budget(config['max_requests'])
+        results = []
+        finished = False
+        
+        # The run is checkpointed under its job ID; a resumed job continues
+        # the checkpoint of the job it resumes (see checkpoint.py)
+        checkpoint = CrawlCheckpoint(search_params.get('resume_run') or ctx.job_id, ctx.store.path)
+        pending = checkpoint.pending_keywords() if search_params.get('resume_run') else keywords
+        checkpoint.start(search_params, pending)
+        
+        # Per-keyword progress; the bar tracks finished keywords
+        def progress_callback(keyword: str, stats: dict):
+            ctx.keyword(keyword, stats)
+            ctx.set_progress(min(ctx.keywords_done / max(len(pending), 1), 0.99))
+        
+        try:
+            # All keywords run as one stream: concurrently behind one rate limiter
+            # for Tgstat, as parked/retried jobs (and per account) for Telegram
+            options, discovery_options = {}, {}
+            if isinstance(scraper, TgstatScraper):
+                options = {
+                    'region': search_params.get('region', 'tgstat.com'),
+                    'safe_mode': search_params.get('safe_mode', True),
+                    'business_mode': search_params.get('business_mode', True),
+                }
+                discovery_options = {
+                    'refresh': search_params.get('refresh_discovery', False),
+                    'checkpoint': checkpoint,
+                }
+            if pool is not None:
+                accounts = await pool.connect(ctx.status)
+                ctx.status(f"🔎 Searching {len(pending)} keywords with {accounts} accounts...")
+            else:
+                ctx.status(f"🔎 Searching {len(pending)} keywords...")
             
-            async for lead in scraper.search_channels(
-                keyword=keyword,
+            async for lead in (pool or scraper).search_keywords(
+                pending,
                 limit=search_params['limit'],
                 category_tag=search_params['category_tag'],
-                region=search_params.get('region', 'tgstat.com'),
-                safe_mode=search_params.get('safe_mode', True),
-                business_mode=search_params.get('business_mode', True),
-                status_callback=status_callback,
-                flood_callback=flood_callback
+                status_callback=ctx.status,
+                flood_callback=ctx.flood,
+                progress_callback=checkpoint.track(progress_callback),
+                **options,
+                **discovery_options
             ):
                 results.append(lead)
-                status_callback(f"✅ Found: {lead['title'][:30]}...")
-        
-        progress_bar.progress(1.0, text="Complete!")
-        status_callback(f"🎉 Scraping complete! Found {len(results)} leads.")
-        
-    except Exception as e:
-        status_callback(f"❌ Error: {str(e)}")
-        st.error(f"Scraping error: {str(e)}")
-    finally:
-        st.session_state.scraping_in_progress = False
+                ctx.saved(lead)
+                ctx.status(f"✅ Found: {lead['title'][:30]}...")
+                # A paused job stops here; the scrapers stop once their queues fill
+                await ctx.checkpoint()
+            
+            if search_params.get('snowball') and results:
+                ctx.status("Following mentions...")
+                async for lead in scraper.crawl_mentions(
+                    list(results),
+                    category_tag=search_params['category_tag'],
+                    max_depth=search_params['crawl_depth'],
+                    budget=search_params['crawl_budget'],
+                    status_callback=ctx.status,
+                    flood_callback=ctx.flood,
+                    **options
+                ):
+                    results.append(lead)
+                    ctx.saved(lead)
+                    ctx.status(f"🕸️ Found via mention: {lead['title'][:30]}...")
+                    await ctx.checkpoint()
+            
+            ctx.status(f"🎉 Scraping complete! Found {len(results)} leads.")
+            finished = True
+        finally:
+            checkpoint.finish(DONE if finished else STOPPED)
+            if pool is not None:
+                # Extra accounts are connected per run; the main one stays signed in
+                for account in pool.accounts:
+                    if account.scraper is not scraper:
+                        await account.scraper.disconnect()
+    return run
+
+
+def resumable_run(job: dict) -> Optional[str]:
+    """The checkpointed run a stopped job can be resumed from, if any."""
+    if job['state'] not in (CANCELLED, FAILED):
+        return None
+    run_id = job['params'].get('resume_run') or job['job_id']
+    run = CrawlCheckpoint(run_id, get_job_manager().store.path).get()
+    return run_id if run is not None and run['state'] != DONE else None
+
+
+def render_job(job: dict, manager: JobManager, config: dict, can_resume: bool = False):
+    """Render one job's state, progress, controls and log."""
+    job_id = job['job_id']
+    state = job['state']
+    started = datetime.fromtimestamp(job['created_at']).strftime('%H:%M:%S')
+    st.markdown(f"**{job['name']}** · `{job_id}` · {JOB_STATE_ICONS.get(state, '')} {state} · started {started}")
+    st.progress(min(job['progress'] or 0.0, 1.0), text=job['last_message'] or "Waiting to start...")
+    counts = job['counts']
+    st.caption(
+        f"{job['leads']} leads · {counts.get('fetched', 0)} fetched · {counts.get('skipped', 0)} skipped · "
+        f"{counts.get('failed', 0)} failed · {job['floods']} FloodWaits ({job['flood_seconds']}s parked)"
+        + (f" · ❌ {job['error']}" if job['error'] else "")
+    )
+    
+    if manager.is_active(job_id):
+        col1, col2, _ = st.columns([1, 1, 4])
+        with col1:
+            if state == PAUSED:
+                if st.button("▶️ Resume", key=f"resume_{job_id}", use_container_width=True):
+                    manager.resume(job_id)
+                    st.rerun()
+            elif st.button("⏸️ Pause", key=f"pause_{job_id}", use_container_width=True):
+                manager.pause(job_id)
+                st.rerun()
+        with col2:
+            if st.button("⏹️ Cancel", key=f"cancel_{job_id}", use_container_width=True):
+                manager.cancel(job_id)
+                st.rerun()
+    elif can_resume:
+        # Interrupted, cancelled or failed: continue from the run's checkpoint
+        run_id = resumable_run(job)
+        if run_id and st.button("⏯️ Resume from checkpoint", key=f"continue_{job_id}"):
+            params = {**job['params'], 'resume_run': run_id}
+            resumed = scrape_job(config, params)
+            if resumed is not None:
+                manager.submit(f"{job['name']} (resumed)", resumed, params=params)
+                st.rerun()
+    
+    with st.expander("📜 Activity Log", expanded=False):
+        logs = manager.store.logs(job_id)
+        if logs:
+            st.text("\n".join(logs))
+        if job['keyword_progress']:
+            st.dataframe(
+                pd.DataFrame.from_dict(job['keyword_progress'], orient='index'),
+                use_container_width=True
+            )
+
+
+def render_jobs(config: dict):
+    """
+    Render the recent scrape jobs. While any job is active the panel re-runs
+    itself every JOB_POLL_SECONDS as a fragment, reading only the jobs table.
+    """
+    manager = get_job_manager()
+    
+    polling = any(job['state'] in ACTIVE_STATES for job in manager.store.list_jobs(limit=5))
+    
+    def panel():
+        jobs = manager.store.list_jobs(limit=5)
+        if polling and not any(job['state'] in ACTIVE_STATES for job in jobs):
+            # Everything finished: rerun the whole page to show the new leads
+            st.rerun()
+        if not jobs:
+            st.caption("No scrape jobs yet.")
+            return
+        # Only the latest job of a run offers to resume it
+        resumed = set()
+        for job in jobs:
+            run_id = job['params'].get('resume_run') or job['job_id']
+            with st.container(border=True):
+                render_job(job, manager, config, can_resume=run_id not in resumed)
+            resumed.add(run_id)
+    
+    st.fragment(panel, run_every=JOB_POLL_SECONDS if polling else None)()
+
+
+# Data tab queries are cached per change token (see get_change_token), so
+# widget clicks reuse the loaded leads until the stored data actually changes
+
+@st.cache_data(show_spinner="Loading leads...", max_entries=4)
+def load_leads(change_token: str, collapse: bool) -> pd.DataFrame:
+    """All stored leads (with activity figures) as a DataFrame."""
+    return pd.DataFrame(get_all_leads(collapse_duplicates=collapse, include_activity=True))
+
+
+@st.cache_data(max_entries=4)
+def load_stats(change_token: str) -> Optional[dict]:
+    """The precomputed dashboard aggregates (see lead_stats.py), or None if unavailable."""
+    return get_lead_stats()
+
+
+@st.cache_data(max_entries=4)
+def load_categories(change_token: str) -> list[str]:
+    stats = load_stats(change_token)
+    if stats is None:
+        return get_categories()
+    return sorted(stats['categories'])
+
+
+@st.cache_data(max_entries=16)
+def load_top_leads(change_token: str, limit: int, category_tag: Optional[str]) -> list[dict]:
+    return get_top_leads(limit=limit, category_tag=category_tag)
+
+
+@st.cache_data(max_entries=8)
+def export_csv(change_token: str, collapse: bool, columns: tuple[str, ...]) -> str:
+    return load_leads(change_token, collapse)[list(columns)].to_csv(index=False)
+
+
+def clear_data_cache():
+    """Drop the cached Data tab queries (e.g. after maintenance on Supabase)."""
+    for loader in (load_leads, load_stats, load_categories, load_top_leads, export_csv):
+        loader.clear()
 
 
 def render_results():
     """Render results section with data table and export options."""
     st.markdown("---")
-    st.markdown("### 📊 Stored Leads")
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.markdown("### 📊 Stored Leads")
+    with col2:
+        if st.button("🔄 Refresh", use_container_width=True, help="Reload the leads from the database"):
+            clear_data_cache()
+    
+    collapse = st.checkbox(
+        "🧬 Collapse duplicates",
+        value=False,
+        help="Show only the best lead of each group of mirror/backup channels (also applies to export)"
+    )
+    
+    # Leads written locally but not yet pushed to Supabase (see outbox.py)
+    sync = get_sync_status()
+    if sync and sync['pending'] > sync['parked']:
+        message = f"☁️ {sync['pending'] - sync['parked']} new leads are waiting to be synced to Supabase"
+        if sync['failing']:
+            st.warning(f"{message}; retrying after: {sync['last_error']}")
+        else:
+            st.caption(message)
+    if sync and sync['parked']:
+        st.error(f"☁️ Supabase rejected {sync['parked']} leads, which are no longer retried: {sync['parked_error']}")
+        if st.button("🔁 Retry rejected leads"):
+            retry_parked_leads()
+            st.rerun()
     
-    # Get leads from database
-    leads = get_all_leads()
+    # Get leads from database (cached until the data changes)
+    change_token = get_change_token()
+    df = load_leads(change_token, collapse)
     
-    if not leads:
+    if df.empty:
         st.info("📭 No leads in database yet. Start scraping to collect leads!")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(leads)
-    
-    # Metrics
+    # Metrics, read from the aggregate tables rather than computed over every lead
+    stats = load_stats(change_token)
+    if stats is None:
+        # Aggregate tables missing (Supabase without the lead_stats setup)
+        stats = {
+            'total': len(df),
+            'with_admins': int((df['admin_contact'].notna() & (df['admin_contact'] != '')).sum()),
+            'categories': {tag for tag in df['category_tag'].dropna() if tag},
+            'daily': {},
+        }
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Leads", len(df))
+        st.metric("Total Leads", stats['total'])
     with col2:
-        with_admins = df[df['admin_contact'].notna() & (df['admin_contact'] != '')].shape[0]
-        st.metric("With Admin Contacts", with_admins)
+        st.metric("With Admin Contacts", stats['with_admins'])
     with col3:
-        categories = df['category_tag'].nunique()
-        st.metric("Categories", categories)
+        st.metric("Categories", len(stats['categories']))
     with col4:
-        if 'flood_wait_count' in st.session_state:
-            st.metric("FloodWait Events", st.session_state.flood_wait_count)
+        # FloodWaits of the most recent scrape job
+        last_jobs = get_job_manager().store.list_jobs(limit=1)
+        if last_jobs:
+            st.metric(
+                "FloodWait Events",
+                last_jobs[0]['floods'],
+                help=f"{last_jobs[0]['flood_seconds']}s parked in the last job"
+            )
     
     # Display data table
     st.dataframe(
@@ -515,9 +805,79 @@ def render_results():
             "bio_text": st.column_config.TextColumn("Bio", width="large"),
             "admin_contact": st.column_config.TextColumn("Admin Contacts", width="medium"),
             "scraped_date": st.column_config.TextColumn("Scraped At"),
+            "lead_score": st.column_config.NumberColumn("Score", format="%.2f"),
+            "duplicate_count": st.column_config.NumberColumn("Duplicates", format="%d"),
+            "avg_views": st.column_config.NumberColumn("Avg Views", format="%d"),
+            "posts_per_day": st.column_config.NumberColumn("Posts/Day", format="%.2f"),
+            "last_post_date": st.column_config.TextColumn("Last Post"),
         }
     )
     
+    # Top leads (indexed query, no full load/sort)
+    if stats['daily']:
+        with st.expander("📅 Categories & Daily Scrapes", expanded=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                if stats['categories']:
+                    st.dataframe(
+                        pd.DataFrame(list(stats['categories'].values()))
+                        .sort_values('leads', ascending=False)
+                        .rename(columns={'category_tag': 'Category', 'leads': 'Leads', 'with_admins': 'With Admins', 'members_sum': 'Members'}),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+            with col2:
+                st.bar_chart(pd.Series(stats['daily'], name="Leads scraped"))
+    
+    with st.expander("🏆 Top Leads", expanded=False):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            top_category = st.selectbox("Category", options=["All"] + load_categories(change_token), key="top_category")
+        with col2:
+            top_n = st.number_input("Top N", min_value=5, max_value=500, value=20, step=5, key="top_n")
+        top_leads = load_top_leads(change_token, int(top_n), None if top_category == "All" else top_category)
+        if top_leads:
+            st.dataframe(
+                pd.DataFrame(top_leads)[['lead_score', 'username', 'title', 'category_tag', 'members_count', 'admin_contact']],
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.caption("No scored leads yet.")
+    
+    # Maintenance
+    with st.expander("🧹 Maintenance", expanded=False):
+        st.caption("Re-apply the current Safe/Business filter lists to every stored lead.")
+        if st.button("♻️ Re-classify stored leads"):
+            with st.spinner("Re-classifying..."):
+                total = reclassify_leads(workers=RECLASSIFY_WORKERS)
+            st.success(f"✅ Re-classified {total} leads.")
+            # Supabase updates don't move the local change counter
+            clear_data_cache()
+            st.rerun()
+        st.caption("Re-extract handles, t.me links, phones and emails from every stored bio.")
+        if st.button("📇 Re-extract contacts"):
+            with st.spinner("Extracting contacts..."):
+                total = reextract_contacts()
+            st.success(f"✅ Re-extracted contacts for {total} leads.")
+            # Supabase updates don't move the local change counter
+            clear_data_cache()
+            st.rerun()
+        st.caption("Rebuild the near-duplicate index from scratch (only needed after bulk imports).")
+        if st.button("🧬 Rebuild duplicate index"):
+            with st.spinner("Indexing..."):
+                total = rebuild_duplicate_index()
+            st.success(f"✅ Indexed {total} leads.")
+            st.rerun()
+        if isinstance(st.session_state.scraper, TelegramScraper) and st.session_state.authenticated:
+            st.caption("Fetch recent posts of the top leads to measure views and posting frequency (Telegram API).")
+            sample_n = st.number_input("Leads to sample", min_value=5, max_value=500, value=50, step=5, key="sample_n")
+            if st.button("📈 Sample channel activity"):
+                with st.spinner("Sampling recent posts..."):
+                    sampled = run_async(st.session_state.scraper.sample_activity(get_top_leads(limit=int(sample_n))))
+                st.success(f"✅ Sampled activity of {len(sampled)} channels.")
+                st.rerun()
+    
     # Export section
     st.markdown("### 📥 Export Data")
     
@@ -532,8 +892,7 @@ def render_results():
     
     with col2:
         if export_columns:
-            export_df = df[export_columns]
-            csv_data = export_df.to_csv(index=False)
+            csv_data = export_csv(change_token, collapse, tuple(export_columns))
             
             st.download_button(
                 label="📥 Download CSV",
@@ -559,6 +918,8 @@ def main():
 
     # Initialize DB (with Supabase secrets if available)
     init_database(config.get('supabase_url'), config.get('supabase_key'))
+    if scores_outdated():
+        start_score_migration()
     
     # Main content
     is_tgstat = "Tgstat" in config.get('scraper_type', '')
@@ -575,29 +936,23 @@ def main():
             
             st.markdown("---")
             
-            # Status area
-            status_placeholder = st.empty()
-            progress_bar = st.progress(0, text="Ready to scrape")
-            status_text = st.empty()
-            
-            # Log area
-            with st.expander("📜 Activity Log", expanded=False):
-                log_area = st.empty()
-                if st.session_state.status_messages:
-                    log_area.text("\n".join(st.session_state.status_messages[-20:]))
-            
             col1, col2 = st.columns([1, 3])
             with col1:
                 start_button = st.button(
                     "🚀 Start Scraping",
-                    disabled=st.session_state.scraping_in_progress,
                     use_container_width=True,
                     key="start_tgstat"
                 )
             
             if start_button:
-                asyncio.run(run_scraper(config, search_params, progress_bar, status_text))
-                st.rerun()
+                job = scrape_job(config, search_params)
+                if job is not None:
+                    # Runs in the background; the jobs panel below follows it
+                    get_job_manager().submit(", ".join(search_params['keywords']), job, params=search_params)
+                    st.rerun()
+            
+            # Scrape jobs (progress, pause/cancel, logs)
+            render_jobs(config)
 
         with tab3:
             render_results()
@@ -613,6 +968,8 @@ def main():
                 st.success("✅ You are authenticated and ready to scrape!")
                 if st.button("🔓 Disconnect"):
                     st.session_state.authenticated = False
+                    if isinstance(st.session_state.scraper, TelegramScraper):
+                        run_async(st.session_state.scraper.disconnect())
                     st.session_state.scraper = None
                     st.rerun()
             else:
@@ -630,14 +987,14 @@ def main():
                         
                         if st.button("✅ Verify Code"):
                             with st.spinner("Verifying..."):
-                                success = asyncio.run(sign_in_user(code, password if password else None))
+                                success = run_async(sign_in_user(code, password if password else None))
                                 if success:
                                     st.success("✅ Successfully authenticated!")
                                     st.rerun()
                     else:
                         if st.button("🔑 Connect to Telegram"):
                             with st.spinner("Connecting..."):
-                                already_auth = asyncio.run(authenticate_user(config))
+                                already_auth = run_async(authenticate_user(config))
                                 if already_auth:
                                     st.success("✅ Already authenticated!")
                                     st.rerun()
@@ -656,29 +1013,23 @@ def main():
                 
                 st.markdown("---")
                 
-                # Status area
-                status_placeholder = st.empty()
-                progress_bar = st.progress(0, text="Ready to scrape")
-                status_text = st.empty()
-                
-                # Log area
-                with st.expander("📜 Activity Log", expanded=False):
-                    log_area = st.empty()
-                    if st.session_state.status_messages:
-                        log_area.text("\n".join(st.session_state.status_messages[-20:]))
-                
                 col1, col2 = st.columns([1, 3])
                 with col1:
                     start_button = st.button(
                         "🚀 Start Scraping",
-                        disabled=st.session_state.scraping_in_progress,
                         use_container_width=True,
                         key="start_api"
                     )
                 
                 if start_button:
-                    asyncio.run(run_scraper(config, search_params, progress_bar, status_text))
-                    st.rerun()
+                    job = scrape_job(config, search_params)
+                    if job is not None:
+                        # Runs in the background; the jobs panel below follows it
+                        get_job_manager().submit(", ".join(search_params['keywords']), job, params=search_params)
+                        st.rerun()
+                
+                # Scrape jobs (progress, pause/cancel, logs)
+                render_jobs(config)
         
         with tab3:
             render_results()
@@ -0,0 +1,57 @@
+"""
+Benchmark: cold import time of the entry modules, with a per-package breakdown
+from `python -X importtime`. Each module is imported in a fresh interpreter.
+Exits with status 1 when a module loads a heavy client library it shouldn't
+(see LAZY), so it can guard against import-time regressions.
+Run: python bench_import.py [runs] [top]
+"""
+
+import subprocess
+import sys
+from collections import defaultdict
+
+# Entry modules and the heavy libraries they must not load at import time
+MODULES = ["scraper", "cli", "jobs", "client_pool", "writer"]
+LAZY = ["telethon", "supabase", "httpx", "bs4", "duckduckgo_search", "streamlit", "pandas", "numpy"]
+
+
+def import_profile(module: str) -> tuple[float, dict[str, float], set[str]]:
+    """
+    Import `module` in a fresh interpreter. Returns (total seconds, {top-level
+    package: self seconds}, heavy libraries that ended up loaded).
+    """
+    check = f"import sys, {module}; print(' '.join(m for m in {LAZY!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True, text=True, check=True
+    )
+    total = 0.0
+    packages: dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # header line
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].strip()
+        packages[name.split(".")[0]] += self_us / 1e6
+        if name == module:
+            total = cumulative_us / 1e6
+    return total, packages, set(result.stdout.split())
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    failed = False
+    for module in MODULES:
+        # Best of several runs; the first one may include cold disk reads
+        profiles = [import_profile(module) for _ in range(runs)]
+        total, packages, loaded = min(profiles, key=lambda profile: profile[0])
+        print(f"{module:<14} {total * 1000:8.1f} ms")
+        for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            print(f"    {name:<24} {seconds * 1000:8.1f} ms")
+        if loaded:
+            failed = True
+            print(f"    ❌ loads {', '.join(sorted(loaded))} at import time")
+    sys.exit(1 if failed else 0)
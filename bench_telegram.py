@@ -0,0 +1,105 @@
+"""
+Benchmark: TelegramScraper throughput against the fake Telethon backend.
+Reports leads/s, round trips per lead and requests per lead for cold and warm
+entity caches, several pool sizes and injected errors/FloodWaits.
+Run: python bench_telegram.py [keywords] [latency_seconds]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import scraper
+from client_pool import TelegramClientPool
+from entity_cache import EntityCache
+from fake_telethon import TOPICS, FakeTelegramClient, make_channels
+
+
+def make_keywords(count: int) -> list[str]:
+    """Topic names first, then title-number keywords that each match a few channels."""
+    keywords = list(TOPICS)
+    i = 1
+    while len(keywords) < count:
+        keywords.append(str(i * 7))
+        i += 1
+    return keywords[:count]
+
+
+async def run_case(
+    name: str,
+    keywords: list[str],
+    accounts: int,
+    cache: EntityCache,
+    data: list[dict],
+    limit: int = 50,
+    **client_options
+) -> None:
+    """Search all keywords with `accounts` fake accounts and print the figures."""
+    scrapers = [
+        scraper.TelegramScraper(
+            api_id=1,
+            api_hash="fake",
+            phone="",
+            session_name=f"bench_{i}",
+            entity_cache=cache,
+            min_delay=0.0,
+            max_delay=0.0,
+            client_factory=partial(FakeTelegramClient, data=data, seed=i, **client_options)
+        )
+        for i in range(accounts)
+    ]
+    pool = TelegramClientPool(scrapers)
+    await pool.connect()
+
+    floods = []
+    start = time.perf_counter()
+    leads = 0
+    if accounts == 1:
+        stream = scrapers[0].search_keywords(keywords, limit=limit, flood_callback=floods.append)
+    else:
+        stream = pool.search_keywords(keywords, limit=limit, flood_callback=floods.append)
+    async for _ in stream:
+        leads += 1
+    elapsed = time.perf_counter() - start
+
+    round_trips = sum(s.client.round_trips for s in scrapers)
+    requests = sum(s.client.requests for s in scrapers)
+    per_lead = max(leads, 1)
+    print(
+        f"{name:<34} {leads:>6} leads  {elapsed:7.2f}s  {leads / elapsed:>8.1f} leads/s  "
+        f"{round_trips / per_lead:5.2f} trips/lead  {requests / per_lead:5.2f} req/lead  "
+        f"{len(floods)} floods"
+    )
+    await pool.disconnect()
+
+
+async def main(keyword_count: int, latency: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper.DB_PATH = Path(tmp) / "leads.db"
+        scraper.init_database()
+        data = make_channels(2000)
+        keywords = make_keywords(keyword_count)
+        print(f"{len(keywords)} keywords, {len(data)} synthetic channels, {latency * 1000:.0f}ms per round trip\n")
+
+        cache = EntityCache(Path(tmp) / "cache.db")
+        await run_case("1 account, cold cache", keywords, 1, cache, data, latency=latency)
+        await run_case("1 account, warm cache", keywords, 1, cache, data, latency=latency)
+        for accounts in (2, 4):
+            await run_case(
+                f"{accounts} accounts, cold cache", keywords, accounts,
+                EntityCache(Path(tmp) / f"cache_{accounts}.db"), data, latency=latency
+            )
+        await run_case(
+            "1 account, 5% errors, 2% FloodWait", keywords, 1,
+            EntityCache(Path(tmp) / "cache_faults.db"), data,
+            latency=latency, error_rate=0.05, flood_rate=0.02, flood_seconds=1
+        )
+
+
+if __name__ == "__main__":
+    keyword_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    asyncio.run(main(keyword_count, latency))
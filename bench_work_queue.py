@@ -0,0 +1,59 @@
+"""
+Benchmark: work queue throughput with 1..N worker processes sharing one
+queue file. Each item stands in for a scrape with a fixed latency (its
+requests), so throughput should grow about linearly with the workers until
+the queue itself (claims and completions) becomes the bottleneck.
+Run: python bench_work_queue.py [items] [latency_seconds] [max_workers]
+"""
+
+import asyncio
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from work_queue import DONE, KEYWORD, WorkQueue, run_worker
+
+ITEMS_IN_FLIGHT = 4
+
+
+def worker_process(path: str, latency: float) -> None:
+    async def handle(item):
+        await asyncio.sleep(latency)
+        return {'leads': 1}
+    asyncio.run(run_worker(WorkQueue(Path(path)), "bench", handle, concurrency=ITEMS_IN_FLIGHT, drain=True))
+
+
+def bench(workers: int, items: int, latency: float) -> float:
+    """Drain `items` items with `workers` processes; returns items/s."""
+    path = Path(tempfile.mkdtemp()) / "queue.db"
+    queue = WorkQueue(path)
+    queue.enqueue("bench", KEYWORD, [{'keyword': f"kw{i}"} for i in range(items)])
+    processes = [
+        multiprocessing.Process(target=worker_process, args=(str(path), latency))
+        for _ in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    done = queue.counts("bench").get("bench", {}).get(DONE, 0)
+    assert done == items, f"{done} of {items} items done"
+    return items / elapsed
+
+
+if __name__ == "__main__":
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    print(f"{items} items, {latency * 1000:.0f}ms each, {ITEMS_IN_FLIGHT} in flight per worker")
+    base = None
+    workers = 1
+    while workers <= max_workers:
+        rate = bench(workers, items, latency)
+        base = base or rate
+        print(f"{workers:>2} workers  {rate:8.1f} items/s  {rate / base:5.2f}x")
+        workers *= 2
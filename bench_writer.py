@@ -0,0 +1,92 @@
+"""
+Benchmark: N worker processes storing leads in one SQLite file, each
+calling upsert_lead directly (one transaction per lead, competing for the
+write lock) versus handing them to a single writer process (group commit).
+Reports leads/s and the leads lost to errors such as "database is locked".
+Run: python bench_writer.py [leads_per_worker] [max_workers]
+"""
+
+import multiprocessing
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import scraper
+from writer import WriterClient, WriterServer
+
+
+def text(rng: random.Random, words: int) -> str:
+    """Random words, so the leads don't all land in one duplicate cluster."""
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(words))
+
+
+def store_leads(db: str, address, worker: int, leads: int, lost) -> None:
+    scraper.DB_PATH = Path(db)
+    if address:
+        client = WriterClient(address)
+        scraper.use_writer(client)
+    rng = random.Random(worker)
+    failed = 0
+    for i in range(leads):
+        channel_id = worker * 1_000_000 + i
+        score = scraper.upsert_lead(
+            channel_id, f"channel{channel_id}", text(rng, 3),
+            "bench", 1000 + i, text(rng, 12), f"@admin{i}"
+        )
+        failed += score is None
+    if address:
+        try:
+            client.close()
+        except Exception as e:
+            print(f"worker {worker}: {e}")
+            failed = leads  # whatever wasn't acknowledged is unaccounted for
+    with lost.get_lock():
+        lost.value += failed
+
+
+def bench(workers: int, leads: int, use_writer: bool) -> tuple[float, int, int]:
+    """Returns (leads/s, leads lost, leads stored)."""
+    directory = Path(tempfile.mkdtemp())
+    db = directory / "leads.db"
+    scraper.DB_PATH = db
+    scraper.init_database(None, None)
+    server = None
+    address = None
+    if use_writer:
+        address = str(directory / "writer.sock")
+        server = WriterServer(address)
+        threading.Thread(target=server.serve, daemon=True).start()
+        while not Path(address).exists():
+            time.sleep(0.01)
+    lost = multiprocessing.Value("i", 0)
+    processes = [
+        multiprocessing.Process(target=store_leads, args=(str(db), address, worker, leads, lost))
+        for worker in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    if server:
+        server.close()
+    stored = len(scraper.get_all_leads())
+    return workers * leads / elapsed, lost.value, stored
+
+
+if __name__ == "__main__":
+    leads = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f"{leads} leads per worker")
+    workers = 1
+    while workers <= max_workers:
+        for use_writer in (False, True):
+            rate, lost, stored = bench(workers, leads, use_writer)
+            mode = "writer" if use_writer else "direct"
+            print(f"{workers:>2} workers  {mode}  {rate:8.1f} leads/s  {lost:5} lost  {stored:6} stored")
+        workers *= 2
@@ -0,0 +1,226 @@
+"""
+Telegram Lead Scraper - Crawl Checkpoints
+Durable state of a scrape run in SQLite: its parameters, each keyword's
+state (the keyword cursor), the frontier of channel URLs discovered per
+keyword, and the outcome of every URL fetched. A run stopped by a crash, a
+restart or a cancel can be resumed from here without repeating discovery
+or the pages already fetched.
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from jobs import JOBS_PATH
+
+# Run states
+RUNNING = "running"
+DONE = "done"
+STOPPED = "stopped"
+
+# URL outcomes; failed URLs are fetched again on resume
+LEAD = "lead"
+SKIPPED = "skipped"
+FAILED = "failed"
+COMPLETED = (LEAD, SKIPPED)
+
+
+class CrawlCheckpoint:
+    """
+    Checkpoint of one run, identified by run_id (a job ID for runs started
+    from the app). Every change is committed at once, so whatever was
+    recorded before the process died is there on resume.
+
+    Keyword states are recorded from the scrapers' progress callback (see
+    track), which works for every backend. Tgstat runs also record their
+    frontier and fetched URLs through keyword_runner.run_keywords; Telegram
+    runs resume per keyword, with already fetched chats served from the
+    entity cache.
+    """
+
+    def __init__(self, run_id: str, path: Path = JOBS_PATH):
+        self.run_id = run_id
+        self.path = path
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_runs (
+                run_id TEXT PRIMARY KEY,
+                params TEXT,
+                state TEXT NOT NULL,
+                created_at REAL,
+                updated_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_keywords (
+                run_id TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                discovered INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, keyword)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_urls (
+                run_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                outcome TEXT,
+                PRIMARY KEY (run_id, url)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        conn = self._connect()
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    # --- Runs ---
+
+    def start(self, params: dict, keywords: list[str]) -> None:
+        """Record the run and its keywords. Starting a run that exists just marks it running again."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            """
+            INSERT INTO crawl_runs (run_id, params, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(run_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+            """,
+            (self.run_id, json.dumps(params, default=str), RUNNING, now, now)
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO crawl_keywords (run_id, keyword, position) VALUES (?, ?, ?)",
+            [(self.run_id, keyword, position) for position, keyword in enumerate(keywords)]
+        )
+        conn.commit()
+        conn.close()
+
+    def get(self) -> Optional[dict]:
+        """The run's params, state and times, or None if it was never started."""
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM crawl_runs WHERE run_id = ?", (self.run_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        run = dict(row)
+        run['params'] = json.loads(run['params'] or "{}")
+        return run
+
+    def finish(self, state: str = DONE) -> None:
+        """Mark the run done, or stopped (resumable) when it ended early."""
+        self._execute(
+            "UPDATE crawl_runs SET state = ?, updated_at = ? WHERE run_id = ?",
+            (state, time.time(), self.run_id)
+        )
+
+    # --- Keywords ---
+
+    def pending_keywords(self) -> list[str]:
+        """The run's keywords that aren't done, in their original order."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT keyword FROM crawl_keywords WHERE run_id = ? AND state != 'done' ORDER BY position",
+            (self.run_id,)
+        ).fetchall()
+        conn.close()
+        return [row['keyword'] for row in rows]
+
+    def keyword_state(self, keyword: str, state: str) -> None:
+        self._execute(
+            "UPDATE crawl_keywords SET state = ? WHERE run_id = ? AND keyword = ? AND state != ?",
+            (state, self.run_id, keyword, state)
+        )
+
+    def track(self, callback: Optional[Callable[[str, dict], None]] = None) -> Callable[[str, dict], None]:
+        """
+        Wrap a progress_callback so keyword state changes are recorded
+        before being passed on.
+        """
+        states: dict[str, str] = {}
+
+        def progress_callback(keyword: str, stats: dict) -> None:
+            state = stats.get('state')
+            if state and states.get(keyword) != state:
+                states[keyword] = state
+                self.keyword_state(keyword, state)
+            if callback:
+                callback(keyword, stats)
+        return progress_callback
+
+    # --- Frontier ---
+
+    def frontier(self) -> dict[str, dict]:
+        """
+        The recorded frontier of each discovered keyword:
+        {keyword: {'urls': [...], 'outcomes': {url: outcome}}}, URLs in
+        discovery order. Keywords not discovered yet are left out.
+        """
+        conn = self._connect()
+        discovered = conn.execute(
+            "SELECT keyword FROM crawl_keywords WHERE run_id = ? AND discovered = 1", (self.run_id,)
+        ).fetchall()
+        frontier = {row['keyword']: {'urls': [], 'outcomes': {}} for row in discovered}
+        rows = conn.execute(
+            "SELECT keyword, url, outcome FROM crawl_urls WHERE run_id = ? ORDER BY position", (self.run_id,)
+        ).fetchall()
+        conn.close()
+        for row in rows:
+            entry = frontier.get(row['keyword'])
+            if entry is None:
+                continue
+            entry['urls'].append(row['url'])
+            if row['outcome']:
+                entry['outcomes'][row['url']] = row['outcome']
+        return frontier
+
+    def discovered(self, keyword: str, urls: list[str]) -> None:
+        """Record the URLs queued for a keyword (after dropping those other keywords found first)."""
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR IGNORE INTO crawl_urls (run_id, url, keyword, position) VALUES (?, ?, ?, ?)",
+            [(self.run_id, url, keyword, position) for position, url in enumerate(urls)]
+        )
+        conn.execute(
+            "UPDATE crawl_keywords SET discovered = 1 WHERE run_id = ? AND keyword = ?",
+            (self.run_id, keyword)
+        )
+        conn.commit()
+        conn.close()
+
+    def fetched(self, url: str, outcome: str) -> None:
+        """Record a URL's outcome: LEAD, SKIPPED (by the filters) or FAILED."""
+        self._execute(
+            "UPDATE crawl_urls SET outcome = ? WHERE run_id = ? AND url = ?",
+            (outcome, self.run_id, url)
+        )
+
+
+def list_runs(path: Path = JOBS_PATH, limit: int = 20) -> list[dict]:
+    """The most recent checkpointed runs, newest first, with keyword and URL counts."""
+    CrawlCheckpoint("", path)  # make sure the tables exist
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        """
+        SELECT r.run_id, r.state, r.created_at, r.updated_at,
+            (SELECT COUNT(*) FROM crawl_keywords k WHERE k.run_id = r.run_id) AS keywords,
+            (SELECT COUNT(*) FROM crawl_keywords k WHERE k.run_id = r.run_id AND k.state = 'done') AS keywords_done,
+            (SELECT COUNT(*) FROM crawl_urls u WHERE u.run_id = r.run_id AND u.outcome IN ('lead', 'skipped')) AS urls_done
+        FROM crawl_runs r ORDER BY r.created_at DESC LIMIT ?
+        """,
+        (limit,)
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
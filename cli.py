@@ -0,0 +1,564 @@
+"""
+Telegram Lead Scraper - Command Line
+Headless entry point for cron jobs and containers. Scrapes keywords with the
+Tgstat or Telegram scraper, stores the leads like the app does, optionally
+writes them to JSON-lines/CSV files, and reports progress on stdout as one
+JSON object per line (see progress.py). Never imports Streamlit or pandas.
+
+Every scrape is checkpointed (see checkpoint.py) under the run ID printed
+in its first line, and a stopped or crashed run continues with `resume`.
+For large backlogs, `enqueue` adds keywords and channels to the shared work
+queue (see work_queue.py) and any number of `worker` processes on this
+host work through it. Workers can hand their leads to a `writer` process
+(see writer.py) instead of competing for the database's write lock.
+After an update that changes the lead score formula, `rescore` re-scores
+the stored leads once.
+
+Examples:
+    python cli.py scrape -k crypto -k forex --limit 50 --output leads.csv
+    python cli.py scrape -f keywords.txt --region ir.tgstat.com --concurrency 8 --quiet
+    python cli.py scrape --scraper telegram --session telegram_scraper -f keywords.txt
+    python cli.py runs
+    python cli.py resume 3f2a9c81d0b4
+    python cli.py enqueue -f keywords.txt -c some_channel --limit 50
+    python cli.py worker --items 4 --rate-budget my-ip --drain
+    python cli.py writer & python cli.py worker --writer --drain
+    python cli.py queue --dead
+    python cli.py rescore
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, TextIO
+
+import crawl
+import scraper
+from checkpoint import DONE, STOPPED, CrawlCheckpoint, list_runs
+from jobs import JOBS_PATH
+from keyword_runner import KEYWORD_CONCURRENCY
+from progress import LOG, ProgressEvent, ProgressReporter
+from writer import GROUP_SIZE, WRITER_ADDRESS, WriterClient, WriterError, WriterServer
+from work_queue import (
+    CHANNEL, KEYWORD, MAX_ATTEMPTS, POLL_INTERVAL, QUEUE_PATH, VISIBILITY_TIMEOUT,
+    SharedRateLimiter, WorkItem, WorkQueue, run_worker
+)
+
+REGIONS = ("tgstat.com", "ir.tgstat.com")
+# Options not stored with a run's checkpoint: the keyword sources (the
+# resolved keywords are stored instead), storage locations and credentials
+NOT_STORED = (
+    'command', 'keyword', 'keywords_file', 'run_id', 'db', 'checkpoint_db',
+    'supabase_url', 'supabase_key', 'api_id', 'api_hash'
+)
+LEAD_FIELDS = [
+    'channel_id', 'username', 'title', 'category_tag', 'members_count',
+    'bio_text', 'admin_contact', 'lead_score'
+]
+
+
+def read_keywords(keywords: list[str], files: list[str]) -> list[str]:
+    """
+    Keywords from -k options and keyword files (one per line or comma-separated,
+    '#' starts a comment, '-' reads stdin), lowercased and deduplicated in order.
+    """
+    found = list(keywords)
+    for name in files:
+        text = sys.stdin.read() if name == "-" else Path(name).read_text(encoding="utf-8")
+        for line in text.splitlines():
+            found.extend(line.split("#", 1)[0].split(","))
+    return list(dict.fromkeys(keyword.strip().lower() for keyword in found if keyword.strip()))
+
+
+class LeadSink:
+    """
+    Writes leads to .csv files and JSON-lines files (any other suffix).
+    append=True (when resuming) adds to the files instead of replacing them.
+    """
+
+    def __init__(self, paths: list[str], append: bool = False):
+        self._files: list[TextIO] = []
+        self._writers = []
+        for path in paths:
+            handle = open(path, "a" if append else "w", encoding="utf-8", newline="")
+            self._files.append(handle)
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(handle, fieldnames=LEAD_FIELDS, extrasaction="ignore")
+                if handle.tell() == 0:
+                    writer.writeheader()
+                self._writers.append(writer.writerow)
+            else:
+                self._writers.append(
+                    lambda lead, handle=handle: handle.write(json.dumps(lead, ensure_ascii=False) + "\n")
+                )
+
+    def write(self, lead: dict) -> None:
+        for write in self._writers:
+            write(lead)
+        # Leads are stored before they get here; keep the files in step for a crash
+        for handle in self._files:
+            handle.flush()
+
+    def close(self) -> None:
+        for handle in self._files:
+            handle.close()
+
+
+def event_printer(out: TextIO, quiet: bool):
+    """Return an on_event callback printing each event as a JSON line."""
+    def on_event(event: ProgressEvent) -> None:
+        if quiet and event.kind == LOG:
+            return
+        out.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+        out.flush()
+    return on_event
+
+
+def filter_options(args) -> dict:
+    """The Tgstat region and filters from parsed options or a queue item's payload."""
+    if isinstance(args, argparse.Namespace):
+        args = vars(args)
+    return {'region': args['region'], 'safe_mode': args['safe_mode'], 'business_mode': args['business_mode']}
+
+
+async def build_scraper(args: argparse.Namespace):
+    """
+    Return (source, scraper): the object to call search_keywords on (a
+    scraper or a client pool) and the scraper used for single channels and
+    snowball crawls.
+    """
+    if args.scraper == "tgstat":
+        tgstat = scraper.TgstatScraper(min_delay=args.min_delay, max_delay=args.max_delay)
+        return tgstat, tgstat
+
+    from client_pool import TelegramClientPool
+
+    api_id = args.api_id or os.environ.get("TELEGRAM_API_ID")
+    api_hash = args.api_hash or os.environ.get("TELEGRAM_API_HASH")
+    if not api_id or not api_hash:
+        raise SystemExit("error: --api-id/--api-hash (or TELEGRAM_API_ID/TELEGRAM_API_HASH) are required")
+    sessions = args.session or ["telegram_scraper"]
+    pool = TelegramClientPool.from_sessions(int(api_id), api_hash, sessions)
+    pool.set_max_requests(args.max_requests)
+    if not await pool.connect():
+        raise SystemExit("error: no authorised session; sign in through the app first")
+    return pool, pool.accounts[0].scraper
+
+
+async def close_scraper(args: argparse.Namespace, source) -> None:
+    if args.scraper == "tgstat":
+        await source.close()
+    else:
+        await source.disconnect()
+
+
+def write_line(out: TextIO, line: dict) -> None:
+    out.write(json.dumps(line, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+async def run_scrape(args: argparse.Namespace, out: TextIO, checkpoint: CrawlCheckpoint, resuming: bool = False) -> int:
+    """Run (or continue) a checkpointed scrape of args.keywords."""
+    keywords = checkpoint.pending_keywords() if resuming else args.keywords
+    write_line(out, {'kind': 'run', 'run_id': checkpoint.run_id, 'resumed': resuming, 'keywords': len(keywords)})
+
+    reporter = ProgressReporter(keywords, on_event=event_printer(out, args.quiet))
+    sink = LeadSink(args.output, append=resuming)
+    source, base = await build_scraper(args)
+    options = filter_options(args) if args.scraper == "tgstat" else {}
+    started = time.monotonic()
+    results = []
+    finished = False
+    try:
+        async for lead in source.search_keywords(
+            keywords,
+            limit=args.limit,
+            category_tag=args.category,
+            status_callback=reporter.status,
+            flood_callback=reporter.flood,
+            progress_callback=checkpoint.track(reporter.keyword),
+            **options,
+            **({'concurrency': args.concurrency, 'refresh': args.refresh_discovery, 'checkpoint': checkpoint}
+               if args.scraper == "tgstat" else {})
+        ):
+            results.append(lead)
+            reporter.saved(lead)
+            sink.write(lead)
+
+        if args.snowball and results:
+            async for lead in base.crawl_mentions(
+                list(results),
+                category_tag=args.category,
+                max_depth=args.crawl_depth,
+                budget=args.crawl_budget,
+                status_callback=reporter.status,
+                flood_callback=reporter.flood,
+                **options
+            ):
+                results.append(lead)
+                reporter.saved(lead)
+                sink.write(lead)
+        finished = True
+    finally:
+        checkpoint.finish(DONE if finished else STOPPED)
+        sink.close()
+        await close_scraper(args, source)
+
+    write_line(out, {
+        'kind': 'summary',
+        'run_id': checkpoint.run_id,
+        'keywords': len(keywords),
+        'leads': len(results),
+        'counts': dict(reporter.counts),
+        'flood_seconds': reporter.flood_seconds,
+        'elapsed': round(time.monotonic() - started, 2),
+    })
+    return 0
+
+
+async def start_scrape(args: argparse.Namespace, out: TextIO) -> int:
+    args.keywords = read_keywords(args.keyword, args.keywords_file)
+    if not args.keywords:
+        raise SystemExit("error: no keywords given (use -k or -f)")
+    checkpoint = CrawlCheckpoint(args.run_id or uuid.uuid4().hex[:12], args.checkpoint_db)
+    if checkpoint.get() is not None:
+        raise SystemExit(f"error: run {checkpoint.run_id} exists; use 'resume {checkpoint.run_id}'")
+    checkpoint.start({k: v for k, v in vars(args).items() if k not in NOT_STORED}, args.keywords)
+    return await run_scrape(args, out, checkpoint)
+
+
+async def resume_scrape(args: argparse.Namespace, out: TextIO) -> int:
+    """Continue a stored run with its original options (storage and credentials from this command line)."""
+    checkpoint = CrawlCheckpoint(args.run_id, args.checkpoint_db)
+    run = checkpoint.get()
+    if run is None:
+        raise SystemExit(f"error: no run {args.run_id} in {args.checkpoint_db}")
+    if run['state'] == DONE:
+        raise SystemExit(f"error: run {args.run_id} has already finished")
+    # Options added since the run was stored keep their defaults
+    stored = build_parser().parse_args(["scrape"])
+    vars(stored).update(run['params'])
+    for name in ('db', 'checkpoint_db', 'supabase_url', 'supabase_key', 'api_id', 'api_hash'):
+        setattr(stored, name, getattr(args, name, None))
+    if args.quiet:
+        stored.quiet = True
+    checkpoint.start(run['params'], stored.keywords)
+    return await run_scrape(stored, out, checkpoint, resuming=True)
+
+
+def show_runs(args: argparse.Namespace, out: TextIO) -> int:
+    for run in list_runs(args.checkpoint_db, args.limit):
+        write_line(out, run)
+    return 0
+
+
+def enqueue(args: argparse.Namespace, out: TextIO) -> int:
+    """Add keywords and channels to the scraper's queue, with the options they're scraped with."""
+    queue = WorkQueue(args.queue_db)
+    options = {'category': args.category, **(filter_options(args) if args.scraper == "tgstat" else {})}
+    keywords = read_keywords(args.keyword, args.keywords_file)
+    channels = [name.lstrip('@').lower() for name in read_keywords(args.channel, args.channels_file)]
+    if not keywords and not channels:
+        raise SystemExit("error: nothing to enqueue (use -k/-f or -c/--channels-file)")
+    added = {
+        KEYWORD: queue.enqueue(
+            args.scraper, KEYWORD, [{'keyword': keyword, 'limit': args.limit, **options} for keyword in keywords],
+            max_attempts=args.max_attempts, again=args.again
+        ),
+        CHANNEL: queue.enqueue(
+            args.scraper, CHANNEL, [{'username': username, **options} for username in channels],
+            max_attempts=args.max_attempts, again=args.again
+        ),
+    }
+    write_line(out, {'kind': 'enqueued', 'queue': args.scraper, 'keywords': added[KEYWORD], 'channels': added[CHANNEL],
+                     'skipped': len(keywords) + len(channels) - sum(added.values())})
+    return 0
+
+
+async def work(args: argparse.Namespace, out: TextIO) -> int:
+    """Run queue items of args.scraper's queue until cancelled (or, with --drain, until none are ready)."""
+    queue = WorkQueue(args.queue_db)
+    reporter = ProgressReporter(on_event=event_printer(out, args.quiet))
+    sink = LeadSink(args.output, append=True)
+    if args.writer:
+        try:
+            writer = WriterClient(args.writer)
+        except WriterError as e:
+            raise SystemExit(f"error: {e}; start one with `python cli.py writer`")
+        scraper.use_writer(writer)
+    source, base = await build_scraper(args)
+    if args.scraper == "tgstat" and args.rate_budget:
+        # Every worker naming this budget shares one request schedule
+        base.limiter = SharedRateLimiter(queue, args.rate_budget, args.min_delay, args.max_delay)
+
+    def saved(lead: dict) -> None:
+        reporter.saved(lead)
+        sink.write(lead)
+
+    async def flushed() -> None:
+        # An item is completed only once the writer has committed its leads;
+        # if it can't, the item fails and is retried
+        await asyncio.to_thread(scraper.flush_writes, args.visibility)
+
+    async def handle(item: WorkItem) -> dict:
+        if args.writer:
+            # Flush and report only this item's leads, not those of items running alongside
+            writer.track()
+        payload = item.payload
+        options = filter_options(payload) if args.scraper == "tgstat" else {}
+        if item.kind == CHANNEL:
+            lead = await base.scrape_channel(payload['username'], payload['category'], **options)
+            if lead is not None:
+                saved(lead)
+            await flushed()
+            return {'leads': int(lead is not None)}
+        if args.scraper == "tgstat":
+            options['concurrency'] = args.concurrency
+        leads = 0
+        stats = {}
+
+        def progress_callback(keyword: str, keyword_stats: dict) -> None:
+            stats.update(keyword_stats)
+            reporter.keyword(keyword, keyword_stats)
+
+        async for lead in source.search_keywords(
+            [payload['keyword']],
+            limit=payload['limit'],
+            category_tag=payload['category'],
+            status_callback=reporter.status,
+            flood_callback=reporter.flood,
+            progress_callback=progress_callback,
+            **options
+        ):
+            leads += 1
+            saved(lead)
+        await flushed()
+        if stats.get('failed') and not stats.get('fetched'):
+            # Discovery failed, or every page did: fail the item so it is retried
+            raise RuntimeError(f"{stats['failed']} requests failed and none succeeded")
+        return {'leads': leads}
+
+    def item_done(item: WorkItem, state: str, result: Optional[dict], error: Optional[str]) -> None:
+        write_line(out, {
+            'kind': 'item', 'item_id': item.item_id, 'item': item.kind,
+            'name': item.payload.get('keyword') or item.payload.get('username'),
+            'state': state, 'attempt': item.attempts, 'result': result, 'error': error,
+        })
+
+    started = time.monotonic()
+    try:
+        finished = await run_worker(
+            queue,
+            args.scraper,
+            handle,
+            owner=args.name,
+            concurrency=args.items,
+            visibility=args.visibility,
+            poll_interval=args.poll,
+            drain=args.drain,
+            item_callback=item_done
+        )
+    finally:
+        sink.close()
+        await close_scraper(args, source)
+        if args.writer:
+            scraper.use_writer(None)
+            writer.close()
+
+    write_line(out, {
+        'kind': 'summary',
+        'queue': args.scraper,
+        'items': dict(finished),
+        'leads': reporter.counts['saved'],
+        'flood_seconds': reporter.flood_seconds,
+        'elapsed': round(time.monotonic() - started, 2),
+    })
+    return 0
+
+
+def serve_writer(args: argparse.Namespace, out: TextIO) -> int:
+    """Commit the leads of every worker started with --writer until interrupted."""
+    reporter = ProgressReporter(on_event=event_printer(out, False))
+    server = WriterServer(args.address, group_size=args.group_size, status_callback=reporter.status)
+    started = time.monotonic()
+    try:
+        server.serve()
+    except WriterError as e:
+        raise SystemExit(f"error: {e}")
+    except KeyboardInterrupt:
+        pass
+    write_line(out, {
+        'kind': 'summary',
+        **server.stats,
+        'elapsed': round(time.monotonic() - started, 2),
+    })
+    return 0
+
+
+def rescore(args: argparse.Namespace, out: TextIO) -> int:
+    """Re-score the stored leads if their scores predate the current formula (or always, with --force)."""
+    reporter = ProgressReporter(on_event=event_printer(out, args.quiet))
+    started = time.monotonic()
+    if args.force:
+        total = scraper.reclassify_leads(workers=args.workers, status_callback=reporter.status)
+    else:
+        total = scraper.migrate_scores(workers=args.workers, status_callback=reporter.status)
+    write_line(out, {'kind': 'summary', 'rescored': total, 'elapsed': round(time.monotonic() - started, 2)})
+    return 0
+
+
+def show_queue(args: argparse.Namespace, out: TextIO) -> int:
+    queue = WorkQueue(args.queue_db)
+    if args.retry_dead:
+        write_line(out, {'kind': 'retried', 'queue': args.scraper, 'items': queue.retry_dead(args.scraper)})
+    if args.purge_days is not None:
+        write_line(out, {'kind': 'purged', 'queue': args.scraper,
+                         'items': queue.purge_done(args.scraper, args.purge_days * 24 * 3600)})
+    if args.dead:
+        for item in queue.dead_letters(args.scraper):
+            write_line(out, {**item, 'kind': 'dead', 'item': item['kind']})
+    for name, counts in queue.counts().items():
+        write_line(out, {'kind': 'queue', 'queue': name, **counts})
+    return 0
+
+
+def add_keyword_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-k", "--keyword", action="append", default=[], help="Keyword (repeatable)")
+    parser.add_argument("-f", "--keywords-file", action="append", default=[], help="Keyword file, '-' for stdin (repeatable)")
+    parser.add_argument("--scraper", choices=("tgstat", "telegram"), default="tgstat")
+
+
+def add_filter_options(group) -> None:
+    group.add_argument("--region", choices=REGIONS, default="tgstat.com")
+    group.add_argument("--safe-mode", action=argparse.BooleanOptionalAction, default=True)
+    group.add_argument("--business-mode", action=argparse.BooleanOptionalAction, default=True)
+
+
+def add_connection_options(parser: argparse.ArgumentParser) -> tuple:
+    """Add the Tgstat request and Telegram account options; returns both argument groups."""
+    tgstat = parser.add_argument_group("Tgstat")
+    tgstat.add_argument("--concurrency", type=int, default=KEYWORD_CONCURRENCY, help="Concurrent channel page fetches")
+    tgstat.add_argument("--min-delay", type=float, default=2.0, help="Minimum seconds between requests")
+    tgstat.add_argument("--max-delay", type=float, default=5.0, help="Maximum seconds between requests")
+
+    telegram = parser.add_argument_group("Telegram")
+    telegram.add_argument("--api-id", help="Default: $TELEGRAM_API_ID")
+    telegram.add_argument("--api-hash", help="Default: $TELEGRAM_API_HASH")
+    telegram.add_argument("--session", action="append", help="Authorised session name (repeatable; default telegram_scraper)")
+    telegram.add_argument("--max-requests", type=int, default=None, help="Request budget per account")
+    return tgstat, telegram
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Telegram Lead Scraper (headless)")
+    parser.add_argument("--db", help="SQLite database file (default: leads.db next to the code)")
+    parser.add_argument("--supabase-url", default=os.environ.get("SUPABASE_URL"))
+    parser.add_argument("--supabase-key", default=os.environ.get("SUPABASE_KEY"))
+    parser.add_argument(
+        "--sync-timeout", type=float, default=30.0,
+        help="Seconds to keep pushing queued leads to Supabase before exiting (the rest go with the next run)"
+    )
+    parser.add_argument("--checkpoint-db", type=Path, default=JOBS_PATH, help="Run checkpoints (default: jobs.db next to the code)")
+    parser.add_argument("--queue-db", type=Path, default=QUEUE_PATH, help="Work queue (default: work_queue.db next to the code)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="Search keywords and store the leads")
+    add_keyword_options(scrape)
+    scrape.add_argument("--limit", type=int, default=20, help="Leads per keyword")
+    scrape.add_argument("--category", default="", help="Category tag stored with the leads")
+    scrape.add_argument("-o", "--output", action="append", default=[], help="Also write leads to a .csv or .jsonl file (repeatable)")
+    scrape.add_argument("--quiet", action="store_true", help="Don't print free-text log events")
+    scrape.add_argument("--run-id", help="ID to checkpoint the run under (default: a new random ID)")
+    scrape.add_argument("--snowball", action="store_true", help="Follow the mentions in the found bios afterwards")
+    scrape.add_argument("--crawl-depth", type=int, default=crawl.MAX_DEPTH)
+    scrape.add_argument("--crawl-budget", type=int, default=crawl.CRAWL_BUDGET)
+    tgstat, _ = add_connection_options(scrape)
+    add_filter_options(tgstat)
+    tgstat.add_argument("--refresh-discovery", action="store_true", help="Ignore the discovery cache")
+
+    resume = commands.add_parser("resume", help="Continue a stopped or crashed run where it left off")
+    resume.add_argument("run_id")
+    resume.add_argument("--quiet", action="store_true", help="Don't print free-text log events")
+    resume.add_argument("--api-id", help="Default: $TELEGRAM_API_ID")
+    resume.add_argument("--api-hash", help="Default: $TELEGRAM_API_HASH")
+
+    runs = commands.add_parser("runs", help="List recent checkpointed runs")
+    runs.add_argument("--limit", type=int, default=20)
+
+    enqueue = commands.add_parser("enqueue", help="Add keywords and channels to the work queue of a scraper")
+    add_keyword_options(enqueue)
+    enqueue.add_argument("-c", "--channel", action="append", default=[], help="Channel username (repeatable)")
+    enqueue.add_argument("--channels-file", action="append", default=[], help="File of channel usernames, '-' for stdin")
+    enqueue.add_argument("--limit", type=int, default=20, help="Leads per keyword")
+    enqueue.add_argument("--category", default="", help="Category tag stored with the leads")
+    enqueue.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Attempts before an item is dead-lettered")
+    enqueue.add_argument("--again", action="store_true", help="Queue items that already finished once more")
+    add_filter_options(enqueue.add_argument_group("Tgstat"))
+
+    worker = commands.add_parser("worker", help="Process work queue items (run several processes on this host)")
+    worker.add_argument("--scraper", choices=("tgstat", "telegram"), default="tgstat", help="Scraper, and so queue, to work on")
+    worker.add_argument("--items", type=int, default=1, help="Items processed at once")
+    worker.add_argument("--name", help="Worker name recorded with its leases (default: random)")
+    worker.add_argument("--visibility", type=float, default=VISIBILITY_TIMEOUT, help="Lease length in seconds, renewed while working")
+    worker.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Seconds between polls of an empty queue")
+    worker.add_argument("--drain", action="store_true", help="Exit once no item is ready instead of waiting for more")
+    worker.add_argument("-o", "--output", action="append", default=[], help="Also append leads to a .csv or .jsonl file")
+    worker.add_argument("--quiet", action="store_true", help="Don't print free-text log events")
+    tgstat, _ = add_connection_options(worker)
+    tgstat.add_argument("--rate-budget", help="Share the request schedule with every worker using this name")
+    worker.add_argument(
+        "--writer", nargs="?", const=WRITER_ADDRESS,
+        help=f"Send leads to a writer process instead of the database (default address: {WRITER_ADDRESS})"
+    )
+
+    writer = commands.add_parser("writer", help="Commit the leads of workers started with --writer, in group transactions")
+    writer.add_argument("--address", default=WRITER_ADDRESS, help="Socket to listen on")
+    writer.add_argument("--group-size", type=int, default=GROUP_SIZE, help="Most leads committed in one transaction")
+
+    rescore = commands.add_parser("rescore", help="Re-score the stored leads after a lead score formula change")
+    rescore.add_argument("--workers", type=int, default=scraper.MIGRATION_WORKERS, help="Classifier processes")
+    rescore.add_argument("--force", action="store_true", help="Re-score even if the scores are current")
+    rescore.add_argument("--quiet", action="store_true", help="Don't print free-text log events")
+
+    queue = commands.add_parser("queue", help="Show the work queues; inspect or retry dead-lettered items")
+    queue.add_argument("--scraper", choices=("tgstat", "telegram"), default="tgstat", help="Queue for --dead/--retry-dead/--purge-days")
+    queue.add_argument("--dead", action="store_true", help="List dead-lettered items")
+    queue.add_argument("--retry-dead", action="store_true", help="Queue dead-lettered items again")
+    queue.add_argument("--purge-days", type=float, help="Delete items finished more than this many days ago")
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # stdout carries the JSON lines; the storage layer's messages go to stderr
+    out = sys.stdout
+    if args.command in ("runs", "enqueue", "queue"):
+        return {'runs': show_runs, 'enqueue': enqueue, 'queue': show_queue}[args.command](args, out)
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.db:
+            scraper.DB_PATH = Path(args.db)
+        scraper.init_database(args.supabase_url, args.supabase_key)
+        try:
+            if args.command == "writer":
+                return serve_writer(args, out)
+            if args.command == "rescore":
+                return rescore(args, out)
+            command = {'scrape': start_scrape, 'resume': resume_scrape, 'worker': work}[args.command]
+            return asyncio.run(command(args, out))
+        except KeyboardInterrupt:
+            return 130
+        finally:
+            pending = scraper.close_database(args.sync_timeout)
+            if pending:
+                print(f"{pending} leads not yet pushed to Supabase; they are kept in the outbox for the next run")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Telegram Lead Scraper - Client Pool
+Spreads keyword and entity jobs over several authorised Telegram accounts,
+each with its own FloodWait expiry and request budget, so one throttled
+account no longer stalls the whole run.
+"""
+
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import AsyncGenerator, Callable, Iterable, Optional
+
+from entity_cache import EntityCache
+from scraper import TelegramScraper
+
+SESSION_DIR = Path(__file__).parent
+
+
+def discover_sessions(directory: Path = SESSION_DIR) -> list[str]:
+    """Return the names of the .session files in a directory."""
+    return sorted(path.stem for path in directory.glob("*.session"))
+
+
+class PoolAccount:
+    """One account in the pool and its current throttling state."""
+
+    def __init__(self, scraper: TelegramScraper):
+        self.scraper = scraper
+        self.flood_until = 0.0
+        self.flood_count = 0
+        self.busy = False
+
+    @property
+    def name(self) -> str:
+        return self.scraper.session_name
+
+    def has_budget(self) -> bool:
+        return self.scraper._check_request_limit()
+
+    def can_work(self, now: float) -> bool:
+        """Idle, not in a FloodWait and still under its request budget."""
+        return not self.busy and now >= self.flood_until and self.has_budget()
+
+
+class TelegramClientPool:
+    """
+    Several TelegramScraper accounts sharing one job stream. A job (one keyword
+    search or one username resolution) always runs on a single account, since
+    access hashes are only valid for the account that obtained them.
+    """
+
+    def __init__(self, scrapers: list[TelegramScraper]):
+        if not scrapers:
+            raise ValueError("A client pool needs at least one account.")
+        self.accounts = [PoolAccount(scraper) for scraper in scrapers]
+        self._changed = asyncio.Condition()
+
+    @classmethod
+    def from_sessions(
+        cls,
+        api_id: int,
+        api_hash: str,
+        session_names: Iterable[str],
+        entity_cache: Optional[EntityCache] = None
+    ) -> "TelegramClientPool":
+        """Build a pool from already-authorised session files sharing one entity cache."""
+        cache = entity_cache if entity_cache is not None else EntityCache()
+        return cls([
+            TelegramScraper(api_id, api_hash, phone="", session_name=name, entity_cache=cache)
+            for name in session_names
+        ])
+
+    async def connect(self, status_callback: Optional[Callable[[str], None]] = None) -> int:
+        """
+        Connect every account that isn't connected yet. Accounts whose session
+        is not authorised are dropped from the pool. Returns the pool size.
+        """
+        authorised = []
+        for account in self.accounts:
+            if account.scraper.client is not None:
+                authorised.append(account)
+                continue
+            try:
+                if await account.scraper.connect():
+                    authorised.append(account)
+                    continue
+                message = f"⚠️ Session '{account.name}' is not authorised, skipping it"
+            except Exception as e:
+                message = f"⚠️ Could not connect session '{account.name}': {str(e)[:50]}"
+            if status_callback:
+                status_callback(message)
+            await account.scraper.disconnect()
+        self.accounts = authorised
+        return len(self.accounts)
+
+    async def disconnect(self) -> None:
+        """Disconnect every account."""
+        for account in self.accounts:
+            await account.scraper.disconnect()
+
+    def set_max_requests(self, max_requests: Optional[int]) -> None:
+        """Set the request budget of each account (not of the pool as a whole)."""
+        for account in self.accounts:
+            account.scraper.set_max_requests(max_requests)
+
+    @property
+    def request_count(self) -> int:
+        """Requests made by all accounts since their budgets were last set."""
+        return sum(account.scraper._request_count for account in self.accounts)
+
+    async def acquire(self) -> Optional[PoolAccount]:
+        """
+        Wait for an account that may work now and mark it busy. The least used
+        account is preferred. Returns None once every account's budget is spent.
+        """
+        async with self._changed:
+            while True:
+                now = time.monotonic()
+                ready = [account for account in self.accounts if account.can_work(now)]
+                if ready:
+                    account = min(ready, key=lambda a: a.scraper._request_count)
+                    account.busy = True
+                    return account
+                if not any(account.has_budget() for account in self.accounts):
+                    return None
+                # Wake up when the earliest FloodWait expires or a busy account is released
+                waits = [
+                    account.flood_until - now for account in self.accounts
+                    if not account.busy and account.has_budget()
+                ]
+                try:
+                    await asyncio.wait_for(self._changed.wait(), min(waits) if waits else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, account: PoolAccount) -> None:
+        """Return an account to the pool."""
+        async with self._changed:
+            account.busy = False
+            self._changed.notify_all()
+
+    def _flood_callback(
+        self,
+        account: PoolAccount,
+        flood_callback: Optional[Callable[[int], None]]
+    ) -> Callable[[int], None]:
+        """Record an account's FloodWait expiry before passing the event on."""
+        def on_flood(seconds: int) -> None:
+            account.flood_until = max(account.flood_until, time.monotonic() + seconds)
+            account.flood_count += 1
+            if flood_callback:
+                flood_callback(seconds)
+        return on_flood
+
+    @staticmethod
+    def _status_callback(
+        account: PoolAccount,
+        status_callback: Optional[Callable[[str], None]]
+    ) -> Optional[Callable[[str], None]]:
+        """Prefix status messages with the account they came from."""
+        if status_callback is None:
+            return None
+        return lambda message: status_callback(f"[{account.name}] {message}")
+
+    async def resolve_username(self, username: str) -> tuple[object, dict]:
+        """Resolve a username on the next free account (see TelegramScraper.resolve_username)."""
+        account = await self.acquire()
+        if account is None:
+            raise RuntimeError("Every account in the pool has used its request budget.")
+        try:
+            return await account.scraper.resolve_username(username)
+        finally:
+            await self.release(account)
+
+    async def search_keywords(
+        self,
+        keywords: Iterable[str],
+        limit: int = 50,
+        category_tag: str = "",
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None,
+        progress_callback: Optional[Callable[[str, dict], None]] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Search several keywords concurrently, one keyword per free account, and
+        yield leads as they arrive. Keywords left over when every account's
+        budget is spent are reported through status_callback.
+        """
+        pending = deque(keywords)
+        # Bounded, so accounts stop searching while the consumer isn't reading
+        leads: asyncio.Queue = asyncio.Queue(maxsize=len(self.accounts))
+        finished = object()
+
+        async def worker() -> None:
+            while pending:
+                account = await self.acquire()
+                if account is None:
+                    break
+                if not pending:
+                    await self.release(account)
+                    break
+                keyword = pending.popleft()
+                try:
+                    async for lead in account.scraper.search_channels(
+                        keyword=keyword,
+                        limit=limit,
+                        category_tag=category_tag,
+                        status_callback=self._status_callback(account, status_callback),
+                        flood_callback=self._flood_callback(account, flood_callback),
+                        progress_callback=progress_callback
+                    ):
+                        await leads.put(lead)
+                except Exception as e:
+                    if status_callback:
+                        status_callback(f"⚠️ [{account.name}] Search for '{keyword}' failed: {str(e)[:50]}")
+                finally:
+                    await self.release(account)
+            # Not in a finally: a cancelled worker's consumer has already gone
+            await leads.put(finished)
+
+        workers = [asyncio.create_task(worker()) for _ in self.accounts]
+        running = len(workers)
+        try:
+            while running:
+                item = await leads.get()
+                if item is finished:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+
+        if pending and status_callback:
+            status_callback(f"⚠️ All account budgets spent; {len(pending)} keywords not searched")
@@ -0,0 +1,123 @@
+"""
+Telegram Lead Scraper - Contact Extraction
+Finds @handles, t.me links, phone numbers and emails in channel bios with one
+precompiled pattern and a single pass over the text.
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+
+class Contact(NamedTuple):
+    """A normalised contact found in a bio. kind is handle, link, phone or email."""
+    kind: str
+    value: str
+
+
+# Persian and Arabic-Indic digits are common in Iranian bios
+_DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+
+# Every match starts at one of the characters in the leading class, so the
+# scanner skips from one @, /, + or digit to the next in C and most of a bio
+# (Persian or English prose) is never tried against the alternatives; a bio
+# without any of them costs one scan. The alternatives are grouped by that
+# character. An email is found at its "@" and its local part read backwards
+# (see _LOCAL_PART), a t.me link at the "/" after the domain. "x@t.me/name" is
+# a link, not an email on t.me. Digits are the ASCII, Persian and Arabic-Indic
+# ones that _DIGITS translates.
+CONTACT_PATTERN = re.compile(
+    r"""
+    [@/+0-9۰-۹٠-٩]
+    (?:
+        (?<=@)
+        (?:
+            (?<=[A-Za-z0-9._%+-]@)
+            (?!(?:[tT]|[tT][eE][lL][eE][gG][rR][aA][mM])\.[mM][eE](?![A-Za-z0-9-]))
+            (?P<email>[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)
+          | (?<![\w@]@)(?P<handle>[A-Za-z][A-Za-z0-9_]{4,31})\b
+        )
+      | (?<=/)
+        (?:
+            (?<=[tT]\.[mM][eE]/)(?P<link>(?:joinchat/|\+)?[A-Za-z0-9_-]+)
+          | (?<=[tT][eE][lL][eE][gG][rR][aA][mM]\.[mM][eE]/)(?P<long_link>(?:joinchat/|\+)?[A-Za-z0-9_-]+)
+        )
+      | (?<![\w+][+0-9۰-۹٠-٩])
+        (?P<phone>
+            (?<=\+)[0-9۰-۹٠-٩][0-9۰-۹٠-٩\s().-]{7,18}[0-9۰-۹٠-٩]
+          | (?<=[0-9۰-۹٠-٩])[0-9۰-۹٠-٩\s().-]{7,18}[0-9۰-۹٠-٩]
+        )
+        (?![\w@])
+    )
+    """,
+    re.VERBOSE,
+)
+# The local part of an email, ending at the "@" (searched with endpos there)
+_LOCAL_PART = re.compile(r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]{1,64}\Z")
+_USERNAME = re.compile(r"[A-Za-z][A-Za-z0-9_]{4,31}")
+_NON_DIGITS = re.compile(r"\D")
+
+
+def _normalize_phone(raw: str) -> Optional[str]:
+    """Reduce a phone match to +<digits>, or None if it doesn't look like a phone."""
+    digits = _NON_DIGITS.sub("", raw).translate(_DIGITS)
+    if not raw.startswith("+"):
+        if digits.startswith("00"):
+            digits = digits[2:]
+        elif digits.startswith("09") and len(digits) == 11:
+            # Iranian mobile in national format
+            digits = "98" + digits[1:]
+        else:
+            # Bare numbers are usually counts or prices, not phones
+            return None
+    if not 10 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+
+def _normalize(text: str, match: re.Match) -> tuple[int, Optional[Contact]]:
+    """Turn one pattern match into its start in the text and a typed, normalised contact."""
+    kind = match.lastgroup
+    if kind == "handle":
+        return match.start(), Contact("handle", f"@{match.group(kind).lower()}")
+    if kind == "email":
+        at = match.start()
+        local = _LOCAL_PART.search(text, max(0, at - 64), at)
+        if local is None:
+            return at, None
+        return local.start(), Contact("email", f"{local.group()}@{match.group(kind)}".lower())
+    if kind == "phone":
+        phone = _normalize_phone(match.group())
+        return match.start(), Contact("phone", phone) if phone else None
+    path = match.group(kind)
+    if path.startswith("+") or path[:9].lower() == "joinchat/":
+        # Invite links are case-sensitive
+        return match.start(), Contact("link", f"https://t.me/{path}")
+    if _USERNAME.fullmatch(path):
+        # t.me/<username> is the same contact as @<username>
+        return match.start(), Contact("handle", f"@{path.lower()}")
+    return match.start(), None
+
+
+def extract_contacts(text: Optional[str]) -> list[Contact]:
+    """Return the unique contacts in the text, in order of first appearance."""
+    if not text:
+        return []
+    # Each contact and where it first appears, in that order
+    found: dict[Contact, int] = {}
+    for match in CONTACT_PATTERN.finditer(text):
+        start, contact = _normalize(text, match)
+        if contact is None or contact in found:
+            continue
+        if contact.kind == "email":
+            # Digits in the email's local part may have matched as a phone first
+            while found and next(reversed(found.values())) >= start:
+                found.popitem()
+        found[contact] = start
+    return list(found)
+
+
+def format_contacts(contacts: list[Contact]) -> Optional[str]:
+    """Join contacts into the comma-separated admin_contact column format."""
+    if not contacts:
+        return None
+    return ", ".join(contact.value for contact in contacts)
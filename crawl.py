@@ -0,0 +1,94 @@
+"""
+Telegram Lead Scraper - Snowball Discovery
+Follows the @handles and t.me links found in lead bios to the channels they
+mention, most promising first, so discovery keeps going after the listing
+pages run out.
+"""
+
+from typing import AsyncGenerator, Awaitable, Callable, Iterable, Optional
+
+from contacts import extract_contacts
+from scheduler import FloodScheduler
+
+# Default crawl limits
+MAX_DEPTH = 2            # mentions of mentions, but no further
+CRAWL_BUDGET = 100       # channel lookups per crawl
+
+# Frontier priority: source lead score, plus a bonus when the source is in the
+# crawl's category, minus a penalty per hop away from the seeds
+CATEGORY_BONUS = 1.0
+DEPTH_PENALTY = 1.5
+
+
+def mentioned_handles(bio_text: Optional[str]) -> list[str]:
+    """Return the lowercased usernames (without @) mentioned in a bio."""
+    return [contact.value[1:] for contact in extract_contacts(bio_text) if contact.kind == "handle"]
+
+
+def mention_priority(depth: int, source_score: Optional[float], same_category: bool) -> float:
+    """Priority of a handle found at `depth` in a lead with `source_score`. Higher is crawled first."""
+    priority = (source_score or 0.0) - DEPTH_PENALTY * depth
+    if same_category:
+        priority += CATEGORY_BONUS
+    return priority
+
+
+async def snowball(
+    fetch: Callable[[str], Awaitable[Optional[dict]]],
+    seeds: list[dict],
+    known_usernames: Iterable[str] = (),
+    category_tag: str = "",
+    max_depth: int = MAX_DEPTH,
+    budget: int = CRAWL_BUDGET,
+    status_callback: Optional[Callable[[str], None]] = None,
+    flood_callback: Optional[Callable[[int], None]] = None
+) -> AsyncGenerator[dict, None]:
+    """
+    Crawl outwards from the seed leads. fetch(username) looks a channel up,
+    stores it and returns the lead (with bio_text and lead_score), or None if
+    it isn't a usable channel. Handles already in known_usernames or seen
+    earlier in the crawl are skipped; at most `budget` handles are fetched.
+    The frontier is the scheduler's priority queue, so a FloodWait parks one
+    lookup while the next best handle is tried.
+    """
+    scheduler = FloodScheduler(status_callback=status_callback, flood_callback=flood_callback)
+    seen = {username.lower() for username in known_usernames if username}
+    seen.update((seed.get('username') or "").lower() for seed in seeds)
+    fetched = 0
+
+    def enqueue(source: dict, depth: int) -> None:
+        priority = mention_priority(
+            depth,
+            source.get('lead_score'),
+            bool(category_tag) and source.get('category_tag') == category_tag
+        )
+        for handle in mentioned_handles(source.get('bio_text')):
+            if handle in seen:
+                continue
+            seen.add(handle)
+            # The scheduler runs the lowest value first
+            scheduler.submit(visit(handle, depth), name=f"@{handle}", priority=-priority)
+
+    def visit(handle: str, depth: int):
+        async def run() -> Optional[dict]:
+            nonlocal fetched
+            if fetched >= budget:
+                return None
+            lead = await fetch(handle)
+            fetched += 1
+            if lead and depth < max_depth:
+                enqueue(lead, depth + 1)
+            return lead
+        return run
+
+    for seed in seeds:
+        enqueue(seed, 1)
+    if status_callback:
+        status_callback(f"🕸️ Following {scheduler.pending} mentioned handles (depth ≤ {max_depth}, budget {budget})")
+
+    async for lead in scheduler.results():
+        if lead:
+            yield lead
+
+    if status_callback:
+        status_callback(f"🕸️ Crawl finished after {fetched} lookups")
@@ -0,0 +1,306 @@
+"""
+Telegram Lead Scraper - Near-Duplicate Detection
+MinHash signatures over the normalised title + bio of each lead, banded into an
+LSH index stored in SQLite. Mirror/backup channels land in the same buckets and
+are grouped into clusters without comparing every pair of leads.
+"""
+
+import re
+import sqlite3
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 16 bands x 4 rows: pairs with Jaccard >= 0.7 collide in some band ~99% of the time
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+# Estimated Jaccard similarity required to join a cluster (candidates are verified)
+SIMILARITY_THRESHOLD = 0.7
+# Index rebuilds compare each member of a bucket with at most this many others
+# in it, however large the bucket (templated bios fill one with thousands)
+MAX_BUCKET_COMPARE = 32
+
+# Documents hashed per array operation in signatures()
+_BATCH_DOCS = 16
+_SEPARATOR = "\x00" * (SHINGLE_SIZE - 1)
+# Hash constants, created with numpy on first use (see _numpy)
+_PERM_A = _PERM_B = _SHIFT = _SHINGLE_MIX = _FINALIZER = _BAND_MIX = None
+
+# Handles, links, digits and punctuation differ between a channel and its mirrors
+_NOISE = re.compile(r"https?://\S+|t\.me/\S+|@\w+|[^\w\s]|[\d_]+")
+
+
+def _numpy():
+    """
+    Import numpy and create the hash constants on first use, so importing this
+    module (and scraper, cli) doesn't load numpy. Returns the numpy module.
+    """
+    global _PERM_A, _PERM_B, _SHIFT, _SHINGLE_MIX, _FINALIZER, _BAND_MIX
+    import numpy as np
+    if _PERM_A is None:
+        # Multiply-shift hash family: h(x) = (a * x + b) >> 32 with odd a, in wrapping uint64
+        rng = np.random.RandomState(1)
+        _PERM_A = rng.randint(0, 2**63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        _PERM_B = rng.randint(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+        _SHIFT = np.uint64(32)
+        # Odd multipliers combining a shingle's code points, and a 64-bit mixing constant
+        _SHINGLE_MIX = rng.randint(0, 2**63, size=SHINGLE_SIZE, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        _FINALIZER = np.uint64(0xFF51AFD7ED558CCD)
+        # Random multipliers that fold each band's rows into one 64-bit bucket key
+        _BAND_MIX = rng.randint(0, 2**63, size=ROWS_PER_BAND, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    return np
+
+
+def init_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the signature and LSH bucket tables if missing."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_signatures (
+            channel_id INTEGER PRIMARY KEY,
+            signature BLOB,
+            cluster_id INTEGER
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_signatures_cluster ON lead_signatures (cluster_id)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_lsh (
+            band INTEGER,
+            bucket INTEGER,
+            channel_id INTEGER,
+            PRIMARY KEY (band, bucket, channel_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_lsh_channel ON lead_lsh (channel_id)")
+
+
+def normalize_text(title: Optional[str], bio: Optional[str]) -> str:
+    """Lowercase title + bio and strip handles, links, digits and punctuation."""
+    text = _NOISE.sub(" ", f"{title or ''} {bio or ''}".lower())
+    return " ".join(text.split())
+
+
+def signatures(docs: list[tuple[Optional[str], Optional[str]]]) -> list[Optional["np.ndarray"]]:
+    """
+    Return MinHash signatures for many (title, bio) pairs at once.
+    Character shingles are hashed straight from the code points of a batch of
+    documents joined together, then permuted and min-reduced per document with
+    array operations, so no Python work is done per shingle.
+    Leads without usable text get None.
+    """
+    np = _numpy()
+    texts = [normalize_text(title, bio) for title, bio in docs]
+    non_empty = [text for text in texts if text]
+    minima: list["np.ndarray"] = []
+    for batch_start in range(0, len(non_empty), _BATCH_DOCS):
+        batch = non_empty[batch_start:batch_start + _BATCH_DOCS]
+        # The separator pads short texts to one full shingle; shingles that reach
+        # into the next document are masked out below
+        joined = _SEPARATOR.join(batch) + _SEPARATOR
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        count = len(codes) - SHINGLE_SIZE + 1
+        shingles = codes[:count] * _SHINGLE_MIX[0]
+        for k in range(1, SHINGLE_SIZE):
+            shingles += codes[k:k + count] * _SHINGLE_MIX[k]
+        # Non-linear finaliser so the multiply-shift permutations see well-mixed keys
+        shingles ^= shingles >> np.uint64(29)
+        shingles *= _FINALIZER
+        shingles ^= shingles >> _SHIFT
+
+        starts = []
+        valid = np.zeros(count, dtype=bool)
+        position = 0
+        for text in batch:
+            starts.append(position)
+            valid[position:position + max(len(text) - SHINGLE_SIZE + 1, 1)] = True
+            position += len(text) + len(_SEPARATOR)
+
+        # uint64 overflow wraps, which is what multiply-shift hashing relies on
+        permuted = np.multiply.outer(shingles, _PERM_A)
+        permuted += _PERM_B
+        permuted >>= _SHIFT
+        permuted[~valid] = np.iinfo(np.uint64).max
+        minima.extend(np.minimum.reduceat(permuted, starts, axis=0))
+
+    minima_iter = iter(minima)
+    return [next(minima_iter) if text else None for text in texts]
+
+
+def signature(title: Optional[str], bio: Optional[str]) -> Optional["np.ndarray"]:
+    """Return the MinHash signature of a lead, or None if it has no usable text."""
+    return signatures([(title, bio)])[0]
+
+
+def similarity(sig_a: "np.ndarray", sig_b: "np.ndarray") -> float:
+    """Estimate Jaccard similarity from two signatures."""
+    return float((sig_a == sig_b).mean())
+
+
+def band_buckets(sig: "np.ndarray") -> list[tuple[int, int]]:
+    """Return (band, bucket) keys for a signature."""
+    np = _numpy()
+    keys = (sig.reshape(BANDS, ROWS_PER_BAND) * _BAND_MIX).sum(axis=1, dtype=np.uint64)
+    return list(enumerate(keys.view(np.int64).tolist()))
+
+
+def _load_signature(blob: Optional[bytes]) -> Optional["np.ndarray"]:
+    np = _numpy()
+    return np.frombuffer(blob, dtype=np.uint64) if blob else None
+
+
+def index_lead(cursor: sqlite3.Cursor, channel_id: int, title: Optional[str], bio: Optional[str]) -> int:
+    """
+    Add or refresh one lead in the LSH index and return its cluster ID.
+    Candidates sharing a bucket are verified against SIMILARITY_THRESHOLD and
+    every cluster they belong to is merged into the smallest cluster ID.
+    """
+    sig = signature(title, bio)
+    cursor.execute("DELETE FROM lead_lsh WHERE channel_id = ?", (channel_id,))
+    cursor.execute("SELECT cluster_id FROM lead_signatures WHERE channel_id = ?", (channel_id,))
+    row = cursor.fetchone()
+    if row and row[0] == channel_id:
+        # This lead was the cluster root: hand the cluster to its smallest other member
+        # so the others stay together even if this lead no longer matches them
+        cursor.execute("""
+            UPDATE lead_signatures SET cluster_id = (
+                SELECT MIN(channel_id) FROM lead_signatures WHERE cluster_id = ? AND channel_id != ?
+            ) WHERE cluster_id = ? AND channel_id != ?
+        """, (channel_id, channel_id, channel_id, channel_id))
+    if sig is None:
+        cursor.execute(
+            "INSERT OR REPLACE INTO lead_signatures (channel_id, signature, cluster_id) VALUES (?, NULL, ?)",
+            (channel_id, channel_id)
+        )
+        return channel_id
+
+    buckets = band_buckets(sig)
+    where = " OR ".join(["(l.band = ? AND l.bucket = ?)"] * len(buckets))
+    cursor.execute(f"""
+        SELECT DISTINCT s.channel_id, s.signature, s.cluster_id
+        FROM lead_lsh l JOIN lead_signatures s ON s.channel_id = l.channel_id
+        WHERE {where}
+    """, [value for bucket in buckets for value in bucket])
+    clusters = {
+        cluster_id
+        for other_id, blob, cluster_id in cursor.fetchall()
+        if other_id != channel_id and similarity(sig, _load_signature(blob)) >= SIMILARITY_THRESHOLD
+    }
+
+    cluster_id = channel_id
+    if clusters:
+        cluster_id = min(clusters | {channel_id})
+        placeholders = ", ".join("?" * len(clusters))
+        cursor.execute(
+            f"UPDATE lead_signatures SET cluster_id = ? WHERE cluster_id IN ({placeholders})",
+            (cluster_id, *clusters)
+        )
+
+    cursor.execute(
+        "INSERT OR REPLACE INTO lead_signatures (channel_id, signature, cluster_id) VALUES (?, ?, ?)",
+        (channel_id, sig.tobytes(), cluster_id)
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO lead_lsh (band, bucket, channel_id) VALUES (?, ?, ?)",
+        [(band, bucket, channel_id) for band, bucket in buckets]
+    )
+    return cluster_id
+
+
+def rebuild_index(conn: sqlite3.Connection, rows: Iterable[list[tuple]]) -> int:
+    """
+    Rebuild the whole index from chunks of (channel_id, title, bio_text) rows.
+    Signatures are bulk-inserted first; clusters are then formed with a
+    union-find over shared buckets. Buckets are streamed, and each member is
+    compared with the bucket's first MAX_BUCKET_COMPARE members only: every
+    pair in ordinary buckets, but linear rather than quadratic work in huge
+    ones. Returns the number of leads indexed.
+    """
+    np = _numpy()
+    cursor = conn.cursor()
+    init_tables(cursor)
+    cursor.execute("DELETE FROM lead_lsh")
+    cursor.execute("DELETE FROM lead_signatures")
+    total = 0
+    for chunk in rows:
+        signature_rows = []
+        lsh_rows = []
+        sigs = signatures([(title, bio) for _, title, bio in chunk])
+        for (channel_id, _, _), sig in zip(chunk, sigs):
+            signature_rows.append((channel_id, sig.tobytes() if sig is not None else None, channel_id))
+            if sig is not None:
+                lsh_rows.extend((band, bucket, channel_id) for band, bucket in band_buckets(sig))
+        cursor.executemany("INSERT OR REPLACE INTO lead_signatures VALUES (?, ?, ?)", signature_rows)
+        cursor.executemany("INSERT OR IGNORE INTO lead_lsh VALUES (?, ?, ?)", lsh_rows)
+        conn.commit()
+        total += len(chunk)
+
+    parent: dict[int, int] = {}
+
+    def find(node: int) -> int:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    groups = conn.cursor()
+    groups.execute("SELECT band, bucket FROM lead_lsh GROUP BY band, bucket HAVING COUNT(*) > 1")
+    for band, bucket in groups:
+        members = conn.execute("""
+            SELECT s.channel_id, s.signature FROM lead_lsh l
+            JOIN lead_signatures s ON s.channel_id = l.channel_id
+            WHERE l.band = ? AND l.bucket = ?
+        """, (band, bucket))
+        compared_ids: list[int] = []
+        compared_sigs = np.empty((MAX_BUCKET_COMPARE, NUM_PERM), dtype=np.uint64)
+        for channel_id, blob in members:
+            sig = _load_signature(blob)
+            count = len(compared_ids)
+            similarities = (compared_sigs[:count] == sig).mean(axis=1)
+            for index in np.flatnonzero(similarities >= SIMILARITY_THRESHOLD):
+                root_a, root_b = find(channel_id), find(compared_ids[index])
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+            if count < MAX_BUCKET_COMPARE:
+                compared_sigs[count] = sig
+                compared_ids.append(channel_id)
+
+    cursor.executemany(
+        "UPDATE lead_signatures SET cluster_id = ? WHERE channel_id = ?",
+        [(find(node), node) for node in parent if find(node) != node]
+    )
+    conn.commit()
+    return total
+
+
+def load_clusters(cursor: sqlite3.Cursor) -> dict[int, int]:
+    """Return {channel_id: cluster_id} for every lead in a multi-lead cluster."""
+    cursor.execute("""
+        SELECT channel_id, cluster_id FROM lead_signatures
+        WHERE cluster_id IN (
+            SELECT cluster_id FROM lead_signatures GROUP BY cluster_id HAVING COUNT(*) > 1
+        )
+    """)
+    return dict(cursor.fetchall())
+
+
+def collapse_duplicates(leads: list[dict], clusters: dict[int, int]) -> list[dict]:
+    """
+    Keep the highest-scoring lead of each cluster, in the original order.
+    Kept leads get a duplicate_count of the mirrors they stand for.
+    """
+    best: dict[int, dict] = {}
+    sizes: dict[int, int] = {}
+    for lead in leads:
+        cluster_id = clusters.get(lead["channel_id"], lead["channel_id"])
+        sizes[cluster_id] = sizes.get(cluster_id, 0) + 1
+        current = best.get(cluster_id)
+        if current is None or (lead.get("lead_score") or 0) > (current.get("lead_score") or 0):
+            best[cluster_id] = lead
+    kept = {id(lead): cluster_id for cluster_id, lead in best.items()}
+    collapsed = []
+    for lead in leads:
+        if id(lead) in kept:
+            collapsed.append({**lead, "duplicate_count": sizes[kept[id(lead)]] - 1})
+    return collapsed
@@ -0,0 +1,111 @@
+"""
+Telegram Lead Scraper - Discovery Cache
+Persistent SQLite cache of the channel URLs each Tgstat discovery strategy
+found for a keyword, so searching a recent keyword again skips the category,
+ratings, DDG and direct-search requests and goes straight to channel pages.
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from entity_cache import CACHE_PATH
+
+# How long each strategy's results stay fresh, in seconds
+STRATEGY_TTLS = {
+    'category': 24 * 3600,
+    'ratings': 24 * 3600,
+    'ddg': 3 * 24 * 3600,
+    'direct': 3 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+# Empty results are often a block or an error page, so they are retried sooner
+EMPTY_TTL = 3600
+
+
+class DiscoveryCache:
+    """
+    Cache of discovered channel URLs keyed by (keyword, region, strategy).
+    Each row also records the limit it was fetched with, so a larger limit
+    than the cached one counts as a miss.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS discovery_results (
+                keyword TEXT NOT NULL,
+                region TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                urls TEXT NOT NULL,
+                url_limit INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (keyword, region, strategy)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def normalize(keyword: str) -> str:
+        return " ".join(keyword.lower().split())
+
+    def get(self, keyword: str, region: str, strategy: str, limit: int) -> Optional[list[str]]:
+        """Return the fresh cached URLs (at most `limit`), or None on a miss."""
+        conn = self._connect()
+        row = conn.execute(
+            """
+            SELECT urls FROM discovery_results
+            WHERE keyword = ? AND region = ? AND strategy = ? AND url_limit >= ? AND expires_at > ?
+            """,
+            (self.normalize(keyword), region, strategy, limit, time.time())
+        ).fetchone()
+        conn.close()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row["urls"])[:limit]
+
+    def put(self, keyword: str, region: str, strategy: str, limit: int, urls: list[str]) -> None:
+        """Store a strategy's URLs with the strategy's TTL (or EMPTY_TTL if none were found)."""
+        now = time.time()
+        ttl = STRATEGY_TTLS.get(strategy, DEFAULT_TTL) if urls else EMPTY_TTL
+        conn = self._connect()
+        conn.execute("""
+            INSERT OR REPLACE INTO discovery_results (
+                keyword, region, strategy, urls, url_limit, fetched_at, expires_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (self.normalize(keyword), region, strategy, json.dumps(urls), limit, now, now + ttl))
+        conn.commit()
+        conn.close()
+
+    def invalidate(self, keyword: Optional[str] = None) -> int:
+        """Drop the cached results of one keyword, or of every keyword. Returns the rows removed."""
+        conn = self._connect()
+        if keyword is None:
+            cursor = conn.execute("DELETE FROM discovery_results")
+        else:
+            cursor = conn.execute("DELETE FROM discovery_results WHERE keyword = ?", (self.normalize(keyword),))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM discovery_results WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
@@ -0,0 +1,116 @@
+"""
+Telegram Lead Scraper - Entity Cache
+Persistent SQLite cache of resolved Telegram chats (access hash, username,
+about, participants) so repeat runs don't spend flood budget resolving the
+same channels again.
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+CACHE_PATH = Path(__file__).parent / "telegram_cache.db"
+# Cached full info older than this is fetched again
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class EntityCache:
+    """
+    Cache of chat entities and their full info, keyed by channel ID and username.
+    Access hashes are only valid for the account that saw them, so each row
+    records the session it came from.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS telegram_entities (
+                channel_id INTEGER PRIMARY KEY,
+                access_hash INTEGER,
+                session TEXT,
+                kind TEXT,
+                username TEXT,
+                title TEXT,
+                about TEXT,
+                participants INTEGER,
+                fetched_at REAL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_telegram_entities_username ON telegram_entities (username COLLATE NOCASE)"
+        )
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_many(self, channel_ids: Iterable[int]) -> dict[int, dict]:
+        """Return fresh cache rows for the given IDs, keyed by channel ID."""
+        ids = list(channel_ids)
+        if not ids:
+            return {}
+        placeholders = ", ".join("?" * len(ids))
+        conn = self._connect()
+        rows = conn.execute(
+            f"SELECT * FROM telegram_entities WHERE channel_id IN ({placeholders}) AND fetched_at >= ?",
+            (*ids, time.time() - self.ttl)
+        ).fetchall()
+        conn.close()
+        found = {row["channel_id"]: dict(row) for row in rows}
+        self.hits += len(found)
+        self.misses += len(ids) - len(found)
+        return found
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        """Return the fresh cache row for a username (without @), if any."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT * FROM telegram_entities WHERE username = ? COLLATE NOCASE AND fetched_at >= ?",
+            (username.lstrip("@"), time.time() - self.ttl)
+        ).fetchone()
+        conn.close()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(row)
+
+    def put_many(self, records: Iterable[dict]) -> None:
+        """
+        Store records with keys channel_id, access_hash, session, kind, username,
+        title, about, participants.
+        """
+        now = time.time()
+        rows = [
+            (
+                r["channel_id"], r.get("access_hash"), r.get("session"), r.get("kind"),
+                r.get("username"), r.get("title"), r.get("about"), r.get("participants"), now
+            )
+            for r in records
+        ]
+        if not rows:
+            return
+        conn = self._connect()
+        conn.executemany("""
+            INSERT OR REPLACE INTO telegram_entities (
+                channel_id, access_hash, session, kind, username, title, about, participants, fetched_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        conn.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM telegram_entities WHERE fetched_at < ?", (time.time() - self.ttl,))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
@@ -0,0 +1,219 @@
+"""
+Telegram Lead Scraper - Fake PostgREST Backend
+Local stand-in for the Supabase REST API (PostgREST) covering the calls the
+scraper makes through supabase-py: upserts with on_conflict, selects with
+column lists, eq/neq/gt/gte/lt/lte/in/is filters, order, limit/offset and
+exact counts. Tables live in memory and are created on first write. Latency,
+an error rate and outages (`down`) can be injected to test the outbox sync.
+Run standalone to point the app or cli.py at it:
+    python fake_postgrest.py [port]
+then use SUPABASE_URL=http://127.0.0.1:<port> with any SUPABASE_KEY.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+REST_PREFIX = "/rest/v1/"
+
+
+def _matches(value: Any, condition: str) -> bool:
+    """Evaluate a PostgREST filter such as 'eq.5', 'in.(a,b)' or 'is.null' against a stored value."""
+    operator, _, operand = condition.partition(".")
+    if operator == "is":
+        return value is None if operand == "null" else value is (operand == "true")
+    if operator == "in":
+        return str(value) in [item.strip('"') for item in operand.strip("()").split(",")]
+    if value is None:
+        return False
+    if operator in ("eq", "neq"):
+        equal = str(value) == operand or (isinstance(value, bool) and str(int(value)) == operand)
+        return equal if operator == "eq" else not equal
+    try:
+        left, right = (float(value), float(operand)) if isinstance(value, (int, float)) else (str(value), operand)
+    except ValueError:
+        left, right = str(value), operand
+    return {
+        "gt": left > right, "gte": left >= right, "lt": left < right, "lte": left <= right,
+    }.get(operator, False)
+
+
+class FakePostgrest:
+    """
+    In-memory PostgREST server on a background thread. Rows are kept per
+    table in insertion order, keyed by the upsert's on_conflict column
+    (plain inserts get a running key). Every request is counted per method
+    in `requests`; `upserted` counts the rows written.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.down = False
+        self.tables: dict[str, dict[Any, dict]] = defaultdict(dict)
+        self.requests: Counter = Counter()
+        self.upserted = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on host:port (a free port by default) and return the base URL."""
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                backend._handle(self, "GET")
+
+            def do_HEAD(self):
+                backend._handle(self, "HEAD")
+
+            def do_POST(self):
+                backend._handle(self, "POST")
+
+            def do_PATCH(self):
+                backend._handle(self, "PATCH")
+
+            def do_DELETE(self):
+                backend._handle(self, "DELETE")
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def rows(self, table: str) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self.tables[table].values()]
+
+    # --- Request handling ---
+
+    def _handle(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        self.requests[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.down or (self.error_rate and self._rng.random() < self.error_rate):
+            self._error(request, 503, "Service unavailable (injected)")
+            return
+        parts = urlsplit(request.path)
+        if not parts.path.startswith(REST_PREFIX):
+            self._error(request, 404, f"Unknown path {parts.path}")
+            return
+        table = parts.path[len(REST_PREFIX):].strip("/")
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        prefer = request.headers.get("Prefer", "")
+        body = None
+        length = int(request.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                body = json.loads(request.rfile.read(length))
+            except ValueError:
+                self._error(request, 400, "Invalid JSON body")
+                return
+
+        with self._lock:
+            if method == "POST":
+                result = self._upsert(table, body, dict(params).get("on_conflict"), prefer)
+                self._reply(request, 201, result if "return=representation" in prefer else None)
+                return
+            rows = self._filter(table, params)
+            if method == "PATCH":
+                for row in rows:
+                    row.update(body or {})
+                result = [dict(row) for row in rows]
+            elif method == "DELETE":
+                keys = {id(row) for row in rows}
+                self.tables[table] = {key: row for key, row in self.tables[table].items() if id(row) not in keys}
+                result = [dict(row) for row in rows]
+            else:
+                result = self._select(rows, params)
+        headers = {}
+        if "count=" in prefer:
+            headers["Content-Range"] = f"0-{max(len(result) - 1, 0)}/{len(rows)}"
+        self._reply(request, 200, None if method == "HEAD" else result, headers)
+
+    def _upsert(self, table: str, body: Any, on_conflict: Optional[str], prefer: str) -> list[dict]:
+        records = body if isinstance(body, list) else [body]
+        stored = self.tables[table]
+        result = []
+        for record in records:
+            key = record.get(on_conflict) if on_conflict else len(stored)
+            existing = stored.get(key)
+            if existing is not None and "resolution=ignore-duplicates" in prefer:
+                continue
+            if existing is not None and "resolution=merge-duplicates" in prefer:
+                existing.update(record)
+            else:
+                stored[key] = dict(record)
+            self.upserted += 1
+            result.append(dict(stored[key]))
+        return result
+
+    def _filter(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        reserved = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+        filters = [(column, condition) for column, condition in params if column not in reserved]
+        return [
+            row for row in self.tables[table].values()
+            if all(_matches(row.get(column), condition) for column, condition in filters)
+        ]
+
+    def _select(self, rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+        options = dict(params)
+        for term in reversed([term for term in options.get("order", "").split(",") if term]):
+            column, *modifiers = term.split(".")
+            descending = "desc" in modifiers
+            # None sorts last either way, like PostgreSQL's default for DESC
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            rows = sorted(present, key=lambda row: row[column], reverse=descending) + missing
+        offset = int(options.get("offset") or 0)
+        limit = options.get("limit")
+        rows = rows[offset:offset + int(limit) if limit else None]
+        columns = [column for column in options.get("select", "*").split(",") if column]
+        if "*" in columns:
+            return [dict(row) for row in rows]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    def _error(self, request: BaseHTTPRequestHandler, status: int, message: str) -> None:
+        self._reply(request, status, {"code": f"FAKE{status}", "message": message, "details": None, "hint": None})
+
+    def _reply(self, request: BaseHTTPRequestHandler, status: int, payload: Any, headers: Optional[dict] = None) -> None:
+        data = b"" if payload is None else json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        if request.command != "HEAD":
+            request.wfile.write(data)
+
+
+if __name__ == "__main__":
+    backend = FakePostgrest()
+    url = backend.start(port=int(sys.argv[1]) if len(sys.argv) > 1 else 54321)
+    print(f"Fake PostgREST at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        backend.stop()
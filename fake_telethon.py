@@ -0,0 +1,203 @@
+"""
+Telegram Lead Scraper - Fake Telethon Backend
+In-process stand-in for the TelegramClient calls TelegramScraper makes
+(connect, is_user_authorized, SearchRequest, get_entity, full-channel/chat
+requests, get_messages), serving deterministic synthetic channels with
+configurable latency, error rate and FloodWait injection.
+Used by bench_telegram.py; needs no network or account.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Optional
+
+from telethon.errors import ChannelPrivateError, FloodWaitError, MultiError
+from telethon.tl.functions.channels import GetFullChannelRequest
+from telethon.tl.functions.contacts import SearchRequest
+from telethon.tl.functions.messages import GetFullChatRequest
+from telethon.tl.types import Channel, ChatPhotoEmpty, User
+
+TOPICS = ["crypto", "forex", "shop", "news", "tech", "design", "food", "travel", "fashion", "games"]
+TITLE_WORDS = ["Official", "Store", "Daily", "Pro", "Hub", "Academy", "Market", "Club", "Agency", "Channel"]
+BIO_PHRASES = [
+    "Wholesale and retail, fast delivery",
+    "Daily signals and analysis",
+    "Our official online store",
+    "My personal diary and thoughts",
+    "Courses, webinars and consulting",
+    "Orders via direct message",
+]
+
+
+def make_channels(count: int, seed: int = 0) -> list[dict]:
+    """
+    Build `count` synthetic channels. Each bio mentions an admin handle and,
+    usually, one or two other channels, so snowball crawls have edges to follow.
+    """
+    rng = random.Random(seed)
+    channels = []
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        channels.append({
+            'id': 1_000_000 + i,
+            'access_hash': rng.getrandbits(62),
+            'username': f"{topic}_{i:05d}",
+            'title': f"{topic.title()} {rng.choice(TITLE_WORDS)} {i}",
+            'topic': topic,
+            'participants': int(10 ** rng.uniform(2, 6)),
+            'posts_per_day': rng.choice([0.05, 0.5, 2, 8, 20]),
+            'views_per_post': int(10 ** rng.uniform(1, 5)),
+            'last_message_id': rng.randint(50, 5000),
+        })
+    for channel in channels:
+        mentions = rng.sample(channels, rng.choice([0, 1, 1, 2]))
+        channel['about'] = " ".join(
+            [f"{channel['topic']}: {rng.choice(BIO_PHRASES)}.", f"Admin: @admin_{channel['id']}"]
+            + [f"Partner: @{other['username']}" for other in mentions if other is not channel]
+        )
+    return channels
+
+
+class FakeTelegramClient:
+    """
+    Async stand-in for TelegramClient over synthetic channels.
+    latency (+ up to jitter) seconds are spent per round trip; each inner
+    request fails with ChannelPrivateError at error_rate and with a FloodWait
+    of flood_seconds at flood_rate. round_trips and requests count the calls.
+    """
+
+    def __init__(
+        self,
+        session: Optional[str] = None,
+        api_id: int = 0,
+        api_hash: str = "",
+        channels: int = 1000,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        flood_rate: float = 0.0,
+        flood_seconds: int = 1,
+        seed: int = 0,
+        data: Optional[list[dict]] = None
+    ):
+        self.channels = data if data is not None else make_channels(channels, seed)
+        self._by_id = {channel['id']: channel for channel in self.channels}
+        self._by_username = {channel['username']: channel for channel in self.channels}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self._rng = random.Random(seed + 1)
+        self.connected = False
+        self.round_trips = 0
+        self.requests = 0
+        self.floods = 0
+        self.errors = 0
+
+    async def connect(self) -> None:
+        self.connected = True
+
+    async def is_user_authorized(self) -> bool:
+        return True
+
+    async def disconnect(self) -> None:
+        self.connected = False
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+
+    def _maybe_fail(self, request) -> None:
+        """Inject a FloodWait or an RPC error for one request."""
+        roll = self._rng.random()
+        if roll < self.flood_rate:
+            self.floods += 1
+            raise FloodWaitError(request, capture=self.flood_seconds)
+        if roll < self.flood_rate + self.error_rate:
+            self.errors += 1
+            raise ChannelPrivateError(request)
+
+    def _entity(self, channel: dict) -> Channel:
+        return Channel(
+            id=channel['id'],
+            title=channel['title'],
+            photo=ChatPhotoEmpty(),
+            date=None,
+            access_hash=channel['access_hash'],
+            username=channel['username'],
+            broadcast=True,
+        )
+
+    def _channel_of(self, peer) -> dict:
+        channel_id = getattr(peer, 'channel_id', None) or getattr(peer, 'id', None) or peer
+        try:
+            return self._by_id[channel_id]
+        except KeyError:
+            raise ChannelPrivateError(None)
+
+    def _handle(self, request):
+        self.requests += 1
+        self._maybe_fail(request)
+        if isinstance(request, SearchRequest):
+            query = request.q.lower()
+            found = [c for c in self.channels if c['topic'] == query or query in c['title'].lower()]
+            return SimpleNamespace(chats=[self._entity(c) for c in found[:request.limit]], users=[])
+        if isinstance(request, (GetFullChannelRequest, GetFullChatRequest)):
+            peer = request.channel if isinstance(request, GetFullChannelRequest) else request.chat_id
+            channel = self._channel_of(peer)
+            return SimpleNamespace(full_chat=SimpleNamespace(
+                about=channel['about'],
+                participants_count=channel['participants'],
+            ))
+        raise NotImplementedError(f"FakeTelegramClient does not handle {type(request).__name__}")
+
+    async def __call__(self, request):
+        """Send one request, or a list of requests in one round trip (like a container)."""
+        await self._round_trip()
+        if not isinstance(request, list):
+            return self._handle(request)
+        results, exceptions = [], []
+        for inner in request:
+            try:
+                results.append(self._handle(inner))
+                exceptions.append(None)
+            except Exception as e:
+                results.append(None)
+                exceptions.append(e)
+        if any(exceptions):
+            raise MultiError(exceptions, results, request)
+        return results
+
+    async def get_entity(self, username: str):
+        """Resolve a username to a Channel, or a User for the synthetic admin handles."""
+        await self._round_trip()
+        self.requests += 1
+        username = username.lstrip('@').lower()
+        self._maybe_fail(None)
+        if username in self._by_username:
+            return self._entity(self._by_username[username])
+        if username.startswith("admin_"):
+            return User(id=int(username.split("_")[1]) + 10_000_000, username=username)
+        raise ValueError(f'No user has "{username}" as username')
+
+    async def get_messages(self, peer, limit: int = 20, min_id: int = 0) -> list:
+        """Return the newest messages above min_id, newest first."""
+        await self._round_trip()
+        self.requests += 1
+        self._maybe_fail(None)
+        channel = self._channel_of(peer)
+        now = datetime.now(timezone.utc)
+        gap = timedelta(days=1 / channel['posts_per_day'])
+        last = channel['last_message_id']
+        return [
+            SimpleNamespace(
+                id=message_id,
+                date=now - gap * (last - message_id),
+                views=channel['views_per_post'],
+                action=None,
+            )
+            for message_id in range(last, max(min_id, last - limit), -1)
+        ]
@@ -0,0 +1,329 @@
+"""
+Telegram Lead Scraper - Background Scrape Jobs
+Scrape runs are submitted as jobs that run on a background event loop,
+independent of any Streamlit script run. Each job has an ID and a state
+(queued, running, paused, cancelled, done, failed); its progress and log
+are written to SQLite, so the dashboard can poll them cheaply and they
+survive browser reloads.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from loop_runner import LoopRunner
+from progress import FLOOD, LOG, SAVED, ProgressEvent, ProgressReporter
+
+JOBS_PATH = Path(__file__).parent / "jobs.db"
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATES = (QUEUED, RUNNING, PAUSED)
+
+# Jobs running at once; later submissions wait in the queued state
+MAX_CONCURRENT_JOBS = 2
+# Log lines kept per job; older ones are deleted
+JOB_LOG_SIZE = 1000
+
+
+class JobStore:
+    """SQLite table of jobs and their log lines."""
+
+    def __init__(self, path: Path = JOBS_PATH):
+        self.path = path
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_jobs (
+                job_id TEXT PRIMARY KEY,
+                name TEXT,
+                params TEXT,
+                state TEXT NOT NULL,
+                progress REAL DEFAULT 0,
+                leads INTEGER DEFAULT 0,
+                floods INTEGER DEFAULT 0,
+                flood_seconds INTEGER DEFAULT 0,
+                keyword_progress TEXT,
+                counts TEXT,
+                last_message TEXT,
+                error TEXT,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                updated_at REAL
+            )
+        """)
+        # jobs.db files from before the per-kind event counts
+        if "counts" not in {row[1] for row in conn.execute("PRAGMA table_info(scrape_jobs)")}:
+            conn.execute("ALTER TABLE scrape_jobs ADD COLUMN counts TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_jobs_created ON scrape_jobs (created_at DESC)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_job_logs (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                logged_at REAL,
+                message TEXT,
+                PRIMARY KEY (job_id, seq)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params'] or "{}")
+        job['keyword_progress'] = json.loads(job['keyword_progress'] or "{}")
+        job['counts'] = json.loads(job['counts'] or "{}")
+        return job
+
+    def create(self, name: str, params: Optional[dict] = None) -> str:
+        """Add a queued job and return its ID."""
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO scrape_jobs (job_id, name, params, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, name, json.dumps(params or {}, default=str), QUEUED, now, now)
+        )
+        conn.commit()
+        conn.close()
+        return job_id
+
+    def update(self, job_id: str, **fields) -> None:
+        """Set columns of a job (keyword_progress and counts may be dicts)."""
+        for column in ('keyword_progress', 'counts'):
+            if column in fields:
+                fields[column] = json.dumps(fields[column])
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        conn = self._connect()
+        conn.execute(f"UPDATE scrape_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+        conn.commit()
+        conn.close()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM scrape_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        conn.close()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, limit: int = 10) -> list[dict]:
+        """Return the most recent jobs, newest first."""
+        conn = self._connect()
+        rows = conn.execute("SELECT * FROM scrape_jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        conn.close()
+        return [self._to_dict(row) for row in rows]
+
+    def add_logs(self, job_id: str, first_seq: int, lines: list[tuple[float, str]]) -> None:
+        """Append log lines numbered from first_seq, keeping the job's last JOB_LOG_SIZE lines."""
+        if not lines:
+            return
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO scrape_job_logs (job_id, seq, logged_at, message) VALUES (?, ?, ?, ?)",
+            [(job_id, first_seq + i, logged_at, message) for i, (logged_at, message) in enumerate(lines)]
+        )
+        conn.execute(
+            "DELETE FROM scrape_job_logs WHERE job_id = ? AND seq < ?",
+            (job_id, first_seq + len(lines) - JOB_LOG_SIZE)
+        )
+        conn.commit()
+        conn.close()
+
+    def logs(self, job_id: str, limit: int = 20) -> list[str]:
+        """Return a job's last `limit` log lines, oldest first, with timestamps."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT logged_at, message FROM scrape_job_logs WHERE job_id = ? ORDER BY seq DESC LIMIT ?",
+            (job_id, limit)
+        ).fetchall()
+        conn.close()
+        return [
+            f"[{datetime.fromtimestamp(row['logged_at']).strftime('%H:%M:%S')}] {row['message']}"
+            for row in reversed(rows)
+        ]
+
+    def mark_interrupted(self) -> int:
+        """Cancel jobs left active by a process that has exited. Returns how many."""
+        conn = self._connect()
+        cursor = conn.execute(
+            f"UPDATE scrape_jobs SET state = ?, error = ?, finished_at = ?, updated_at = ? "
+            f"WHERE state IN ({', '.join('?' * len(ACTIVE_STATES))})",
+            (CANCELLED, "Interrupted by a restart", time.time(), time.time(), *ACTIVE_STATES)
+        )
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+
+class JobContext(ProgressReporter):
+    """
+    Handed to a running job: a ProgressReporter (see progress.py) whose
+    coalesced updates are written to the job's row and log, plus the pause
+    checkpoint. Pass its status/flood/keyword methods to the scrapers as
+    callbacks and call saved() for each lead.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, resumed: asyncio.Event):
+        super().__init__(on_update=self._write, on_event=self._collect)
+        self.store = store
+        self.job_id = job_id
+        self._resumed = resumed
+        self._unwritten: list[tuple[float, str]] = []
+        self._next_seq = 0
+
+    async def checkpoint(self) -> None:
+        """Wait here while the job is paused. Jobs call this between leads."""
+        if not self._resumed.is_set():
+            self.flush()
+            await self._resumed.wait()
+
+    def _collect(self, event: ProgressEvent) -> None:
+        if event.kind == LOG:
+            self._unwritten.append((event.at, event.message))
+
+    def _write(self, reporter: Optional[ProgressReporter] = None, **fields) -> None:
+        """Write new log lines and the counters (plus any extra columns) to the store."""
+        lines, self._unwritten = self._unwritten, []
+        self.store.add_logs(self.job_id, self._next_seq, lines)
+        self._next_seq += len(lines)
+        self.store.update(
+            self.job_id,
+            progress=self.fraction,
+            leads=self.counts[SAVED],
+            floods=self.counts[FLOOD],
+            flood_seconds=self.flood_seconds,
+            counts=dict(self.counts),
+            keyword_progress=self.keywords,
+            last_message=self.last_message,
+            **fields
+        )
+
+    def finish(self, **fields) -> None:
+        """Write the final state of the job."""
+        self._write(**fields)
+
+
+Job = Callable[[JobContext], Awaitable[None]]
+
+
+class _Handle:
+    def __init__(self):
+        self.future: Optional[concurrent.futures.Future] = None
+        self.resumed: Optional[asyncio.Event] = None
+
+
+class JobManager:
+    """
+    Runs jobs on one background event loop, at most max_concurrent at a
+    time. State changes come from any thread; the job's own progress is
+    written by its JobContext.
+    """
+
+    def __init__(
+        self,
+        runner: Optional[LoopRunner] = None,
+        store: Optional[JobStore] = None,
+        max_concurrent: int = MAX_CONCURRENT_JOBS
+    ):
+        self.runner = runner if runner is not None else LoopRunner("scrape-jobs")
+        self.store = store if store is not None else JobStore()
+        self.max_concurrent = max_concurrent
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._handles: dict[str, _Handle] = {}
+        # Jobs still marked active belong to a previous process
+        self.store.mark_interrupted()
+
+    def submit(self, name: str, job: Job, params: Optional[dict] = None) -> str:
+        """Queue a job and return its ID."""
+        job_id = self.store.create(name, params)
+        handle = _Handle()
+        self._handles[job_id] = handle
+        handle.future = self.runner.submit(self._run(job_id, job, handle))
+        handle.future.add_done_callback(lambda future: self._finished(job_id, future))
+        return job_id
+
+    def _finished(self, job_id: str, future: concurrent.futures.Future) -> None:
+        self._handles.pop(job_id, None)
+        if future.cancelled():
+            # Cancelled before it started, so _run couldn't record it
+            self.store.update(job_id, state=CANCELLED, finished_at=time.time())
+
+    async def _run(self, job_id: str, job: Job, handle: _Handle) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        handle.resumed = asyncio.Event()
+        handle.resumed.set()
+        ctx = JobContext(self.store, job_id, handle.resumed)
+        ticker = None
+        try:
+            async with self._slots:
+                state = RUNNING if handle.resumed.is_set() else PAUSED
+                self.store.update(job_id, state=state, started_at=time.time())
+                ticker = asyncio.create_task(ctx.ticker())
+                await job(ctx)
+            ctx.fraction = 1.0
+            ctx.finish(state=DONE, finished_at=time.time())
+        except asyncio.CancelledError:
+            ctx.status("⏹️ Cancelled")
+            ctx.finish(state=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            ctx.status(f"❌ Error: {str(e)}")
+            ctx.finish(state=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            if ticker is not None:
+                ticker.cancel()
+
+    def is_active(self, job_id: str) -> bool:
+        """Whether the job is queued, running or paused in this process."""
+        return job_id in self._handles
+
+    def pause(self, job_id: str) -> bool:
+        """Pause a running job at its next checkpoint."""
+        handle = self._handles.get(job_id)
+        if handle is None or handle.resumed is None:
+            return False
+        self.runner.loop.call_soon_threadsafe(handle.resumed.clear)
+        self.store.update(job_id, state=PAUSED)
+        return True
+
+    def resume(self, job_id: str) -> bool:
+        """Resume a paused job."""
+        handle = self._handles.get(job_id)
+        if handle is None or handle.resumed is None:
+            return False
+        self.runner.loop.call_soon_threadsafe(handle.resumed.set)
+        self.store.update(job_id, state=RUNNING)
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued, running or paused job."""
+        handle = self._handles.get(job_id)
+        if handle is None or handle.future is None:
+            return False
+        handle.future.cancel()
+        return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> None:
+        """Block until a job started in this process has finished."""
+        handle = self._handles.get(job_id)
+        if handle is not None and handle.future is not None:
+            try:
+                handle.future.result(timeout)
+            except concurrent.futures.CancelledError:
+                pass
@@ -0,0 +1,201 @@
+"""
+Telegram Lead Scraper - Concurrent Keyword Runner
+Runs several keywords at once behind one shared rate limiter and one URL
+frontier, merging their leads into a single stream, so a run's wall time is
+set by the request budget rather than by keyword count times latency.
+"""
+
+import asyncio
+import random
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+
+from checkpoint import COMPLETED, FAILED, LEAD, SKIPPED, CrawlCheckpoint
+
+# Concurrent detail fetches in a multi-keyword run
+KEYWORD_CONCURRENCY = 4
+
+
+class RateLimiter:
+    """
+    Spaces request starts by a random interval in [min_interval, max_interval]
+    seconds, shared by every task that waits on it. Requests may overlap;
+    only their start times are spaced.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Wait for the next free slot."""
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + random.uniform(self.min_interval, self.max_interval)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class KeywordProgress:
+    """
+    Per-keyword state and counters for a multi-keyword run: candidates found,
+    fetched, skipped by the filters, failed (pages, or the discovery itself),
+    and leads yielded.
+    """
+
+    COUNTERS = ('candidates', 'fetched', 'skipped', 'failed', 'leads')
+
+    def __init__(self, keywords: list[str], callback: Optional[Callable[[str, dict], None]] = None):
+        self.callback = callback
+        self.stats = {keyword: {'state': 'queued', **dict.fromkeys(self.COUNTERS, 0)} for keyword in keywords}
+
+    def update(self, keyword: str, state: Optional[str] = None, **counts: int) -> None:
+        """Add to a keyword's counters, optionally change its state, and report it."""
+        stats = self.stats[keyword]
+        if state:
+            stats['state'] = state
+        for counter, count in counts.items():
+            stats[counter] += count
+        if self.callback:
+            self.callback(keyword, dict(stats))
+
+    @property
+    def done(self) -> int:
+        """Number of keywords that have finished."""
+        return sum(1 for stats in self.stats.values() if stats['state'] == 'done')
+
+
+async def run_keywords(
+    discover: Callable[[str], Awaitable[list[str]]],
+    fetch: Callable[[str], Awaitable[Optional[dict]]],
+    keywords: list[str],
+    limit: int,
+    concurrency: int = KEYWORD_CONCURRENCY,
+    progress_callback: Optional[Callable[[str, dict], None]] = None,
+    checkpoint: Optional[CrawlCheckpoint] = None
+) -> AsyncGenerator[dict, None]:
+    """
+    Discover candidate URLs for every keyword concurrently and fetch them with
+    `concurrency` workers from one shared frontier. A URL found by several
+    keywords is fetched once, for the first keyword that found it. Each
+    keyword yields at most `limit` leads. discover and fetch are expected to
+    do their own rate limiting.
+
+    With a checkpoint (see checkpoint.py) each keyword's frontier and every
+    URL's outcome are recorded as they happen. Keywords the checkpoint has a
+    frontier for skip discovery, and their fetched or skipped URLs count
+    towards their stats without being requested again.
+    """
+    progress = KeywordProgress(keywords, progress_callback)
+    resumed = checkpoint.frontier() if checkpoint is not None else {}
+    frontier: asyncio.Queue = asyncio.Queue()
+    # Bounded, so workers stop fetching while the consumer isn't reading (e.g. a paused job).
+    # Ends with None, or with the exception that stopped the run
+    leads: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    seen: set[str] = set()
+    # URLs queued or in flight per keyword; a keyword is done when it has none left
+    open_urls = {keyword: 0 for keyword in keywords}
+    discovering = set(keywords)
+
+    def finish_if_done(keyword: str) -> None:
+        if keyword not in discovering and open_urls[keyword] == 0 and progress.stats[keyword]['state'] != 'done':
+            progress.update(keyword, state='done')
+
+    async def discover_keyword(keyword: str) -> None:
+        saved = resumed.get(keyword)
+        if saved is not None:
+            # Discovered before the run stopped: continue with the recorded frontier
+            fresh = saved['urls']
+            seen.update(fresh)
+            outcomes = [saved['outcomes'].get(url) for url in fresh]
+            done = sum(1 for outcome in outcomes if outcome in COMPLETED)
+            leads_so_far = sum(1 for outcome in outcomes if outcome == LEAD)
+            fresh = [url for url in fresh if saved['outcomes'].get(url) not in COMPLETED]
+            discovering.discard(keyword)
+            progress.update(
+                keyword, state='fetching', candidates=len(fresh) + done,
+                fetched=done, skipped=done - leads_so_far, leads=leads_so_far
+            )
+        else:
+            progress.update(keyword, state='discovering')
+            try:
+                urls = await discover(keyword)
+            except Exception:
+                urls = []
+                progress.update(keyword, failed=1)
+            fresh = [url for url in dict.fromkeys(urls) if url and url not in seen]
+            seen.update(fresh)
+            if checkpoint is not None:
+                checkpoint.discovered(keyword, fresh)
+            discovering.discard(keyword)
+            progress.update(keyword, state='fetching', candidates=len(fresh))
+        open_urls[keyword] += len(fresh)
+        for url in fresh:
+            frontier.put_nowait((keyword, url))
+        finish_if_done(keyword)
+
+    def record(url: str, outcome: str) -> None:
+        if checkpoint is not None:
+            checkpoint.fetched(url, outcome)
+
+    async def worker() -> None:
+        try:
+            while True:
+                keyword, url = await frontier.get()
+                try:
+                    if progress.stats[keyword]['leads'] < limit:
+                        lead = await fetch(url)
+                        if lead is None:
+                            record(url, SKIPPED)
+                            progress.update(keyword, fetched=1, skipped=1)
+                        elif progress.stats[keyword]['leads'] < limit:
+                            record(url, LEAD)
+                            progress.update(keyword, fetched=1, leads=1)
+                            await leads.put(lead)
+                        else:
+                            # The keyword reached its limit while this page was in
+                            # flight: it is stored but not yielded, and not fetched again
+                            record(url, SKIPPED)
+                            progress.update(keyword, fetched=1, skipped=1)
+                except Exception:
+                    # A failed page only costs this candidate
+                    record(url, FAILED)
+                    progress.update(keyword, failed=1)
+                finally:
+                    frontier.task_done()
+                    open_urls[keyword] -= 1
+                    finish_if_done(keyword)
+        except Exception as e:
+            # A failing checkpoint write or progress_callback ends the run
+            await leads.put(e)
+
+    async def discover_all() -> None:
+        discovery = asyncio.gather(*(discover_keyword(keyword) for keyword in keywords))
+        try:
+            await discovery
+            await frontier.join()
+        except Exception as e:
+            # Not a failed discovery (that only fails its keyword) but e.g. a
+            # failing checkpoint write or progress_callback: end the run with it
+            discovery.cancel()
+            await leads.put(e)
+            return
+        await leads.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    coordinator = asyncio.create_task(discover_all())
+    try:
+        while True:
+            lead = await leads.get()
+            if lead is None:
+                break
+            if isinstance(lead, Exception):
+                raise lead
+            yield lead
+    finally:
+        coordinator.cancel()
+        for task in workers:
+            task.cancel()
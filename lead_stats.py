@@ -0,0 +1,158 @@
+"""
+Telegram Lead Scraper - Dashboard Aggregates
+Per-category lead, admin-contact and member totals plus daily scrape counts,
+kept up to date by triggers on the leads table, so the dashboard reads a few
+summary rows instead of scanning every lead.
+"""
+
+import sqlite3
+
+# Daily scrape counts returned for the dashboard
+STATS_DAYS = 30
+
+_HAS_ADMIN = "(COALESCE({row}.admin_contact, '') != '')"
+
+
+def _add(row: str, sign: str) -> str:
+    """SQL adding (sign '+') or removing (sign '-') one row's figures to its category."""
+    return f"""
+        INSERT INTO lead_stats (category_tag, leads, with_admins, members_sum)
+        VALUES (COALESCE({row}.category_tag, ''), {sign}1, {sign}{_HAS_ADMIN.format(row=row)}, {sign}COALESCE({row}.members_count, 0))
+        ON CONFLICT(category_tag) DO UPDATE SET
+            leads = leads + excluded.leads,
+            with_admins = with_admins + excluded.with_admins,
+            members_sum = members_sum + excluded.members_sum;
+    """
+
+
+_SCRAPED = """
+        INSERT INTO lead_daily_stats (day, scraped) VALUES (substr(new.scraped_date, 1, 10), 1)
+        ON CONFLICT(day) DO UPDATE SET scraped = scraped + 1;
+"""
+
+
+def init_tables(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the aggregate tables and their triggers on leads (which must
+    exist). Tables created for an existing leads table are filled from it.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lead_stats'")
+    is_new = cursor.fetchone() is None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_stats (
+            category_tag TEXT PRIMARY KEY,
+            leads INTEGER NOT NULL DEFAULT 0,
+            with_admins INTEGER NOT NULL DEFAULT 0,
+            members_sum INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_daily_stats (
+            day TEXT PRIMARY KEY,
+            scraped INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_leads_stats_insert AFTER INSERT ON leads
+        BEGIN
+            {_add('new', '+')}
+            {_SCRAPED}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_leads_stats_delete AFTER DELETE ON leads
+        BEGIN
+            {_add('old', '-')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_leads_stats_update
+        AFTER UPDATE OF category_tag, admin_contact, members_count ON leads
+        BEGIN
+            {_add('old', '-')}
+            {_add('new', '+')}
+        END
+    """)
+    # Re-scraping a lead counts as a scrape on that day; re-scoring it doesn't
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_leads_stats_scraped
+        AFTER UPDATE OF scraped_date ON leads
+        WHEN new.scraped_date IS NOT old.scraped_date
+        BEGIN
+            {_SCRAPED}
+        END
+    """)
+    if is_new:
+        rebuild(cursor)
+
+
+def rebuild(cursor: sqlite3.Cursor) -> None:
+    """
+    Recompute the aggregates from the leads table. Daily counts can only be
+    rebuilt from each lead's latest scrape; earlier re-scrapes are lost.
+    """
+    cursor.execute("DELETE FROM lead_stats")
+    cursor.execute(f"""
+        INSERT INTO lead_stats (category_tag, leads, with_admins, members_sum)
+        SELECT COALESCE(category_tag, ''), COUNT(*), SUM({_HAS_ADMIN.format(row='leads')}), SUM(COALESCE(members_count, 0))
+        FROM leads GROUP BY COALESCE(category_tag, '')
+    """)
+    cursor.execute("DELETE FROM lead_daily_stats")
+    cursor.execute("""
+        INSERT INTO lead_daily_stats (day, scraped)
+        SELECT substr(scraped_date, 1, 10), COUNT(*) FROM leads
+        WHERE scraped_date IS NOT NULL GROUP BY substr(scraped_date, 1, 10)
+    """)
+
+
+def summarize(category_rows: list[dict], daily_rows: list[dict]) -> dict:
+    """
+    Combine the aggregate rows into the dashboard figures: total, with_admins,
+    members, categories ({tag: row} for non-empty categories) and daily ({day: scraped}).
+    """
+    categories = {row['category_tag']: row for row in category_rows if row['leads'] > 0}
+    return {
+        'total': sum(row['leads'] for row in categories.values()),
+        'with_admins': sum(row['with_admins'] for row in categories.values()),
+        'members': sum(row['members_sum'] for row in categories.values()),
+        'categories': {tag: row for tag, row in categories.items() if tag},
+        'daily': {row['day']: row['scraped'] for row in sorted(daily_rows, key=lambda r: r['day'])},
+    }
+
+
+def load(cursor: sqlite3.Cursor, days: int = STATS_DAYS) -> dict:
+    """Read the aggregates (see summarize)."""
+    cursor.execute("SELECT category_tag, leads, with_admins, members_sum FROM lead_stats")
+    category_rows = [
+        {'category_tag': tag, 'leads': leads, 'with_admins': with_admins, 'members_sum': members_sum}
+        for tag, leads, with_admins, members_sum in cursor.fetchall()
+    ]
+    cursor.execute("SELECT day, scraped FROM lead_daily_stats ORDER BY day DESC LIMIT ?", (days,))
+    daily_rows = [{'day': day, 'scraped': scraped} for day, scraped in cursor.fetchall()]
+    return summarize(category_rows, daily_rows)
+
+
+def apply(category_rows: list[dict], daily_rows: list[dict], changes: list[tuple]) -> tuple[list[dict], list[dict]]:
+    """
+    Aggregate rows (as read, before summarize) with lead writes applied the
+    way the triggers would: changes are (old, new) lead dicts, old None for
+    a new lead. Used to count leads not yet pushed to Supabase.
+    """
+    categories = {row['category_tag']: dict(row) for row in category_rows}
+    daily = {row['day']: dict(row) for row in daily_rows}
+
+    def add(lead: dict, sign: int) -> None:
+        tag = lead.get('category_tag') or ''
+        row = categories.setdefault(tag, {'category_tag': tag, 'leads': 0, 'with_admins': 0, 'members_sum': 0})
+        row['leads'] += sign
+        row['with_admins'] += sign * bool(lead.get('admin_contact'))
+        row['members_sum'] += sign * (lead.get('members_count') or 0)
+
+    for old, new in changes:
+        if old is not None:
+            add(old, -1)
+        add(new, 1)
+        if new.get('scraped_date') and (old is None or new['scraped_date'] != old.get('scraped_date')):
+            day = new['scraped_date'][:10]
+            daily.setdefault(day, {'day': day, 'scraped': 0})['scraped'] += 1
+    return list(categories.values()), list(daily.values())
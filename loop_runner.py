@@ -0,0 +1,59 @@
+"""
+Telegram Lead Scraper - Background Event Loop
+One long-lived asyncio loop on a daemon thread. Clients created on it (the
+TelegramClient, the shared httpx client) stay bound to it, so they survive
+Streamlit reruns instead of being tied to a short-lived asyncio.run() loop.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class LoopRunner:
+    """Runs coroutines on a persistent event loop in a background thread."""
+
+    def __init__(self, name: str = "scraper-loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread.is_alive() and not self.loop.is_closed()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop and return a thread-safe future."""
+        if not self.is_running:
+            coro.close()
+            raise RuntimeError("Event loop runner has been stopped.")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it finishes."""
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel outstanding tasks, stop the loop and join the thread."""
+        if not self.is_running:
+            return
+
+        async def cancel_all() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            self.run(cancel_all(), timeout)
+        except concurrent.futures.TimeoutError:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        if not self.thread.is_alive():
+            self.loop.close()
@@ -0,0 +1,109 @@
+"""
+Telegram Lead Scraper - Keyword Matcher
+Compiles keyword lists (blocked, personal, business) into a single regex so
+channel text is scanned once instead of once per keyword.
+"""
+
+import re
+from typing import Iterable
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """
+    Build a regex alternation from a trie of the words.
+    Shared prefixes are factored out (e.g. hack|hacker -> hack(?:er)?), which keeps
+    the regex engine from re-trying every alternative at each position.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: dict) -> str:
+        optional = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            body = branches[0]
+            if optional:
+                return f"(?:{body})?"
+            return body
+        body = "(?:" + "|".join(branches) + ")"
+        return body + ("?" if optional else "")
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive substring matcher over a fixed keyword list.
+
+    Gives the same answers as `keyword.lower() in text.lower()` for every keyword,
+    including keywords nested inside other keywords and duplicates in the list.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = [k.lower() for k in keywords if k]
+        # Duplicates in the source list count once per occurrence, as in the loop-based checks
+        self._weights: dict[str, int] = {}
+        for keyword in self.keywords:
+            self._weights[keyword] = self._weights.get(keyword, 0) + 1
+
+        unique = list(self._weights)
+        # Every keyword that is a substring of another is implied by it
+        self._implied: dict[str, tuple[str, ...]] = {
+            outer: tuple(inner for inner in unique if inner != outer and inner in outer)
+            for outer in unique
+        }
+
+        body = _trie_pattern(unique) if unique else r'(?!)'
+        self._search_re = re.compile(body)
+        # Lookahead finds the longest keyword starting at every position (overlaps included)
+        self._scan_re = re.compile(f"(?=({body}))")
+
+    def matches(self, text: str) -> bool:
+        """Return True if any keyword occurs in the text."""
+        return bool(text) and self._search_re.search(text.lower()) is not None
+
+    def find(self, text: str) -> set[str]:
+        """Return the set of keywords that occur in the text."""
+        if not text:
+            return set()
+        found = set(self._scan_re.findall(text.lower()))
+        if not found:
+            return found
+        return found.union(*(self._implied[keyword] for keyword in found))
+
+    def count(self, text: str) -> int:
+        """Count matching keywords, weighting duplicates like the per-keyword loops do."""
+        return sum(self._weights[k] for k in self.find(text))
+
+
+class VocabularyMatcher:
+    """
+    Scores text against several named keyword lists in a single scan.
+    `scores(text)` returns {list_name: count} with the same counting rules as
+    KeywordMatcher.count, but the text is only lowercased and scanned once.
+    """
+
+    def __init__(self, lists: dict[str, Iterable[str]]):
+        self.names = list(lists)
+        # keyword -> per-list occurrence counts, in self.names order
+        self._weights: dict[str, list[int]] = {}
+        for index, keywords in enumerate(lists.values()):
+            for keyword in keywords:
+                if keyword:
+                    weights = self._weights.setdefault(keyword.lower(), [0] * len(self.names))
+                    weights[index] += 1
+        self._matcher = KeywordMatcher(self._weights)
+
+    def scores(self, text: str) -> dict[str, int]:
+        """Return the per-list keyword count for the text."""
+        totals = [0] * len(self.names)
+        for keyword in self._matcher.find(text):
+            for index, weight in enumerate(self._weights[keyword]):
+                totals[index] += weight
+        return dict(zip(self.names, totals))
@@ -0,0 +1,280 @@
+"""
+Telegram Lead Scraper - Supabase Outbox
+With Supabase configured, leads are still written to the local SQLite file
+first, and the same transaction queues their channel IDs in lead_outbox. A
+background syncer pushes queued leads to Supabase in batched upserts and
+retries failed batches with exponential backoff, so scraping never waits on
+Supabase and an outage delays leads instead of dropping them.
+
+Pushes are idempotent: each is an upsert on channel_id of the lead's
+current local row, and an entry is only removed if the lead wasn't written
+again while the push was in flight (its version is unchanged).
+
+A failed batch is split in halves and pushed again, so a lead Supabase
+rejects (bad data, a constraint) doesn't hold back the rest of its batch.
+A lead rejected on its own, in a round where other leads went through,
+MAX_REJECTIONS times is parked: it stays in the outbox, shown by status(),
+but isn't pushed again until retry_parked() or the lead is written again.
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+# Leads per Supabase upsert
+SYNC_BATCH = 500
+# Seconds between syncs when nothing wakes the syncer sooner
+SYNC_INTERVAL = 5.0
+# Retry backoff: RETRY_DELAY seconds, doubled per failed attempt, at most MAX_RETRY_DELAY
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 600
+# Failed pushes in a round, with none going through, after which a failed batch
+# isn't split any further (Supabase is probably down) and waits for its backoff
+MAX_SPLIT_FAILURES = 8
+# Times a lead may be rejected on its own before it is parked
+MAX_REJECTIONS = 3
+
+
+def init_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the outbox table."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lead_outbox (
+            channel_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 1,
+            queued_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            rejections INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Outboxes from before parking
+    cursor.execute("PRAGMA table_info(lead_outbox)")
+    if "rejections" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE lead_outbox ADD COLUMN rejections INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lead_outbox_next ON lead_outbox (next_attempt)")
+
+
+def enqueue(cursor: sqlite3.Cursor, channel_ids: list[int]) -> None:
+    """
+    Queue leads for the next push, in the transaction that wrote them. A lead
+    already queued just gets a new version; a failing one keeps its backoff,
+    and a parked one is pushed again with its new data.
+    """
+    now = time.time()
+    cursor.executemany(
+        """
+        INSERT INTO lead_outbox (channel_id, queued_at) VALUES (?, ?)
+        ON CONFLICT(channel_id) DO UPDATE SET version = version + 1, rejections = 0
+        """,
+        [(channel_id, now) for channel_id in channel_ids]
+    )
+
+
+def push_batch(path: Path, push: Callable[[list[dict]], None], limit: int = SYNC_BATCH) -> tuple[int, Optional[str]]:
+    """
+    Push up to `limit` due leads with push(rows). Returns (leads pushed, last
+    error): (0, None) when nothing is due. A failed batch is split in halves,
+    both pushed again, and so on down to single leads; leads that still fail
+    are retried after a backoff, or parked (see above). Whether Supabase is
+    up when nothing went through is checked with push([]).
+    """
+    now = time.time()
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        """
+        SELECT o.version AS outbox_version, o.attempts AS outbox_attempts, l.*
+        FROM lead_outbox o JOIN leads l ON l.channel_id = o.channel_id
+        WHERE o.next_attempt <= ? AND o.rejections < ? ORDER BY o.next_attempt, o.queued_at LIMIT ?
+        """,
+        (now, MAX_REJECTIONS, limit)
+    ).fetchall()
+    conn.close()
+    if not rows:
+        return 0, None
+
+    pushed = []
+    failed = {}  # channel_id -> (row, error, whether it failed on its own)
+    failures = 0
+    error = None
+
+    def attempt(part: list[sqlite3.Row]) -> bool:
+        nonlocal failures, error
+        try:
+            push([{key: row[key] for key in row.keys() if not key.startswith("outbox_")} for row in part])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            failures += 1
+            for row in part:
+                failed[row['channel_id']] = (row, error, len(part) == 1)
+            return False
+        pushed.extend(part)
+        return True
+
+    def split(part: list[sqlite3.Row]) -> None:
+        # Both halves are pushed before either is split further, so a push
+        # going through early stops the failure cap from applying
+        halves = [part[:len(part) // 2], part[len(part) // 2:]]
+        for half in [half for half in halves if not attempt(half)]:
+            if len(half) > 1 and (pushed or failures < MAX_SPLIT_FAILURES):
+                split(half)
+
+    if not attempt(rows) and len(rows) > 1:
+        split(rows)
+    for row in pushed:
+        failed.pop(row['channel_id'], None)
+    blame = bool(pushed)
+    if not pushed and any(alone for _, _, alone in failed.values()):
+        try:
+            push([])
+            blame = True
+        except Exception:
+            pass  # Supabase is down: no lead is to blame on its own
+
+    conn = sqlite3.connect(path, timeout=30)
+    conn.executemany(
+        "DELETE FROM lead_outbox WHERE channel_id = ? AND version = ?",
+        [(row['channel_id'], row['outbox_version']) for row in pushed]
+    )
+    conn.executemany(
+        """
+        UPDATE lead_outbox SET attempts = attempts + 1, next_attempt = ?, last_error = ?,
+            rejections = rejections + ? WHERE channel_id = ?
+        """,
+        [
+            (now + min(RETRY_DELAY * 2 ** row['outbox_attempts'], MAX_RETRY_DELAY) * random.uniform(1.0, 1.2),
+             row_error[:500], int(blame and alone), row['channel_id'])
+            for row, row_error, alone in failed.values()
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return len(pushed), error
+
+
+def retry_parked(path: Path) -> int:
+    """Push parked leads again at the next sync. Returns how many there were."""
+    conn = sqlite3.connect(path, timeout=30)
+    retried = conn.execute(
+        "UPDATE lead_outbox SET rejections = 0, attempts = 0, next_attempt = 0 WHERE rejections >= ?",
+        (MAX_REJECTIONS,)
+    ).rowcount
+    conn.commit()
+    conn.close()
+    return retried
+
+
+def status(path: Path) -> dict:
+    """
+    Outbox figures for display: pending (parked included), failing (retried
+    at least once, not parked), parked, oldest queued_at, and the last errors
+    of failing and of parked leads.
+    """
+    try:
+        conn = sqlite3.connect(path, timeout=30)
+        pending, failing, parked, oldest = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(attempts > 0 AND rejections < ?), 0), COALESCE(SUM(rejections >= ?), 0), "
+            "MIN(queued_at) FROM lead_outbox",
+            (MAX_REJECTIONS, MAX_REJECTIONS)
+        ).fetchone()
+        row = conn.execute(
+            "SELECT last_error FROM lead_outbox WHERE last_error IS NOT NULL AND rejections < ? ORDER BY next_attempt DESC LIMIT 1",
+            (MAX_REJECTIONS,)
+        ).fetchone()
+        parked_row = conn.execute(
+            "SELECT last_error FROM lead_outbox WHERE rejections >= ? ORDER BY next_attempt DESC LIMIT 1",
+            (MAX_REJECTIONS,)
+        ).fetchone()
+        conn.close()
+    except sqlite3.OperationalError:
+        return {'pending': 0, 'failing': 0, 'parked': 0, 'oldest': None, 'last_error': None, 'parked_error': None}
+    return {
+        'pending': pending, 'failing': failing, 'parked': parked, 'oldest': oldest,
+        'last_error': row[0] if row else None, 'parked_error': parked_row[0] if parked_row else None,
+    }
+
+
+class OutboxSyncer:
+    """
+    Pushes the outbox on a daemon thread: every `interval` seconds, or as
+    soon as wake() is called after a write, it pushes due batches until none
+    is due or one fails. `push` can be replaced while running (a new
+    Supabase client after the app's credentials change).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        push: Callable[[list[dict]], None],
+        batch_size: int = SYNC_BATCH,
+        interval: float = SYNC_INTERVAL,
+        status_callback: Optional[Callable[[str], None]] = None
+    ):
+        self.path = path
+        self.push = push
+        self.batch_size = batch_size
+        self.interval = interval
+        self.status_callback = status_callback
+        self.pushed = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-sync", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def sync(self) -> tuple[int, Optional[str]]:
+        """Push due batches until none is due or one fails. Returns (leads pushed, last error)."""
+        total = 0
+        with self._lock:
+            while True:
+                pushed, error = push_batch(self.path, self.push, self.batch_size)
+                total += pushed
+                if error and self.status_callback:
+                    self.status_callback(f"Supabase sync failed, will retry: {error}")
+                if error or pushed < self.batch_size:
+                    self.pushed += total
+                    return total, error
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                # The local file itself failed (locked, missing table); try again next round
+                print(f"Outbox sync error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stop(self, timeout: float = 0) -> int:
+        """
+        Stop the thread, first trying for up to `timeout` seconds to push what
+        is due. Returns the leads still in the outbox; they are pushed by the
+        next syncer on this file.
+        """
+        deadline = time.monotonic() + timeout
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(max(deadline - time.monotonic(), 0.1))
+        while time.monotonic() < deadline:
+            pushed, error = self.sync()
+            if error or not pushed:
+                break
+        return status(self.path)['pending']
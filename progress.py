@@ -0,0 +1,149 @@
+"""
+Telegram Lead Scraper - Progress Reporting
+Turns the scrapers' status, flood and per-keyword callbacks into structured
+events (fetched, skipped, failed, saved, flood, ...), keeps the recent log
+lines in a ring buffer, and coalesces updates so a UI is redrawn at most a
+few times per second however chatty the scrapers are. Used by background
+jobs and the command line alike.
+"""
+
+import asyncio
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Iterable, NamedTuple, Optional
+
+# Log lines kept in memory per run
+LOG_SIZE = 200
+# Coalesced updates are delivered at most this often (seconds): 4 per second
+UPDATE_INTERVAL = 0.25
+
+# Event kinds
+LOG = "log"
+KEYWORD = "keyword"
+FETCHED = "fetched"
+SKIPPED = "skipped"
+FAILED = "failed"
+SAVED = "saved"
+FLOOD = "flood"
+
+# Per-keyword counters (see keyword_runner.KeywordProgress) that are reported
+# as events of their own when they grow
+COUNTER_EVENTS = {'fetched': FETCHED, 'skipped': SKIPPED, 'failed': FAILED}
+
+
+class ProgressEvent(NamedTuple):
+    """One thing that happened during a run."""
+    kind: str
+    at: float
+    message: str = ""
+    keyword: str = ""
+    count: int = 1
+    seconds: int = 0
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class ProgressReporter:
+    """
+    Collects a run's events. Pass status, flood and keyword as the scrapers'
+    status_callback, flood_callback and progress_callback, and call saved()
+    for each lead the run yields.
+
+    on_event gets every event as it happens (e.g. to print JSON lines);
+    on_update gets the reporter itself, at most once per `interval` seconds
+    and only when something changed. Call flush() at the end of the run, or
+    run ticker() alongside it so a quiet spell still shows the last change.
+    """
+
+    def __init__(
+        self,
+        keywords: Iterable[str] = (),
+        log_size: int = LOG_SIZE,
+        interval: float = UPDATE_INTERVAL,
+        on_update: Optional[Callable[["ProgressReporter"], None]] = None,
+        on_event: Optional[Callable[[ProgressEvent], None]] = None
+    ):
+        self.lines: deque[ProgressEvent] = deque(maxlen=log_size)
+        self.counts: Counter = Counter()
+        self.keywords: dict[str, dict] = {keyword: {'state': 'queued'} for keyword in keywords}
+        self.flood_seconds = 0
+        self.fraction = 0.0
+        self.last_message = ""
+        self.interval = interval
+        self.on_update = on_update
+        self.on_event = on_event
+        self._dirty = False
+        self._last_update = 0.0
+
+    # --- Scraper callbacks ---
+
+    def status(self, message: str) -> None:
+        self.emit(LOG, message=message)
+
+    def flood(self, seconds: int) -> None:
+        self.flood_seconds += seconds
+        self.emit(FLOOD, seconds=seconds)
+
+    def keyword(self, keyword: str, stats: dict) -> None:
+        """Record a keyword's stats, emitting counter events for what changed."""
+        previous = self.keywords.get(keyword, {})
+        self.keywords[keyword] = dict(stats)
+        for key, kind in COUNTER_EVENTS.items():
+            grown = stats.get(key, 0) - previous.get(key, 0)
+            if grown > 0:
+                self.emit(kind, keyword=keyword, count=grown)
+        if stats.get('state') != previous.get('state'):
+            self.emit(KEYWORD, message=stats.get('state', ""), keyword=keyword)
+
+    def saved(self, lead: dict) -> None:
+        self.emit(SAVED, message=lead.get('title') or "", keyword=lead.get('username') or "")
+
+    def set_progress(self, fraction: float) -> None:
+        self.fraction = fraction
+        self._dirty = True
+        self._maybe_update()
+
+    # --- Events and updates ---
+
+    def emit(self, kind: str, message: str = "", keyword: str = "", count: int = 1, seconds: int = 0) -> ProgressEvent:
+        event = ProgressEvent(kind, time.time(), message, keyword, count, seconds)
+        self.counts[kind] += count
+        if kind == LOG:
+            self.last_message = message
+            self.lines.append(event)
+        if self.on_event:
+            self.on_event(event)
+        self._dirty = True
+        self._maybe_update()
+        return event
+
+    @property
+    def keywords_done(self) -> int:
+        return sum(1 for stats in self.keywords.values() if stats.get('state') == 'done')
+
+    def recent_lines(self, limit: int = 20) -> list[str]:
+        """The last `limit` log lines with timestamps, oldest first."""
+        return [
+            f"[{datetime.fromtimestamp(event.at).strftime('%H:%M:%S')}] {event.message}"
+            for event in list(self.lines)[-limit:]
+        ]
+
+    def _maybe_update(self) -> None:
+        if time.monotonic() - self._last_update >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Deliver a pending update now."""
+        if self._dirty and self.on_update:
+            self._dirty = False
+            self.on_update(self)
+        self._last_update = time.monotonic()
+
+    async def ticker(self) -> None:
+        """Deliver coalesced updates every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._dirty:
+                self.flush()
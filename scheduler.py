@@ -0,0 +1,129 @@
+"""
+Telegram Lead Scraper - FloodWait Scheduler
+Runs scraping jobs one after another. A job that hits a FloodWait is parked in
+a delayed queue until the server-given wake time and then retried, while the
+other jobs keep running instead of the whole run sleeping.
+"""
+
+import asyncio
+import heapq
+import itertools
+import sys
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
+
+# A job parked more often than this is given up
+MAX_PARKS = 5
+
+
+def flood_wait_seconds(error: BaseException) -> Optional[int]:
+    """
+    The wait of a Telethon FloodWaitError, None for any other error. Telethon
+    is imported by the Telegram scraper only; until then no FloodWaitError
+    can have been raised, so Tgstat runs don't have to load it.
+    """
+    errors = sys.modules.get("telethon.errors")
+    if errors is not None and isinstance(error, errors.FloodWaitError):
+        return error.seconds
+    return None
+
+
+class Job:
+    """
+    A unit of work: a coroutine factory, so the job can be run again after
+    parking. on_drop is called if the job is given up after max_parks.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[], Awaitable[Any]],
+        name: str,
+        priority: int,
+        on_drop: Optional[Callable[[], Any]] = None
+    ):
+        self.run = run
+        self.name = name
+        self.priority = priority
+        self.on_drop = on_drop
+        self.parks = 0
+
+
+class FloodScheduler:
+    """
+    Ready jobs run in (priority, submission) order. Jobs may submit further
+    jobs while running. results() yields each finished job's return value;
+    a job given up after max_parks FloodWaits yields nothing, but its on_drop
+    callback lets the submitter account for the lost work.
+    """
+
+    def __init__(
+        self,
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None,
+        max_parks: int = MAX_PARKS
+    ):
+        self.status_callback = status_callback
+        self.flood_callback = flood_callback
+        self.max_parks = max_parks
+        self._ready: list[tuple] = []
+        self._parked: list[tuple] = []
+        self._seq = itertools.count()
+        self.parked_count = 0
+        self.parked_seconds = 0
+        self.dropped_count = 0
+
+    def submit(
+        self,
+        run: Callable[[], Awaitable[Any]],
+        name: str = "job",
+        priority: int = 0,
+        on_drop: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """Queue a job. Lower priority values run first."""
+        heapq.heappush(self._ready, (priority, next(self._seq), Job(run, name, priority, on_drop)))
+
+    @property
+    def pending(self) -> int:
+        """Jobs still waiting to run, parked ones included."""
+        return len(self._ready) + len(self._parked)
+
+    def _park(self, job: Job, seconds: int) -> None:
+        """Move a throttled job to the delayed queue, or drop it after max_parks."""
+        job.parks += 1
+        if self.flood_callback:
+            self.flood_callback(seconds)
+        if job.parks > self.max_parks:
+            self.dropped_count += 1
+            if self.status_callback:
+                self.status_callback(f"❌ Giving up on {job.name} after {self.max_parks} FloodWaits")
+            if job.on_drop:
+                job.on_drop()
+            return
+        self.parked_count += 1
+        self.parked_seconds += seconds
+        heapq.heappush(self._parked, (time.monotonic() + seconds, next(self._seq), job))
+        if self.status_callback:
+            self.status_callback(f"🚫 FloodWait on {job.name}: parked for {seconds}s, continuing with other work")
+
+    async def results(self) -> AsyncGenerator[Any, None]:
+        """Run jobs until none are ready or parked, yielding their return values."""
+        while self._ready or self._parked:
+            now = time.monotonic()
+            while self._parked and self._parked[0][0] <= now:
+                job = heapq.heappop(self._parked)[2]
+                heapq.heappush(self._ready, (job.priority, next(self._seq), job))
+            if not self._ready:
+                # Only parked jobs left: wait for the earliest wake time
+                await asyncio.sleep(self._parked[0][0] - now)
+                continue
+
+            job = heapq.heappop(self._ready)[2]
+            try:
+                result = await job.run()
+            except Exception as e:
+                seconds = flood_wait_seconds(e)
+                if seconds is None:
+                    raise
+                self._park(job, seconds)
+                continue
+            yield result
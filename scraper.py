@@ -4,32 +4,51 @@ Handles Telethon API interactions, SQLite database, and anti-ban measures.
 """
 
 import asyncio
+import hashlib
+import math
 import re
 import sqlite3
 import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional, AsyncGenerator, Callable
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Optional, AsyncGenerator, Awaitable, Callable
 from pathlib import Path
 
-from telethon import TelegramClient
-from telethon.tl.functions.contacts import SearchRequest
-from telethon.tl.types import Channel, Chat
-from telethon.errors import FloodWaitError, SessionPasswordNeededError
+import activity
+import crawl
+import dedupe
+import lead_stats
+import outbox
+from scheduler import MAX_PARKS, FloodScheduler
+from entity_cache import EntityCache
+from checkpoint import CrawlCheckpoint
+from discovery_cache import DiscoveryCache
+from keyword_runner import KEYWORD_CONCURRENCY, KeywordProgress, RateLimiter, run_keywords
+from contacts import extract_contacts, format_contacts
+import vocab
 
 
 import os
 import sqlite3
 
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-    Client = object # Dummy for type hinting if needed or just ignore
-    print("[WARNING] Supabase library not installed. Using SQLite only.")
+# The heavy client libraries are imported by the code that uses them:
+# telethon by TelegramScraper, httpx/bs4/duckduckgo_search by TgstatScraper
+# and supabase by init_database() when credentials are given, so a Tgstat or
+# SQLite-only process never loads the others (see bench_import.py).
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+    from telethon import TelegramClient
+
+SUPABASE_AVAILABLE = find_spec("supabase") is not None
 
 # Supabase configuration
 _supabase: Optional['Client'] = None
+# Pushes leads from the local outbox to Supabase (see outbox.py)
+_syncer: Optional[outbox.OutboxSyncer] = None
 # SQLite configuration
 DB_PATH = Path(__file__).parent / "leads.db"
 
@@ -46,10 +65,24 @@ def init_database(url: Optional[str] = None, key: Optional[str] = None) -> None:
     if not key:
         key = os.environ.get("SUPABASE_KEY")
         
-    if SUPABASE_AVAILABLE and url and key:
+    if url and key and not SUPABASE_AVAILABLE:
+        print("[WARNING] Supabase library not installed. Using SQLite only.")
+    elif url and key:
         try:
+            from supabase import create_client
             _supabase = create_client(url, key)
             print("✅ Connected to Supabase")
+            # Leads are written locally first and pushed by the outbox syncer;
+            # derived data (duplicate index, activity) only lives locally
+            conn = sqlite3.connect(DB_PATH)
+            cursor = conn.cursor()
+            _init_leads_table(cursor)
+            _init_local_tables(cursor)
+            outbox.init_tables(cursor)
+            _check_score_version(cursor)
+            conn.commit()
+            conn.close()
+            _start_sync()
             return
         except Exception as e:
             print(f"Supabase connection error: {e}")
@@ -57,9 +90,18 @@ def init_database(url: Optional[str] = None, key: Optional[str] = None) -> None:
 
     # 2. Fallback to SQLite
     print("[INFO] Supabase credentials not found/failed. Using local SQLite.")
+    _supabase = None
+    _stop_sync()
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    
+    _init_leads_table(cursor)
+    _init_local_tables(cursor)
+    _check_score_version(cursor)
+    conn.commit()
+    conn.close()
+
+def _init_leads_table(cursor: sqlite3.Cursor) -> None:
+    """Create or migrate the local leads table and its dashboard aggregates."""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS leads (
             channel_id INTEGER PRIMARY KEY,
@@ -72,8 +114,249 @@ def init_database(url: Optional[str] = None, key: Optional[str] = None) -> None:
             scraped_date TEXT
         )
     """)
-    conn.commit()
-    conn.close()
+    _migrate_leads_columns(cursor)
+    lead_stats.init_tables(cursor)
+
+def _check_score_version(cursor: sqlite3.Cursor) -> None:
+    """
+    Mark a database without leads as scored with the current formula; for
+    one with older scores, point at migrate_scores instead of re-scoring on
+    every start.
+    """
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= SCORE_VERSION:
+        return
+    cursor.execute("SELECT 1 FROM leads LIMIT 1")
+    if cursor.fetchone() is None:
+        cursor.execute(f"PRAGMA user_version = {SCORE_VERSION}")
+    else:
+        print("[INFO] Stored lead scores predate the current formula; run `python cli.py rescore` to update them.")
+
+def _push_leads(records: list[dict]) -> None:
+    _supabase.table("leads").upsert(records, on_conflict="channel_id").execute()
+
+def _start_sync() -> None:
+    """Start (once per database file) the background push of the outbox to Supabase."""
+    global _syncer
+    if _syncer is not None and _syncer.path != DB_PATH:
+        _stop_sync()
+    if _syncer is None:
+        _syncer = outbox.OutboxSyncer(DB_PATH, _push_leads)
+    _syncer.start()
+
+def _stop_sync(timeout: float = 0) -> int:
+    global _syncer
+    if _syncer is None:
+        return 0
+    pending = _syncer.stop(timeout)
+    _syncer = None
+    return pending
+
+def close_database(timeout: float = 30) -> int:
+    """
+    Stop the Supabase sync, first pushing queued leads for up to timeout
+    seconds. Returns the leads left in the outbox; the next process using
+    this database file pushes them.
+    """
+    return _stop_sync(timeout)
+
+def get_sync_status() -> Optional[dict]:
+    """The outbox's pending/failing/parked counts, oldest entry and last errors (see outbox.status); None without Supabase."""
+    if not _supabase:
+        return None
+    return outbox.status(DB_PATH)
+
+def retry_parked_leads() -> int:
+    """Push the leads Supabase kept rejecting again (see outbox.py). Returns how many."""
+    retried = outbox.retry_parked(DB_PATH)
+    if _syncer is not None:
+        _syncer.wake()
+    return retried
+
+def _init_local_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the derived-data tables and the change counter in the local SQLite file."""
+    dedupe.init_tables(cursor)
+    activity.init_tables(cursor)
+    _init_change_counter(cursor)
+
+# Tables whose writes change what the dashboard shows
+VERSIONED_TABLES = ("leads", "lead_signatures", "lead_activity")
+
+def _init_change_counter(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the data_version counter and triggers that bump it on every write
+    to VERSIONED_TABLES (those present locally).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (0, 0)")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing = {row[0] for row in cursor.fetchall()}
+    for table in VERSIONED_TABLES:
+        if table not in existing:
+            continue
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation.lower()}_version
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE data_version SET version = version + 1 WHERE id = 0;
+                END
+            """)
+
+def get_change_token() -> str:
+    """
+    Return a cheap token that changes whenever the stored leads, their
+    duplicate index or their activity figures change, for caching dashboard
+    queries. With Supabase, writes by other clients show up through the
+    newest scraped_date.
+    """
+    global _supabase
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM data_version WHERE id = 0")
+        row = cursor.fetchone()
+        conn.close()
+        local_version = row[0] if row else 0
+    except Exception as e:
+        print(f"SQLite version error: {e}")
+        local_version = 0
+    
+    # 1. Supabase
+    if _supabase:
+        try:
+            response = _supabase.table("leads").select("scraped_date").order("scraped_date", desc=True).limit(1).execute()
+            latest = response.data[0]["scraped_date"] if response.data else ""
+        except Exception as e:
+            print(f"Supabase fetch error: {e}")
+            latest = ""
+        return f"supabase:{latest}:{local_version}"
+    
+    # 2. SQLite
+    return f"sqlite:{local_version}"
+
+# Columns added after the original schema: (name, SQL type)
+LEAD_EXTRA_COLUMNS = [
+    ("is_safe", "INTEGER"),
+    ("business_score", "INTEGER"),
+    ("personal_score", "INTEGER"),
+    ("lead_score", "REAL"),
+]
+
+def _migrate_leads_columns(cursor: sqlite3.Cursor) -> None:
+    """Add any missing scoring columns and indexes to an existing leads table."""
+    cursor.execute("PRAGMA table_info(leads)")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, sql_type in LEAD_EXTRA_COLUMNS:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE leads ADD COLUMN {name} {sql_type}")
+    # "Top N leads" (optionally per category) is answered straight from these indexes
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_score ON leads (lead_score DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_category_score ON leads (category_tag, lead_score DESC)")
+
+# Bumped when the lead_score formula changes; stored leads are then re-scored
+# once by migrate_scores (`cli.py rescore`, or the app's background job)
+SCORE_VERSION = 2
+
+# Lead score weights
+SCORE_MEMBERS_WEIGHT = 1.0       # per order of magnitude of members
+SCORE_BUSINESS_WEIGHT = 0.5      # per business keyword
+SCORE_PERSONAL_WEIGHT = 0.5      # per personal keyword (subtracted)
+SCORE_ADMIN_BONUS = 1.5          # lead has at least one admin contact
+SCORE_FRESHNESS_BONUS = 1.0      # lead scraped just now; never more than this
+SCORE_FRESHNESS_DAYS = 90.0      # the bonus decays linearly to 0 over this many days
+
+def compute_lead_score(
+    business_score: int,
+    personal_score: int,
+    members_count: Optional[int],
+    admin_contact: Optional[str],
+    scraped_date: Optional[str],
+    now: Optional[datetime] = None
+) -> float:
+    """
+    Combine keyword signals, audience size, admin contacts and freshness into one number.
+
+    Freshness is a bounded bonus (at most SCORE_FRESHNESS_BONUS, gone after
+    SCORE_FRESHNESS_DAYS) so that it only breaks ties between otherwise similar
+    leads. It is computed against `now` (default: the current time) whenever
+    the score is; stored scores age when leads are re-scraped or re-classified.
+    """
+    score = math.log10(max(members_count or 0, 0) + 1) * SCORE_MEMBERS_WEIGHT
+    score += (business_score or 0) * SCORE_BUSINESS_WEIGHT
+    score -= (personal_score or 0) * SCORE_PERSONAL_WEIGHT
+    if admin_contact:
+        score += SCORE_ADMIN_BONUS
+    if scraped_date:
+        try:
+            age_days = max(((now or datetime.now()) - datetime.fromisoformat(scraped_date)).total_seconds() / 86400.0, 0.0)
+            score += SCORE_FRESHNESS_BONUS * max(1.0 - age_days / SCORE_FRESHNESS_DAYS, 0.0)
+        except (ValueError, TypeError):
+            pass
+    return round(score, 4)
+
+# Columns of a stored lead, in INSERT order
+LEAD_COLUMNS = (
+    "channel_id", "username", "title", "category_tag",
+    "members_count", "bio_text", "admin_contact", "scraped_date",
+    "is_safe", "business_score", "personal_score", "lead_score"
+)
+
+_UPSERT_SQL = f"""
+    INSERT INTO leads ({", ".join(LEAD_COLUMNS)})
+    VALUES ({", ".join("?" * len(LEAD_COLUMNS))})
+    ON CONFLICT(channel_id) DO UPDATE SET
+        {", ".join(f"{column} = excluded.{column}" for column in LEAD_COLUMNS[1:])}
+"""
+
+# Lead writes go to a single-writer process instead of the database when set (see writer.py)
+_writer = None
+
+def use_writer(client) -> None:
+    """Send lead writes to a writer.WriterClient (or write directly again with None)."""
+    global _writer
+    _writer = client
+
+def flush_writes(timeout: Optional[float] = None) -> None:
+    """
+    Wait until every lead written so far (in the current context, after the
+    writer's track()) is committed by the writer process. Raises
+    writer.WriterError if any of them couldn't be. No-op without a writer.
+    """
+    if _writer is not None:
+        _writer.flush(timeout)
+
+def lead_record(
+    channel_id: int,
+    username: Optional[str],
+    title: str,
+    category_tag: str,
+    members_count: int,
+    bio_text: Optional[str],
+    admin_contact: Optional[str]
+) -> dict:
+    """The row stored for a lead: the given fields plus scraped_date, classification and lead_score."""
+    scraped_date = datetime.now().isoformat()
+    is_safe, business_score, personal_score = classify_channel(title, bio_text or "")
+    return {
+        "channel_id": channel_id,
+        "username": username,
+        "title": title,
+        "category_tag": category_tag,
+        "members_count": members_count,
+        "bio_text": bio_text,
+        "admin_contact": admin_contact,
+        "scraped_date": scraped_date,
+        "is_safe": is_safe,
+        "business_score": business_score,
+        "personal_score": personal_score,
+        "lead_score": compute_lead_score(business_score, personal_score, members_count, admin_contact, scraped_date)
+    }
 
 def upsert_lead(
     channel_id: int,
@@ -83,75 +366,279 @@ def upsert_lead(
     members_count: int,
     bio_text: Optional[str],
     admin_contact: Optional[str]
-) -> None:
-    """Insert or update a lead record (Supabase or SQLite)."""
+) -> Optional[float]:
+    """
+    Insert or update a lead record (see upsert_leads). Returns its lead_score, or None on error.
+    With a writer (see use_writer) the record is queued for the writer process
+    instead; errors then surface from flush_writes().
+    """
+    record = lead_record(channel_id, username, title, category_tag, members_count, bio_text, admin_contact)
+    if _writer is not None:
+        _writer.submit(record)
+        return record["lead_score"]
+    if not upsert_leads([record]):
+        return None
+    return record["lead_score"]
+
+def upsert_leads(records: list[dict], raise_errors: bool = False) -> bool:
+    """
+    Insert or update many lead records (see lead_record) in one transaction
+    of the local SQLite file. With Supabase the same transaction queues them
+    in the outbox, which the background syncer pushes (see outbox.py), so
+    Supabase latency or outages never hold up or lose a write. Returns
+    whether they were stored; errors are printed, or raised with raise_errors.
+    """
     global _supabase
-    scraped_date = datetime.now().isoformat()
+    if not records:
+        return True
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(_UPSERT_SQL, [tuple(record[column] for column in LEAD_COLUMNS) for record in records])
+            for record in records:
+                dedupe.index_lead(cursor, record["channel_id"], record["title"], record["bio_text"])
+            if _supabase:
+                outbox.enqueue(cursor, [record["channel_id"] for record in records])
+            conn.commit()
+        finally:
+            conn.close()  # without a commit the whole batch is rolled back
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"SQLite upsert error: {e}")
+        return False
+    if _syncer is not None:
+        _syncer.wake()
+    return True
+
+def _pending_leads() -> list[dict]:
+    """Local rows of the leads still in the outbox, i.e. not yet pushed to Supabase."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT l.* FROM lead_outbox o JOIN leads l ON l.channel_id = o.channel_id")
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    except Exception as e:
+        print(f"SQLite outbox error: {e}")
+        return []
+
+def _supabase_rows(channel_ids: list[int], columns: str) -> dict[int, dict]:
+    """The Supabase rows of the given leads that exist there, by channel_id. Errors are raised."""
+    rows = {}
+    for start in range(0, len(channel_ids), 200):
+        response = (
+            _supabase.table("leads")
+            .select(columns)
+            .in_("channel_id", channel_ids[start:start + 200])
+            .execute()
+        )
+        rows.update((row["channel_id"], row) for row in response.data)
+    return rows
+
+def _merge_pending(leads: list[dict], pending: list[dict]) -> list[dict]:
+    """Supabase rows with the pending local rows replacing or added to them."""
+    by_id = {lead['channel_id']: lead for lead in leads}
+    by_id.update((lead['channel_id'], lead) for lead in pending)
+    return list(by_id.values())
+
+def get_all_leads(collapse_duplicates: bool = False, include_activity: bool = False) -> list[dict]:
+    """
+    Retrieve all leads from Supabase or SQLite. With Supabase, leads still
+    in the outbox are merged in, and the local copy is read if Supabase
+    can't be reached (every lead is written locally first).
+    With collapse_duplicates, near-duplicate channels (see dedupe.py) are reduced
+    to their best-scoring lead, which gets a duplicate_count column.
+    With include_activity, sampled channels get avg_views, posts_per_day and
+    last_post_date columns (see activity.py).
+    """
+    global _supabase
+    leads = None
     
     # 1. Supabase
     if _supabase:
-        data = {
-            "channel_id": channel_id,
-            "username": username,
-            "title": title,
-            "category_tag": category_tag,
-            "members_count": members_count,
-            "bio_text": bio_text,
-            "admin_contact": admin_contact,
-            "scraped_date": scraped_date
-        }
         try:
-            _supabase.table("leads").upsert(data, on_conflict="channel_id").execute()
+            response = _supabase.table("leads").select("*").order("scraped_date", desc=True).execute()
+            leads = _merge_pending(response.data, _pending_leads())
+            leads.sort(key=lambda lead: lead.get("scraped_date") or "", reverse=True)
         except Exception as e:
-            print(f"Supabase upsert error: {e}")
-        return
+            print(f"Supabase fetch error: {e}; reading the local copy")
 
     # 2. SQLite
+    if leads is None:
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM leads ORDER BY scraped_date DESC")
+            rows = cursor.fetchall()
+            conn.close()
+            leads = [dict(row) for row in rows]
+        except Exception as e:
+            print(f"SQLite fetch error: {e}")
+            return []
+    if collapse_duplicates:
+        leads = dedupe.collapse_duplicates(leads, _load_duplicate_clusters())
+    if include_activity:
+        leads = _merge_activity(leads)
+    return leads
+
+def _load_duplicate_clusters() -> dict[int, int]:
+    """Read the near-duplicate clusters from the local index."""
     try:
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO leads (
-                channel_id, username, title, category_tag, 
-                members_count, bio_text, admin_contact, scraped_date
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(channel_id) DO UPDATE SET
-                username = excluded.username,
-                title = excluded.title,
-                category_tag = excluded.category_tag,
-                members_count = excluded.members_count,
-                bio_text = excluded.bio_text,
-                admin_contact = excluded.admin_contact,
-                scraped_date = excluded.scraped_date
-        """, (
-            channel_id, username, title, category_tag,
-            members_count, bio_text, admin_contact, scraped_date
-        ))
+        dedupe.init_tables(cursor)
+        clusters = dedupe.load_clusters(cursor)
+        conn.close()
+        return clusters
+    except Exception as e:
+        print(f"SQLite duplicate index error: {e}")
+        return {}
+
+def _merge_activity(leads: list[dict]) -> list[dict]:
+    """Add the sampled activity figures to each lead (None where not sampled yet)."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        activity.init_tables(cursor)
+        figures = activity.load_activity(cursor)
+        conn.close()
+    except Exception as e:
+        print(f"SQLite activity error: {e}")
+        figures = {}
+    empty = {'avg_views': None, 'posts_per_day': None, 'last_post_date': None}
+    return [{**lead, **figures.get(lead['channel_id'], empty)} for lead in leads]
+
+def get_last_sampled_ids(channel_ids: list[int]) -> dict[int, int]:
+    """Return the last sampled message ID of each channel sampled before."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        activity.init_tables(cursor)
+        last_ids = activity.last_message_ids(cursor, channel_ids)
+        conn.close()
+        return last_ids
+    except Exception as e:
+        print(f"SQLite activity error: {e}")
+        return {}
+
+def save_activity(channel_id: int, posts: list[activity.Post], window: int = activity.ACTIVITY_WINDOW) -> Optional[dict]:
+    """
+    Store newly sampled posts of a channel and return its updated activity figures.
+    Activity is derived data and always lives in the local SQLite file.
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        activity.init_tables(cursor)
+        figures = activity.record_posts(cursor, channel_id, posts, window)
         conn.commit()
         conn.close()
+        return figures
     except Exception as e:
-        print(f"SQLite upsert error: {e}")
+        print(f"SQLite activity error: {e}")
+        return None
+
+def rebuild_duplicate_index(
+    chunk_size: int = 5000,
+    status_callback: Optional[Callable[[str], None]] = None
+) -> int:
+    """
+    Rebuild the near-duplicate index from every stored lead.
+    Only needed after bulk imports or when starting from an existing Supabase
+    table; upsert_lead keeps the index current incrementally.
+    """
+    global _supabase
+
+    def chunks():
+        total = 0
+        # 1. Supabase
+        if _supabase:
+            start = 0
+            while True:
+                response = (
+                    _supabase.table("leads")
+                    .select("channel_id,title,bio_text")
+                    .order("channel_id")
+                    .range(start, start + chunk_size - 1)
+                    .execute()
+                )
+                rows = response.data or []
+                if not rows:
+                    return
+                yield [(row["channel_id"], row.get("title"), row.get("bio_text")) for row in rows]
+                total += len(rows)
+                if status_callback:
+                    status_callback(f"Indexed {total} leads...")
+                if len(rows) < chunk_size:
+                    return
+                start += chunk_size
+        # 2. SQLite
+        else:
+            reader = sqlite3.connect(DB_PATH)
+            try:
+                last_id = -1
+                while True:
+                    rows = reader.execute(
+                        "SELECT channel_id, title, bio_text FROM leads WHERE channel_id > ? ORDER BY channel_id LIMIT ?",
+                        (last_id, chunk_size)
+                    ).fetchall()
+                    if not rows:
+                        return
+                    yield rows
+                    total += len(rows)
+                    last_id = rows[-1][0]
+                    if status_callback:
+                        status_callback(f"Indexed {total} leads...")
+            finally:
+                reader.close()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return dedupe.rebuild_index(conn, chunks())
+    finally:
+        conn.close()
 
-def get_all_leads() -> list[dict]:
-    """Retrieve all leads from Supabase or SQLite."""
+def get_top_leads(limit: int = 50, category_tag: Optional[str] = None) -> list[dict]:
+    """
+    Retrieve the highest-scoring leads, optionally within one category. With
+    Supabase, leads still in the outbox are included, and the local copy is
+    read if Supabase can't be reached.
+    """
     global _supabase
     
     # 1. Supabase
     if _supabase:
         try:
-            response = _supabase.table("leads").select("*").order("scraped_date", desc=True).execute()
-            return response.data
+            query = _supabase.table("leads").select("*")
+            if category_tag:
+                query = query.eq("category_tag", category_tag)
+            response = query.order("lead_score", desc=True).limit(limit).execute()
+            pending = [lead for lead in _pending_leads() if not category_tag or lead.get("category_tag") == category_tag]
+            pending_ids = {lead["channel_id"] for lead in pending}
+            # A pending lead's Supabase row may be stale (and rank too high): use the local one
+            leads = [lead for lead in response.data if lead["channel_id"] not in pending_ids] + pending
+            leads.sort(key=lambda lead: lead.get("lead_score") or 0, reverse=True)
+            return leads[:limit]
         except Exception as e:
-            print(f"Supabase fetch error: {e}")
-            return []
+            print(f"Supabase fetch error: {e}; reading the local copy")
 
     # 2. SQLite
     try:
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM leads ORDER BY scraped_date DESC")
+        if category_tag:
+            cursor.execute(
+                "SELECT * FROM leads WHERE category_tag = ? ORDER BY lead_score DESC LIMIT ?",
+                (category_tag, limit)
+            )
+        else:
+            cursor.execute("SELECT * FROM leads ORDER BY lead_score DESC LIMIT ?", (limit,))
         rows = cursor.fetchall()
         conn.close()
         return [dict(row) for row in rows]
@@ -159,17 +646,115 @@ def get_all_leads() -> list[dict]:
         print(f"SQLite fetch error: {e}")
         return []
 
+def get_known_usernames() -> set[str]:
+    """Return the lowercased usernames of all stored leads."""
+    global _supabase
+    
+    # 1. Supabase, plus the leads still in the outbox
+    if _supabase:
+        try:
+            response = _supabase.table("leads").select("username").execute()
+            return {
+                row["username"].lower() for row in response.data + _pending_leads() if row.get("username")
+            }
+        except Exception as e:
+            print(f"Supabase fetch error: {e}; reading the local copy")
+    
+    # 2. SQLite
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT lower(username) FROM leads WHERE username IS NOT NULL")
+        usernames = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return usernames
+    except Exception as e:
+        print(f"SQLite fetch error: {e}")
+        return set()
+
+def get_categories() -> list[str]:
+    """Return the distinct category tags present in the leads table."""
+    global _supabase
+    
+    # 1. Supabase, plus the leads still in the outbox
+    if _supabase:
+        try:
+            response = _supabase.table("leads").select("category_tag").execute()
+            return sorted({row["category_tag"] for row in response.data + _pending_leads() if row.get("category_tag")})
+        except Exception as e:
+            print(f"Supabase fetch error: {e}; reading the local copy")
+
+    # 2. SQLite
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        # Served from idx_leads_category_score without touching the table
+        cursor.execute("SELECT DISTINCT category_tag FROM leads WHERE category_tag != '' ORDER BY category_tag")
+        categories = [row[0] for row in cursor.fetchall() if row[0]]
+        conn.close()
+        return categories
+    except Exception as e:
+        print(f"SQLite fetch error: {e}")
+        return []
+
+def get_lead_stats(days: int = lead_stats.STATS_DAYS) -> Optional[dict]:
+    """
+    Read the dashboard aggregates (see lead_stats.py): total, with_admins,
+    members, per-category rows and the last `days` daily scrape counts. With
+    Supabase, leads still in the outbox are counted as the triggers will
+    count them once pushed. Returns None if they can't be read (e.g. the
+    Supabase tables are missing, or Supabase can't be reached).
+    """
+    global _supabase
+    
+    # 1. Supabase
+    if _supabase:
+        try:
+            categories = _supabase.table("lead_stats").select("*").execute()
+            daily = _supabase.table("lead_daily_stats").select("*").order("day", desc=True).limit(days).execute()
+            category_rows, daily_rows = categories.data, daily.data
+            pending = _pending_leads()
+            if pending:
+                stored = _supabase_rows(
+                    [lead["channel_id"] for lead in pending],
+                    "channel_id,category_tag,admin_contact,members_count,scraped_date"
+                )
+                category_rows, daily_rows = lead_stats.apply(
+                    category_rows, daily_rows, [(stored.get(lead["channel_id"]), lead) for lead in pending]
+                )
+                daily_rows = sorted(daily_rows, key=lambda row: row["day"], reverse=True)[:days]
+            return lead_stats.summarize(category_rows, daily_rows)
+        except Exception as e:
+            print(f"Supabase stats error: {e}")
+            return None
+    
+    # 2. SQLite
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        stats = lead_stats.load(conn.cursor(), days)
+        conn.close()
+        return stats
+    except Exception as e:
+        print(f"SQLite stats error: {e}")
+        return None
+
 def get_leads_count() -> int:
     """Get total count of leads."""
     global _supabase
     
-    # 1. Supabase
+    # Read from the aggregates instead of counting rows
+    stats = get_lead_stats(days=0)
+    if stats is not None:
+        return stats['total']
+    
+    # 1. Supabase (no aggregate tables); the local copy if it can't be reached
     if _supabase:
         try:
             response = _supabase.table("leads").select("*", count="exact", head=True).execute()
-            return response.count
+            pending = [lead["channel_id"] for lead in _pending_leads()]
+            return response.count + len(pending) - len(_supabase_rows(pending, "channel_id"))
         except Exception:
-            return 0
+            pass
 
     # 2. SQLite
     try:
@@ -183,33 +768,230 @@ def get_leads_count() -> int:
         return 0
 
 
+# Columns read by reclassify_leads, in _classify_rows order
+_RECLASSIFY_COLUMNS = "channel_id, title, bio_text, members_count, admin_contact, scraped_date"
+
+# Processes used by reclassify_leads by default: one per CPU, at most 4
+RECLASSIFY_WORKERS = min(os.cpu_count() or 1, 4)
+# Processes used by migrate_scores, which runs alongside scrapes and the dashboard
+MIGRATION_WORKERS = min(RECLASSIFY_WORKERS, 2)
+
+def _classify_rows(rows: list[tuple]) -> list[tuple]:
+    """
+    Classify rows of _RECLASSIFY_COLUMNS into UPDATE parameter tuples:
+    (is_safe, business_score, personal_score, lead_score, channel_id).
+    """
+    # One classifier per chunk: looking it up per row costs as much as the matching
+    classifier = vocab.get_classifier()
+    updates = []
+    for channel_id, title, bio_text, members_count, admin_contact, scraped_date in rows:
+        scores = classifier.scores(f"{title or ''} {bio_text or ''}")
+        is_safe, business_score, personal_score = (0 if scores['blocked'] else 1), scores['business'], scores['personal']
+        lead_score = compute_lead_score(business_score, personal_score, members_count, admin_contact, scraped_date)
+        updates.append((is_safe, business_score, personal_score, lead_score, channel_id))
+    return updates
+
+def reclassify_leads(
+    chunk_size: int = 5000,
+    workers: Optional[int] = None,
+    status_callback: Optional[Callable[[str], None]] = None
+) -> int:
+    """
+    Re-score every stored lead against the current filter lists.
+    Streams the local leads table in chunks and writes is_safe,
+    business_score, personal_score and lead_score back in bulk; with
+    Supabase, the leads whose scores changed are queued in the outbox in the
+    same transaction (see upsert_leads). With workers > 1 (default:
+    RECLASSIFY_WORKERS) chunks are classified in a process pool while the next
+    chunk is being read; the pool starts only once there's more than one
+    chunk. Its processes are spawned, not forked, as the caller may be a
+    threaded server (the app). Returns the number of rows re-scored.
+    """
+    total = 0
+    if workers is None:
+        workers = RECLASSIFY_WORKERS
+
+    conn = sqlite3.connect(DB_PATH)
+    pool = None
+    pending: list = []
+
+    def flush(updates: list[tuple], current: dict[int, tuple]) -> None:
+        nonlocal total
+        changed = [update for update in updates if update[:4] != current[update[4]]]
+        conn.executemany(
+            "UPDATE leads SET is_safe = ?, business_score = ?, personal_score = ?, lead_score = ? WHERE channel_id = ?",
+            changed
+        )
+        if _supabase:
+            outbox.enqueue(conn.cursor(), [update[4] for update in changed])
+        conn.commit()
+        total += len(updates)
+        if status_callback:
+            status_callback(f"Re-classified {total} leads...")
+
+    try:
+        cursor = conn.cursor()
+        _migrate_leads_columns(cursor)
+        outbox.init_tables(cursor)
+        conn.commit()
+        last_id = None
+        columns = f"{_RECLASSIFY_COLUMNS}, is_safe, business_score, personal_score, lead_score"
+        while True:
+            # Keyset pagination keeps each chunk an index range scan
+            if last_id is None:
+                cursor.execute(f"SELECT {columns} FROM leads ORDER BY channel_id LIMIT ?", (chunk_size,))
+            else:
+                cursor.execute(
+                    f"SELECT {columns} FROM leads WHERE channel_id > ? ORDER BY channel_id LIMIT ?",
+                    (last_id, chunk_size)
+                )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            # Stored scores, so that only changed rows are written (and pushed)
+            current = {row[0]: row[6:] for row in rows}
+            rows = [row[:6] for row in rows]
+            if pool is None and workers > 1 and len(rows) == chunk_size:
+                # Forking copies other threads' locks in whatever state they are in
+                import multiprocessing
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            if pool is None:
+                flush(_classify_rows(rows), current)
+                continue
+            pending.append((pool.submit(_classify_rows, rows), current))
+            # Keep a couple of chunks per worker in flight, write the oldest
+            if len(pending) >= workers * 2:
+                future, current = pending.pop(0)
+                flush(future.result(), current)
+        for future, current in pending:
+            flush(future.result(), current)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        conn.close()
+    if _syncer is not None:
+        _syncer.wake()
+    return total
+
+def scores_outdated() -> bool:
+    """Whether the stored leads were scored with an older lead_score formula."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        return version < SCORE_VERSION
+    except Exception as e:
+        print(f"SQLite version error: {e}")
+        return False
+
+def migrate_scores(
+    workers: int = MIGRATION_WORKERS,
+    status_callback: Optional[Callable[[str], None]] = None
+) -> int:
+    """
+    Re-score the stored leads after a SCORE_VERSION bump (see
+    reclassify_leads) and record the new version once every lead is done, so
+    an interrupted migration starts over on the next call. Returns the number
+    of rows re-scored, 0 when the scores are already current.
+    """
+    if not scores_outdated():
+        return 0
+    total = reclassify_leads(workers=workers, status_callback=status_callback)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(f"PRAGMA user_version = {SCORE_VERSION}")
+    conn.commit()
+    conn.close()
+    return total
+
+def reextract_contacts(
+    chunk_size: int = 5000,
+    status_callback: Optional[Callable[[str], None]] = None
+) -> int:
+    """
+    Re-run contact extraction over the stored bio_text of every lead.
+    Writes admin_contact (and the lead_score that depends on it) back in bulk
+    to the local leads table; with Supabase, the leads that changed are
+    queued in the outbox in the same transaction. Returns the number of rows processed.
+    """
+    total = 0
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cursor = conn.cursor()
+        _migrate_leads_columns(cursor)
+        outbox.init_tables(cursor)
+        last_id = -1
+        while True:
+            cursor.execute("""
+                SELECT channel_id, bio_text, business_score, personal_score, members_count, scraped_date,
+                    admin_contact, lead_score
+                FROM leads WHERE channel_id > ? ORDER BY channel_id LIMIT ?
+            """, (last_id, chunk_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            updates = []
+            for channel_id, bio_text, business_score, personal_score, members_count, scraped_date, old_contact, old_score in rows:
+                admin_contact = extract_admin_contacts(bio_text)
+                lead_score = compute_lead_score(business_score, personal_score, members_count, admin_contact, scraped_date)
+                if (admin_contact, lead_score) != (old_contact, old_score):
+                    updates.append((admin_contact, lead_score, channel_id))
+            cursor.executemany("UPDATE leads SET admin_contact = ?, lead_score = ? WHERE channel_id = ?", updates)
+            if _supabase:
+                outbox.enqueue(cursor, [channel_id for _, _, channel_id in updates])
+            conn.commit()
+            total += len(rows)
+            last_id = rows[-1][0]
+            if status_callback:
+                status_callback(f"Re-extracted contacts for {total} leads...")
+    finally:
+        conn.close()
+    if _syncer is not None:
+        _syncer.wake()
+    return total
 
 
 # Anti-ban configuration
 MIN_DELAY = 2.0
 MAX_DELAY = 5.0
 
+# Full-channel requests sent together in one grouped invocation
+FULL_INFO_BATCH_SIZE = 10
+
+# Channels whose recent posts are fetched at the same time when sampling activity
+ACTIVITY_CONCURRENCY = 4
+
 def get_random_delay() -> float:
     """Generate a random delay between MIN_DELAY and MAX_DELAY seconds."""
     return random.uniform(MIN_DELAY, MAX_DELAY)
 
 def extract_admin_contacts(bio_text: Optional[str]) -> Optional[str]:
     """
-    Extract potential admin usernames from bio text.
-    Looks for patterns like @username.
+    Extract admin contacts from bio text.
+    Finds @handles, t.me links, phone numbers and emails (see contacts.py)
+    and returns them deduplicated and comma-separated.
     """
-    if not bio_text:
-        return None
-    
-    # Regex to match Telegram usernames (@ followed by alphanumeric and underscores)
-    pattern = r'@([a-zA-Z][a-zA-Z0-9_]{4,31})'
-    matches = re.findall(pattern, bio_text)
-    
-    if matches:
-        # Return comma-separated list of found usernames
-        return ", ".join([f"@{m}" for m in matches])
-    
-    return None
+    return format_contacts(extract_contacts(bio_text))
+
+class RequestBudget:
+    """A run's Telegram request allowance, counted per account."""
+
+    def __init__(self, max_requests: Optional[int]):
+        self.max_requests = max_requests
+        self.counts: Counter = Counter()  # requests per TelegramScraper
+
+# The budget of the run (job) the current task belongs to; see use_request_budget
+_request_budget: ContextVar[Optional[RequestBudget]] = ContextVar("request_budget", default=None)
+
+def use_request_budget(max_requests: Optional[int]) -> RequestBudget:
+    """
+    Give the calling coroutine, and the tasks it starts, its own request budget
+    per account. Runs sharing scrapers on one event loop (app jobs) then each
+    count their own requests instead of resetting each other's with set_max_requests.
+    """
+    budget = RequestBudget(max_requests)
+    _request_budget.set(budget)
+    return budget
 
 class TelegramScraper:
     """
@@ -221,33 +1003,66 @@ class TelegramScraper:
         api_id: int,
         api_hash: str,
         phone: str,
-        session_name: str = "telegram_scraper"
+        session_name: str = "telegram_scraper",
+        entity_cache: Optional[EntityCache] = None,
+        min_delay: float = MIN_DELAY,
+        max_delay: float = MAX_DELAY,
+        client_factory: Optional[Callable[..., "TelegramClient"]] = None
     ):
+        """
+        min_delay/max_delay bound the random pause before each API call.
+        client_factory builds the client in connect() (default: Telethon's
+        TelegramClient); benchmarks pass fake_telethon.FakeTelegramClient here.
+        """
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone = phone
+        self.session_name = session_name
         self.session_path = Path(__file__).parent / f"{session_name}.session"
-        self.client: Optional[TelegramClient] = None
+        self.client: Optional["TelegramClient"] = None
+        self.cache = entity_cache if entity_cache is not None else EntityCache()
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.client_factory = client_factory
         self._request_count = 0
         self._max_requests: Optional[int] = None
     
+    def _random_delay(self) -> float:
+        """Random pause before an API call, between min_delay and max_delay seconds."""
+        return random.uniform(self.min_delay, self.max_delay)
+    
     def set_max_requests(self, max_requests: Optional[int]) -> None:
-        """Set maximum number of requests for this run."""
+        """Set maximum number of requests for this run (unless the run has its own, see use_request_budget)."""
         self._max_requests = max_requests
         self._request_count = 0
     
+    def _count_requests(self, count: int = 1) -> None:
+        self._request_count += count
+        budget = _request_budget.get()
+        if budget is not None:
+            budget.counts[self] += count
+    
+    def _requests_left(self) -> Optional[int]:
+        """Requests this account may still make in the current run, or None without a limit."""
+        budget = _request_budget.get()
+        if budget is not None:
+            return None if budget.max_requests is None else budget.max_requests - budget.counts[self]
+        return None if self._max_requests is None else self._max_requests - self._request_count
+    
     def _check_request_limit(self) -> bool:
         """Check if we've reached the request limit."""
-        if self._max_requests is None:
-            return True
-        return self._request_count < self._max_requests
+        left = self._requests_left()
+        return left is None or left > 0
     
     async def connect(self) -> bool:
         """
         Connect to Telegram and handle authentication.
         Returns True if connected and authorized.
         """
-        self.client = TelegramClient(
+        if self.client_factory is None:
+            from telethon import TelegramClient
+            self.client_factory = TelegramClient
+        self.client = self.client_factory(
             str(self.session_path),
             self.api_id,
             self.api_hash
@@ -273,6 +1088,7 @@ class TelegramScraper:
         Sign in with verification code.
         Returns True if successful.
         """
+        from telethon.errors import SessionPasswordNeededError
         try:
             await self.client.sign_in(
                 phone=self.phone,
@@ -294,16 +1110,313 @@ class TelegramScraper:
         if self.client:
             await self.client.disconnect()
     
+    async def _fetch_full_info(self, entities: list) -> dict[int, dict]:
+        """
+        Fetch about/participants for several chats in one grouped invocation.
+        Returns {chat_id: {'about': ..., 'participants': ...}}; chats whose
+        request failed are left out. A FloodWait on any request is re-raised.
+        """
+        from telethon.errors import FloodWaitError, MultiError
+        from telethon.tl.functions.channels import GetFullChannelRequest
+        from telethon.tl.functions.messages import GetFullChatRequest
+        from telethon.tl.types import Channel
+        requests = [
+            GetFullChannelRequest(entity) if isinstance(entity, Channel) else GetFullChatRequest(entity.id)
+            for entity in entities
+        ]
+        if not requests:
+            return {}
+        
+        # Each inner request still counts as one API call against the budget
+        self._count_requests(len(requests))
+        try:
+            results = await self.client(requests)
+        except MultiError as e:
+            for error in e.exceptions:
+                if isinstance(error, FloodWaitError):
+                    raise error
+            results = e.results
+        
+        full_info = {}
+        for entity, result in zip(entities, results):
+            if result is None:
+                continue
+            full_chat = result.full_chat
+            participants = getattr(full_chat, 'participants_count', None)
+            if participants is None and hasattr(getattr(full_chat, 'participants', None), 'participants'):
+                participants = len(full_chat.participants.participants)
+            full_info[entity.id] = {
+                'about': getattr(full_chat, 'about', None) or None,
+                'participants': participants,
+            }
+        return full_info
+    
+    def _cache_full_info(self, entities: list, full_info: dict[int, dict]) -> None:
+        """Store fetched full info in the entity cache."""
+        from telethon.tl.types import Channel
+        self.cache.put_many(
+            {
+                'channel_id': entity.id,
+                'access_hash': getattr(entity, 'access_hash', None),
+                'session': self.session_name,
+                'kind': 'channel' if isinstance(entity, Channel) else 'chat',
+                'username': getattr(entity, 'username', None),
+                'title': getattr(entity, 'title', None),
+                'about': full_info[entity.id]['about'],
+                'participants': full_info[entity.id]['participants'],
+            }
+            for entity in entities if entity.id in full_info
+        )
+    
+    async def resolve_username(self, username: str) -> tuple[object, dict]:
+        """
+        Resolve a username to (input peer or entity, full info).
+        A fresh cache entry saved by this session costs no requests; otherwise
+        the username is resolved and, for chats, the full info fetched and
+        cached. Usernames of users and bots are cached as such and return
+        (None, {}) from then on.
+        """
+        from telethon.tl.types import Channel, Chat, InputPeerChannel, InputPeerChat
+        cached = self.cache.get_by_username(username)
+        if cached and cached['kind'] == 'user':
+            return None, {}
+        if cached and (cached['kind'] == 'chat' or cached['session'] == self.session_name):
+            if cached['kind'] == 'chat':
+                peer = InputPeerChat(cached['channel_id'])
+            else:
+                peer = InputPeerChannel(cached['channel_id'], cached['access_hash'])
+            return peer, {'about': cached['about'], 'participants': cached['participants']}
+        
+        self._count_requests()
+        entity = await self.client.get_entity(username)
+        if not isinstance(entity, (Channel, Chat)):
+            self.cache.put_many([{
+                'channel_id': entity.id,
+                'session': self.session_name,
+                'kind': 'user',
+                'username': getattr(entity, 'username', None) or username.lstrip('@'),
+            }])
+            return entity, {}
+        full_info = await self._fetch_full_info([entity])
+        self._cache_full_info([entity], full_info)
+        return entity, full_info.get(entity.id, {})
+    
+    async def _input_peer(self, channel_id: int, username: Optional[str]):
+        """
+        Return something get_messages() accepts for a stored lead: a cached input
+        peer when this session has the access hash, otherwise the resolved
+        username. Returns None when neither is available.
+        """
+        from telethon.tl.types import InputPeerChannel, InputPeerChat
+        cached = self.cache.get_many([channel_id]).get(channel_id)
+        if cached and cached['kind'] == 'user':
+            return None
+        if cached and cached['kind'] == 'chat':
+            return InputPeerChat(channel_id)
+        if cached and cached['session'] == self.session_name and cached['access_hash'] is not None:
+            return InputPeerChannel(channel_id, cached['access_hash'])
+        if username:
+            peer, _ = await self.resolve_username(username)
+            return peer
+        return None
+    
+    async def sample_activity(
+        self,
+        leads: list[dict],
+        window: int = activity.ACTIVITY_WINDOW,
+        concurrency: int = ACTIVITY_CONCURRENCY,
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None
+    ) -> dict[int, dict]:
+        """
+        Fetch the recent posts of each lead (dicts with channel_id and username)
+        and store average views, posts per day and last post time in lead_activity.
+        Only messages newer than the last sampled ID are fetched, and at most
+        `concurrency` channels are fetched at once. Returns {channel_id: figures}.
+        """
+        from telethon.errors import FloodWaitError
+        if not self.client:
+            raise RuntimeError("Client not connected. Call connect() first.")
+        
+        last_ids = get_last_sampled_ids([lead['channel_id'] for lead in leads])
+        semaphore = asyncio.Semaphore(concurrency)
+        results: dict[int, dict] = {}
+        
+        async def sample(lead: dict) -> None:
+            channel_id = lead['channel_id']
+            for _ in range(MAX_PARKS):
+                async with semaphore:
+                    if not self._check_request_limit():
+                        return
+                    await asyncio.sleep(self._random_delay())
+                    try:
+                        peer = await self._input_peer(channel_id, lead.get('username'))
+                        if peer is None:
+                            return
+                        self._count_requests()
+                        messages = await self.client.get_messages(
+                            peer,
+                            limit=window,
+                            min_id=last_ids.get(channel_id) or 0
+                        )
+                    except FloodWaitError as e:
+                        wait = e.seconds
+                    except Exception as e:
+                        if status_callback:
+                            status_callback(f"⚠️ Could not sample {lead.get('username') or channel_id}: {str(e)[:50]}")
+                        return
+                    else:
+                        posts = [
+                            activity.Post(message.id, message.date.isoformat(), getattr(message, 'views', None))
+                            for message in messages
+                            if message.date is not None and getattr(message, 'action', None) is None
+                        ]
+                        figures = save_activity(channel_id, posts, window)
+                        if figures is not None:
+                            results[channel_id] = figures
+                        return
+                # Wait out the FloodWait without holding a slot, so other channels keep going
+                if flood_callback:
+                    flood_callback(wait)
+                if status_callback:
+                    status_callback(f"🚫 FloodWait while sampling {lead.get('username') or channel_id}: retrying in {wait}s")
+                await asyncio.sleep(wait)
+        
+        await asyncio.gather(*(sample(lead) for lead in leads))
+        if status_callback:
+            status_callback(f"📈 Sampled activity of {len(results)} of {len(leads)} channels")
+        return results
+    
+    def _save_lead(self, entity, info: dict, category_tag: str) -> dict:
+        """Build a lead from a search result entity plus its full info, and store it."""
+        return self._store_lead(
+            channel_id=entity.id,
+            username=getattr(entity, 'username', None),
+            title=getattr(entity, 'title', 'Unknown'),
+            members_count=info.get('participants') or getattr(entity, 'participants_count', 0) or 0,
+            bio_text=info.get('about'),
+            category_tag=category_tag
+        )
+    
+    def _store_lead(
+        self,
+        channel_id: int,
+        username: Optional[str],
+        title: str,
+        members_count: int,
+        bio_text: Optional[str],
+        category_tag: str
+    ) -> dict:
+        """Extract contacts, store the lead and return it as a dict."""
+        # Extract admin contacts from bio
+        admin_contact = extract_admin_contacts(bio_text)
+        
+        # Save to database
+        lead_score = upsert_lead(
+            channel_id=channel_id,
+            username=username,
+            title=title,
+            category_tag=category_tag,
+            members_count=members_count,
+            bio_text=bio_text,
+            admin_contact=admin_contact
+        )
+        
+        return {
+            'channel_id': channel_id,
+            'username': username,
+            'title': title,
+            'category_tag': category_tag,
+            'members_count': members_count,
+            'bio_text': bio_text,
+            'admin_contact': admin_contact,
+            'lead_score': lead_score
+        }
+    
+    async def _crawl_lead(self, username: str, category_tag: str) -> Optional[dict]:
+        """Look up one mentioned username for the snowball crawl and store it if it's a chat."""
+        from telethon.errors import FloodWaitError
+        from telethon.tl.types import Channel, Chat
+        if not self._check_request_limit():
+            return None
+        cached = self.cache.get_by_username(username)
+        if cached and cached['kind'] != 'user':
+            # Everything a lead needs is in the cache, whichever session saved it
+            return self._store_lead(
+                channel_id=cached['channel_id'],
+                username=cached['username'],
+                title=cached['title'] or 'Unknown',
+                members_count=cached['participants'] or 0,
+                bio_text=cached['about'],
+                category_tag=category_tag
+            )
+        if cached:
+            return None
+        
+        await asyncio.sleep(self._random_delay())
+        try:
+            entity, info = await self.resolve_username(username)
+        except FloodWaitError:
+            raise
+        except Exception:
+            # Deleted or mistyped usernames are common in bios
+            return None
+        if not isinstance(entity, (Channel, Chat)):
+            return None
+        return self._save_lead(entity, info, category_tag)
+    
+    async def scrape_channel(self, username: str, category_tag: str = "") -> Optional[dict]:
+        """
+        Look up one channel or group by username and store it as a lead.
+        Returns None for users, bots and unknown usernames; a FloodWait is raised.
+        """
+        if not self.client:
+            raise RuntimeError("Client not connected. Call connect() first.")
+        return await self._crawl_lead(username.lstrip('@'), category_tag)
+    
+    async def crawl_mentions(
+        self,
+        seeds: list[dict],
+        category_tag: str = "",
+        max_depth: int = crawl.MAX_DEPTH,
+        budget: int = crawl.CRAWL_BUDGET,
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Snowball discovery: follow the @handles and t.me links in the seeds'
+        bios to new channels (see crawl.py). Channels already in the leads
+        table are skipped. Yields the new leads.
+        """
+        if not self.client:
+            raise RuntimeError("Client not connected. Call connect() first.")
+        
+        async for lead in crawl.snowball(
+            lambda username: self._crawl_lead(username, category_tag),
+            seeds,
+            known_usernames=get_known_usernames(),
+            category_tag=category_tag,
+            max_depth=max_depth,
+            budget=budget,
+            status_callback=status_callback,
+            flood_callback=flood_callback
+        ):
+            yield lead
+    
     async def search_channels(
         self,
         keyword: str,
         limit: int = 50,
         category_tag: str = "",
         status_callback: Optional[Callable[[str], None]] = None,
-        flood_callback: Optional[Callable[[int], None]] = None
+        flood_callback: Optional[Callable[[int], None]] = None,
+        progress_callback: Optional[Callable[[str, dict], None]] = None
     ) -> AsyncGenerator[dict, None]:
         """
         Search for public channels/groups with anti-ban protection.
+        Details for the returned chats come from the entity cache when fresh,
+        otherwise they are fetched in batches of FULL_INFO_BATCH_SIZE
+        full-channel requests per round trip. Cache hits cost no requests.
         
         Args:
             keyword: Search keyword
@@ -311,129 +1424,188 @@ class TelegramScraper:
             category_tag: Category to tag the leads with
             status_callback: Callback for status updates
             flood_callback: Callback when FloodWait is encountered
+            progress_callback: Callback with (keyword, stats) as the keyword progresses
         
         Yields:
             Dict with channel information
         """
+        async for lead in self.search_keywords(
+            [keyword],
+            limit=limit,
+            category_tag=category_tag,
+            status_callback=status_callback,
+            flood_callback=flood_callback,
+            progress_callback=progress_callback
+        ):
+            yield lead
+    
+    async def search_keywords(
+        self,
+        keywords: list[str],
+        limit: int = 50,
+        category_tag: str = "",
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None,
+        progress_callback: Optional[Callable[[str, dict], None]] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Search several keywords as one stream of jobs (see scheduler.py).
+        A search or detail batch that hits a FloodWait is parked until the
+        server-given wake time and retried, while the other keywords, batches
+        and cache hits carry on. flood_callback gets the seconds of each park;
+        progress_callback gets (keyword, stats) as each keyword progresses.
+        """
+        from telethon.errors import FloodWaitError
+        from telethon.tl.functions.contacts import SearchRequest
+        from telethon.tl.types import Channel, Chat
         if not self.client:
             raise RuntimeError("Client not connected. Call connect() first.")
         
-        try:
-            # Apply random delay before search
-            delay = get_random_delay()
+        scheduler = FloodScheduler(status_callback=status_callback, flood_callback=flood_callback)
+        progress = KeywordProgress(keywords, progress_callback)
+        # Detail batches still to run per keyword; a keyword is done when none are left
+        open_batches = {keyword: 0 for keyword in keywords}
+        
+        def batch_done(keyword: str, leads: list[dict], fetched: int = 0, failed: int = 0) -> list[dict]:
+            open_batches[keyword] -= 1
+            progress.update(
+                keyword,
+                state='done' if open_batches[keyword] == 0 else None,
+                fetched=fetched,
+                failed=failed,
+                leads=len(leads)
+            )
+            return leads
+        
+        def budget_left() -> bool:
+            if self._check_request_limit():
+                return True
             if status_callback:
-                status_callback(f"⏳ Waiting {delay:.1f}s before searching '{keyword}'...")
-            await asyncio.sleep(delay)
-            
-            # Perform search with FloodWait handling
-            try:
-                self._request_count += 1
-                result = await self.client(SearchRequest(
-                    q=keyword,
-                    limit=limit
-                ))
-            except FloodWaitError as e:
-                if flood_callback:
-                    flood_callback(e.seconds)
-                if status_callback:
-                    status_callback(f"🚫 FloodWait! Sleeping for {e.seconds} seconds...")
-                await asyncio.sleep(e.seconds)
-                # Retry after waiting
-                result = await self.client(SearchRequest(
-                    q=keyword,
-                    limit=limit
-                ))
-            
-            # Process results
-            entities = result.chats if hasattr(result, 'chats') else []
+                status_callback("⚠️ Max requests limit reached. Stopping.")
+            return False
+        
+        def details_job(keyword: str, batch: list):
+            """Return the job fetching a batch's details, and its on_drop callback."""
+            # Chats left out to stay within the request budget count as failed
+            skipped = 0
             
-            for entity in entities:
-                if not self._check_request_limit():
+            async def run() -> list[dict]:
+                nonlocal batch, skipped
+                if not budget_left():
+                    return batch_done(keyword, [], failed=skipped + len(batch))
+                left = self._requests_left()
+                if left is not None and left < len(batch):
                     if status_callback:
-                        status_callback("⚠️ Max requests limit reached. Stopping.")
-                    return
+                        status_callback(f"⚠️ Request budget left for {left} of {len(batch)} chats of '{keyword}'")
+                    skipped += len(batch) - left
+                    batch = batch[:left]
                 
-                # Only process channels and supergroups
-                if not isinstance(entity, (Channel, Chat)):
-                    continue
+                delay = self._random_delay()
+                if status_callback:
+                    status_callback(f"⏳ Waiting {delay:.1f}s before fetching details of {len(batch)} chats...")
+                await asyncio.sleep(delay)
                 
-                # Get full info with FloodWait handling
+                # Get full info (about, participants) for the whole batch
                 try:
-                    delay = get_random_delay()
-                    if status_callback:
-                        status_callback(f"⏳ Waiting {delay:.1f}s before fetching details...")
-                    await asyncio.sleep(delay)
-                    
-                    self._request_count += 1
-                    full_entity = await self.client.get_entity(entity.id)
-                    
-                    # Try to get full channel info for bio
-                    bio_text = None
-                    try:
-                        if hasattr(entity, 'username') and entity.username:
-                            full_info = await self.client.get_entity(f"@{entity.username}")
-                            if hasattr(full_info, 'about'):
-                                bio_text = full_info.about
-                    except:
-                        pass
-                    
-                except FloodWaitError as e:
-                    if flood_callback:
-                        flood_callback(e.seconds)
-                    if status_callback:
-                        status_callback(f"🚫 FloodWait! Sleeping for {e.seconds} seconds...")
-                    await asyncio.sleep(e.seconds)
-                    continue
+                    full_info = await self._fetch_full_info(batch)
+                    self._cache_full_info(batch, full_info)
+                except FloodWaitError:
+                    raise
                 except Exception as e:
                     if status_callback:
-                        status_callback(f"⚠️ Error fetching entity: {str(e)[:50]}")
-                    continue
+                        status_callback(f"⚠️ Error fetching details: {str(e)[:50]}")
+                    full_info = {}
+                
+                return batch_done(
+                    keyword,
+                    [self._save_lead(entity, full_info.get(entity.id, {}), category_tag) for entity in batch],
+                    fetched=len(full_info),
+                    failed=skipped + len(batch) - len(full_info)
+                )
+            
+            def dropped() -> None:
+                # Given up after repeated FloodWaits: none of the batch was fetched
+                batch_done(keyword, [], failed=skipped + len(batch))
+            return run, dropped
+        
+        def search_job(keyword: str, priority: int):
+            """Return the job searching a keyword, and its on_drop callback."""
+            async def run() -> list[dict]:
+                if not budget_left():
+                    progress.update(keyword, state='done')
+                    return []
+                progress.update(keyword, state='searching')
                 
-                # Extract info
-                channel_id = entity.id
-                username = getattr(entity, 'username', None)
-                title = getattr(entity, 'title', 'Unknown')
-                members_count = getattr(entity, 'participants_count', 0) or 0
+                # Apply random delay before search
+                delay = self._random_delay()
+                if status_callback:
+                    status_callback(f"⏳ Waiting {delay:.1f}s before searching '{keyword}'...")
+                await asyncio.sleep(delay)
                 
-                # Extract admin contacts from bio
-                admin_contact = extract_admin_contacts(bio_text)
+                try:
+                    self._count_requests()
+                    result = await self.client(SearchRequest(
+                        q=keyword,
+                        limit=limit
+                    ))
+                except FloodWaitError:
+                    raise
+                except Exception as e:
+                    if status_callback:
+                        status_callback(f"❌ Error searching '{keyword}': {str(e)}")
+                    progress.update(keyword, state='done')
+                    return []
                 
-                # Save to database
-                upsert_lead(
-                    channel_id=channel_id,
-                    username=username,
-                    title=title,
-                    category_tag=category_tag,
-                    members_count=members_count,
-                    bio_text=bio_text,
-                    admin_contact=admin_contact
-                )
+                # SearchRequest already returned each chat with its access hash,
+                # so no get_entity() round trip is needed before the full fetch
+                entities = [
+                    entity for entity in (result.chats if hasattr(result, 'chats') else [])
+                    if isinstance(entity, (Channel, Chat))
+                ]
                 
-                yield {
-                    'channel_id': channel_id,
-                    'username': username,
-                    'title': title,
-                    'category_tag': category_tag,
-                    'members_count': members_count,
-                    'bio_text': bio_text,
-                    'admin_contact': admin_contact
-                }
+                # Chats seen recently are served from the cache without any API call
+                cached = self.cache.get_many(entity.id for entity in entities)
+                if cached and status_callback:
+                    status_callback(f"💾 {len(cached)} of {len(entities)} chats served from cache")
+                uncached = [entity for entity in entities if entity.id not in cached]
+                for start in range(0, len(uncached), FULL_INFO_BATCH_SIZE):
+                    batch = uncached[start:start + FULL_INFO_BATCH_SIZE]
+                    open_batches[keyword] += 1
+                    run_details, dropped = details_job(keyword, batch)
+                    scheduler.submit(
+                        run_details,
+                        name=f"details of {len(batch)} chats for '{keyword}'",
+                        priority=priority,
+                        on_drop=dropped
+                    )
                 
-        except FloodWaitError as e:
-            if flood_callback:
-                flood_callback(e.seconds)
-            if status_callback:
-                status_callback(f"🚫 FloodWait! Sleeping for {e.seconds} seconds...")
-            await asyncio.sleep(e.seconds)
-        except Exception as e:
-            if status_callback:
-                status_callback(f"❌ Error: {str(e)}")
-            raise
-
-
-import httpx
-from bs4 import BeautifulSoup
-from duckduckgo_search import DDGS
+                leads = [self._save_lead(entity, cached[entity.id], category_tag) for entity in entities if entity.id in cached]
+                progress.update(
+                    keyword,
+                    state='done' if open_batches[keyword] == 0 else 'fetching',
+                    candidates=len(entities),
+                    leads=len(leads)
+                )
+                return leads
+            
+            def dropped() -> None:
+                # Given up after repeated FloodWaits: the keyword's search failed
+                progress.update(keyword, state='done', failed=1)
+            return run, dropped
+        
+        # Keywords run in order; a parked keyword's work lets the next one start
+        for priority, keyword in enumerate(keywords):
+            run_search, dropped = search_job(keyword, priority)
+            scheduler.submit(run_search, name=f"search '{keyword}'", priority=priority, on_drop=dropped)
+        
+        async for leads in scheduler.results():
+            for lead in leads:
+                yield lead
+        
+        if scheduler.parked_count and status_callback:
+            status_callback(
+                f"🚫 {scheduler.parked_count} FloodWaits, {scheduler.parked_seconds}s parked in total"
+            )
 
 # Anti-ban: Random delay between requests (in seconds)
 def get_random_delay(min_delay: float = 2.0, max_delay: float = 5.0) -> float:
@@ -443,6 +1615,12 @@ def get_random_delay(min_delay: float = 2.0, max_delay: float = 5.0) -> float:
     """
     return random.uniform(min_delay, max_delay)
 
+
+def _parse_html(html: str):
+    """Parse a Tgstat page with BeautifulSoup (imported on first use)."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser')
+
 # ... [Keep existing functions and TelegramScraper] ...
 
 class TgstatScraper:
@@ -450,7 +1628,12 @@ class TgstatScraper:
     Scraper for tgstat.com using DuckDuckGo for discovery and httpx for content.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        min_delay: float = 2.0,
+        max_delay: float = 5.0,
+        discovery_cache: Optional[DiscoveryCache] = None
+    ):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -460,165 +1643,53 @@ class TgstatScraper:
             'Content-Type': 'application/x-www-form-urlencoded',
             'X-Requested-With': 'XMLHttpRequest', # Crucial for search to work
         }
+        self._client: Optional["httpx.AsyncClient"] = None
+        # One request budget for every page this scraper fetches, however many
+        # keywords run at once
+        self.limiter = RateLimiter(min_delay, max_delay)
+        self.discovery = discovery_cache if discovery_cache is not None else DiscoveryCache()
     
-    # Category slugs mapping for keyword matching
-    CATEGORY_SLUGS = {
-        'crypto': 'crypto', 'cryptocurrency': 'crypto', 'bitcoin': 'crypto', 'btc': 'crypto',
-        'tech': 'tech', 'technology': 'tech', 'programming': 'tech', 'software': 'tech',
-        'news': 'news', 'media': 'news',
-        'business': 'business', 'startup': 'business', 'marketing': 'business',
-        'education': 'education', 'learning': 'education',
-        'entertainment': 'entertainment', 'fun': 'entertainment',
-        'music': 'music',
-        'politics': 'politics',
-        'sport': 'sport', 'sports': 'sport',
-        'design': 'design',
-        'food': 'food',
-        'travel': 'travel',
-        'fashion': 'fashion',
-        'health': 'health',
-        'games': 'games', 'gaming': 'games',
-    }
+    def _get_client(self) -> "httpx.AsyncClient":
+        """
+        Return the shared HTTP client, creating it on first use. Keeping one
+        client reuses connections (and cookies) across pages and searches, so
+        the scraper should live on one event loop (see loop_runner.py).
+        """
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(follow_redirects=True, timeout=20.0)
+        return self._client
     
-    # Blocked keywords for safe mode (comprehensive list)
-    BLOCKED_KEYWORDS = [
-        # VPN/Proxy/Filter bypass (فیلترشکن)
-        'vpn', 'proxy', 'v2ray', 'v2رای', 'vmess', 'vless', 'trojan', 'shadowsock',
-        'فیلترشکن', 'فیلتر شکن', 'فیلتر', 'دور زدن', 'اینترنت آزاد', 'عبور از فیلتر',
-        'وی پی ان', 'پروکسی', 'کانفیگ رایگان', 'سرور رایگان', 'اینترنت رایگان',
-        'outline', 'wireguard', 'openvpn', 'nekoray', 'matsuri', 'v2rayng',
-        
-        # Adult/18+ (محتوای بزرگسال)
-        'adult', '18+', '+18', 'xxx', 'porn', 'porno', 'sex', 'sexy', 'nude', 'naked',
-        'nsfw', 'onlyfans', 'erotic', 'fetish', 'milf', 'teen',
-        'سکس', 'سکسی', 'بزرگسال', 'صیغه', 'دوست یابی', 'ارتباط جنسی',
-        'فیلم سوپر', 'عکس لخت', 'پورن', 'سوپر', 'هات', 'سک', 
-        'رابطه', 'شب', 'همخوابی', 'خیانت',
-        
-        # Gambling/Betting (قمار و شرط بندی)
-        'casino', 'gambling', 'gamble', 'bet', 'betting', 'poker', 'slot', 'jackpot',
-        'blackjack', 'roulette', 'baccarat', 'sports bet', 'live bet',
-        'شرط بندی', 'شرطبندی', 'کازینو', 'قمار', 'بت', 'پیش بینی فوتبال',
-        'پیش بینی', 'سایت شرط', 'بازی انفجار', 'انفجار', 'رولت', 'پوکر',
-        'اسلات', 'جک پات', 'برد تضمینی', 'درآمد میلیونی', 'پول آسان',
-        'بلک جک', 'باکارات', 'بازی آنلاین پولی',
-        
-        # Hacking/Cracking/Illegal (هک و کرک)
-        'hack', 'hacker', 'hacking', 'crack', 'cracker', 'cracked', 'keygen', 'patch',
-        'exploit', 'malware', 'trojan', 'virus', 'phishing', 'spyware', 'ransomware',
-        'هک', 'هکر', 'کرک', 'کرکر', 'نفوذ', 'دزدی اطلاعات', 'دزدی حساب',
-        'هک تلگرام', 'هک اینستا', 'هک واتساپ', 'جعل', 'کلاهبرداری',
-        'ربات هک', 'شماره مجازی', 'اکانت کرکی',
-        
-        # Drugs (مواد مخدر)
-        'drug', 'weed', 'marijuana', 'cannabis', 'cocaine', 'heroin', 'meth',
-        'مواد', 'مخدر', 'گل', 'حشیش', 'شیشه', 'تریاک', 'هروئین',
-        'گراس', 'ماری جوانا', 'کوکائین', 'قرص', 'روانگردان',
-        
-        # Scam/Fraud (کلاهبرداری)
-        'scam', 'fraud', 'ponzi', 'pyramid', 'mlm', 'hyip', 'doubler',
-        'کلاهبرداری', 'کلاهبردار', 'پانزی', 'هرمی', 'دابلر', 'ضریب',
-        'سرمایه گذاری تضمینی', 'سود تضمینی', 'درآمد بدون کار',
-        'پول مفت', 'ثروت سریع', 'میلیاردر شو',
-        
-        # Weapons (اسلحه)
-        'gun', 'weapon', 'اسلحه', 'سلاح', 'تفنگ', 'چاقو', 'مهمات',
-        
-        # Fake documents (جعل مدارک)
-        'fake id', 'fake document', 'مدرک جعلی', 'گواهی جعلی', 'دیپلم', 'مدرک',
-    ]
+    async def _request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        """Send a request through the shared client once the rate limiter allows it."""
+        await self.limiter.wait()
+        return await self._get_client().request(method, url, **kwargs)
     
-    def _is_safe_channel(self, title: str, bio: str = "") -> bool:
-        """Check if a channel is safe based on title and bio."""
-        text_to_check = f"{title} {bio}".lower()
-        for blocked in self.BLOCKED_KEYWORDS:
-            if blocked.lower() in text_to_check:
-                return False
-        return True
+    async def close(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
-    # Keywords that indicate personal/hobby channels (not good for B2B)
-    PERSONAL_CHANNEL_KEYWORDS = [
-        # Personal indicators
-        'personal', 'شخصی', 'خصوصی', 'من', 'ما', 'my channel', 'my page',
-        'کانال من', 'صفحه من', 'روزانه های من', 'دلنوشته', 'یادداشت',
-        
-        # Hobby/Fan channels
-        'fan', 'فن', 'طرفدار', 'هوادار', 'fanpage', 'fan page',
-        'عاشقان', 'دوستداران',
-        
-        # Music artists (personal)
-        'official artist', 'singer', 'خواننده', 'هنرمند', 'موزیسین',
-        
-        # Personal blogs
-        'blog', 'بلاگ', 'وبلاگ', 'daily', 'روزانه', 'diary', 'دفترچه',
-        
-        # Poetry/Literature (personal)
-        'poem', 'شعر', 'غزل', 'poetry', 'ادبی', 'ادبیات',
-        
-        # Memes/Fun (not commercial)
-        'meme', 'میم', 'طنز', 'joke', 'جوک', 'شوخی', 'خنده',
-        'funny', 'فان', 'تفریحی',
-        
-        # Religious (usually not commercial)
-        'مذهبی', 'دینی', 'قرآن', 'دعا', 'مداحی', 'نوحه',
-        'religious', 'prayer', 'quran',
-        
-        # Wallpaper/Media sharing
-        'wallpaper', 'والپیپر', 'پس زمینه', 'عکس نوشته',
-        'تصاویر', 'عکس های', 'photo', 'فتو',
-        
-        # Free stuff (not paying customers)
-        'رایگان', 'free', 'مجانی', 'بدون هزینه',
-        
-        # Downloads/Piracy
-        'download', 'دانلود', 'فیلم و سریال', 'موزیک ویدیو',
-        
-        # Chat/Social groups
-        'chat', 'چت', 'گپ', 'دوستی', 'آشنایی', 'همسریابی',
-    ]
+    # Filter lists and category slugs live in vocab/*.json (see vocab.py) and are
+    # reloaded automatically when the files change.
     
-    # Keywords that indicate good B2B channels
-    BUSINESS_CHANNEL_KEYWORDS = [
-        # Business indicators
-        'shop', 'store', 'فروشگاه', 'مغازه', 'بوتیک', 'boutique',
-        'brand', 'برند', 'company', 'شرکت', 'موسسه', 'سازمان',
-        'official', 'رسمی', 'agency', 'آژانس', 'استودیو', 'studio',
-        
-        # E-commerce
-        'خرید', 'buy', 'فروش', 'sale', 'sell', 'order', 'سفارش',
-        'price', 'قیمت', 'تخفیف', 'discount', 'offer', 'پیشنهاد',
-        
-        # Services
-        'service', 'خدمات', 'مشاوره', 'consulting', 'آموزشگاه',
-        'academy', 'آکادمی', 'institute', 'موسسه',
-        
-        # Products
-        'product', 'محصول', 'کالا', 'goods', 'item',
-        'collection', 'کالکشن', 'مجموعه',
-        
-        # Professional
-        'professional', 'حرفه ای', 'تخصصی', 'expert', 'متخصص',
-        'certified', 'معتبر', 'official', 'رسمی',
-    ]
+    def _is_safe_channel(self, title: str, bio: str = "") -> bool:
+        """Check if a channel is safe based on title and bio."""
+        return not vocab.get_matcher(vocab.BLOCKED).matches(f"{title} {bio}")
     
     def _is_business_channel(self, title: str, bio: str = "", members_count: int = 0) -> bool:
         """
         Check if a channel is likely a business/commercial channel.
         Returns True if it seems commercial, False if personal/hobby.
         """
-        text_to_check = f"{title} {bio}".lower()
+        text_to_check = f"{title} {bio}"
         
         # Check for personal indicators (negative signals)
-        personal_score = 0
-        for keyword in self.PERSONAL_CHANNEL_KEYWORDS:
-            if keyword.lower() in text_to_check:
-                personal_score += 1
+        personal_score = vocab.get_matcher(vocab.PERSONAL).count(text_to_check)
         
         # Check for business indicators (positive signals)
-        business_score = 0
-        for keyword in self.BUSINESS_CHANNEL_KEYWORDS:
-            if keyword.lower() in text_to_check:
-                business_score += 1
+        business_score = vocab.get_matcher(vocab.BUSINESS).count(text_to_check)
         
         # If more personal than business indicators, skip
         if personal_score > business_score:
@@ -646,44 +1717,44 @@ class TgstatScraper:
                 'Accept-Language': 'en-US,en;q=0.5',
             }
             
-            async with httpx.AsyncClient(headers=simple_headers, follow_redirects=True, timeout=20.0) as client:
+            if status_callback:
+                status_callback(f"Fetching category page: {url}")
+            
+            r = await self._request("GET", url, headers=simple_headers)
+            
+            if r.status_code != 200:
                 if status_callback:
-                    status_callback(f"Fetching category page: {url}")
-                
-                r = await client.get(url)
-                
-                if r.status_code != 200:
-                    if status_callback:
-                        status_callback(f"Category page returned {r.status_code}")
-                    return []
-                
-                # Check for auth requirement
-                if "Authentication Required" in r.text:
-                    if status_callback:
-                        status_callback(f"Category page requires auth")
-                    return []
-                
-                soup = BeautifulSoup(r.text, 'html.parser')
-                
-                # Find channel links
-                links = soup.find_all('a', href=True)
-                for l in links:
-                    href = l['href']
-                    if '/channel/@' in href:
-                        # Clean the URL
-                        if '/stat' in href:
-                            href = href.replace('/stat', '')
-                        if href not in results:
-                            results.append(href)
-                            if len(results) >= limit:
-                                break
-                
+                    status_callback(f"Category page returned {r.status_code}")
+                r.raise_for_status()
+            
+            # Check for auth requirement
+            if "Authentication Required" in r.text:
                 if status_callback:
-                    status_callback(f"Found {len(results)} channels from category page")
-                    
+                    status_callback(f"Category page requires auth")
+                return []
+            
+            soup = _parse_html(r.text)
+            
+            # Find channel links
+            links = soup.find_all('a', href=True)
+            for l in links:
+                href = l['href']
+                if '/channel/@' in href:
+                    # Clean the URL
+                    if '/stat' in href:
+                        href = href.replace('/stat', '')
+                    if href not in results:
+                        results.append(href)
+                        if len(results) >= limit:
+                            break
+            
+            if status_callback:
+                status_callback(f"Found {len(results)} channels from category page")
+                
         except Exception as e:
             if status_callback:
                 status_callback(f"Category scrape error: {str(e)}")
+            raise
         
         return results
     
@@ -700,47 +1771,48 @@ class TgstatScraper:
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             }
             
-            async with httpx.AsyncClient(headers=simple_headers, follow_redirects=True, timeout=20.0) as client:
+            if status_callback:
+                status_callback(f"Fetching ratings page...")
+            
+            r = await self._request("GET", url, headers=simple_headers)
+            
+            r.raise_for_status()
+            
+            if "Authentication Required" in r.text:
                 if status_callback:
-                    status_callback(f"Fetching ratings page...")
-                
-                r = await client.get(url)
-                
-                if r.status_code != 200:
-                    return []
-                
-                if "Authentication Required" in r.text:
-                    if status_callback:
-                        status_callback(f"Ratings page requires auth")
-                    return []
-                
-                soup = BeautifulSoup(r.text, 'html.parser')
-                
-                links = soup.find_all('a', href=True)
-                for l in links:
-                    href = l['href']
-                    if '/channel/@' in href:
-                        if '/stat' in href:
-                            href = href.replace('/stat', '')
-                        if href not in results:
-                            results.append(href)
-                            if len(results) >= limit:
-                                break
+                    status_callback(f"Ratings page requires auth")
+                return []
+            
+            soup = _parse_html(r.text)
+            
+            links = soup.find_all('a', href=True)
+            for l in links:
+                href = l['href']
+                if '/channel/@' in href:
+                    if '/stat' in href:
+                        href = href.replace('/stat', '')
+                    if href not in results:
+                        results.append(href)
+                        if len(results) >= limit:
+                            break
+            
+            if status_callback:
+                status_callback(f"Found {len(results)} channels from ratings page")
                 
-                if status_callback:
-                    status_callback(f"Found {len(results)} channels from ratings page")
-                    
         except Exception as e:
             if status_callback:
                 status_callback(f"Ratings scrape error: {str(e)}")
+            raise
         
         return results
     
     async def _get_ddg_results(self, query: str, limit: int) -> list:
         try:
-            return DDGS().text(query, max_results=limit)
-        except Exception:
+            from duckduckgo_search import DDGS
+        except ImportError:
             return []
+        # DDGS is synchronous; keep it off the event loop so other keywords keep running
+        return await asyncio.to_thread(DDGS().text, query, max_results=limit)
 
     async def _search_direct_tgstat(self, keyword: str, limit: int, status_callback: Optional[Callable[[str], None]] = None) -> list:
         """
@@ -750,100 +1822,117 @@ class TgstatScraper:
         url_search = "https://tgstat.com/channels/search"
         
         try:
-            async with httpx.AsyncClient(headers=self.headers, follow_redirects=True, timeout=20.0) as client:
-                # 1. GET to get token
-                r_get = await client.get(url_search)
-                if r_get.status_code != 200:
-                    if status_callback: status_callback(f"⚠️ Strategy 3 Failed: GET returned {r_get.status_code}")
-                    return []
-                
-                soup = BeautifulSoup(r_get.text, 'html.parser')
-                token_input = soup.find('input', {'name': '_tgstat_csrk'})
-                if not token_input:
-                    if status_callback: status_callback("⚠️ Strategy 3 Failed: No CSRF token found in GET response")
-                    return []
-                token = token_input['value']
-                
-                # 2. POST
-                data = {
-                    '_tgstat_csrk': token,
-                    'q': keyword,
-                    'inAbout': '1',
-                    'page': '1'
-                }
-                
-                # Add delay
-                await asyncio.sleep(random.uniform(2.0, 4.0))
-                
-                r_post = await client.post(url_search, data=data)
-                if r_post.status_code != 200:
-                    if status_callback: status_callback(f"⚠️ Strategy 3 Failed: POST returned {r_post.status_code}")
-                    return []
-                
-                # Parse JSON response
-                is_json = False
-                try:
-                    json_data = r_post.json()
-                    html_content = json_data.get('html', '')
-                    soup_res = BeautifulSoup(html_content, 'html.parser')
-                    is_json = True
-                except:
-                    # Fallback if not JSON (though it should be with the header)
-                    soup_res = BeautifulSoup(r_post.text, 'html.parser')
-                
-                # Parse cards
-                links = soup_res.find_all('a', href=True)
-                for l in links:
-                    href = l['href']
-                    # Matches: https://tgstat.com/channel/@username/stat or similar
-                    if '/channel/@' in href or '/channel/' in href:
-                         # Clean URL to get base channel URL
-                         if '/stat' in href:
-                             href = href.replace('/stat', '')
-                         
-                         if href not in results:
-                             results.append(href)
-                             if len(results) >= limit:
-                                 break
-                
-                if not results and status_callback:
-                    # Log a snippet of HTML for debugging
-                    html_snippet = html_content[:300] if is_json else r_post.text[:300]
-                    status_callback(f"⚠️ Strategy 3: 0 links found. HTML snippet: {html_snippet}")
+            # 1. GET to get token
+            r_get = await self._request("GET", url_search, headers=self.headers)
+            if r_get.status_code != 200:
+                if status_callback: status_callback(f"⚠️ Strategy 3 Failed: GET returned {r_get.status_code}")
+                r_get.raise_for_status()
+            
+            soup = _parse_html(r_get.text)
+            token_input = soup.find('input', {'name': '_tgstat_csrk'})
+            if not token_input:
+                if status_callback: status_callback("⚠️ Strategy 3 Failed: No CSRF token found in GET response")
+                return []
+            token = token_input['value']
+            
+            # 2. POST
+            data = {
+                '_tgstat_csrk': token,
+                'q': keyword,
+                'inAbout': '1',
+                'page': '1'
+            }
+            
+            # The rate limiter spaces the POST from the GET
+            r_post = await self._request("POST", url_search, data=data, headers=self.headers)
+            if r_post.status_code != 200:
+                if status_callback: status_callback(f"⚠️ Strategy 3 Failed: POST returned {r_post.status_code}")
+                r_post.raise_for_status()
+            
+            # Parse JSON response
+            is_json = False
+            try:
+                json_data = r_post.json()
+                html_content = json_data.get('html', '')
+                soup_res = _parse_html(html_content)
+                is_json = True
+            except:
+                # Fallback if not JSON (though it should be with the header)
+                soup_res = _parse_html(r_post.text)
+            
+            # Parse cards
+            links = soup_res.find_all('a', href=True)
+            for l in links:
+                href = l['href']
+                # Matches: https://tgstat.com/channel/@username/stat or similar
+                if '/channel/@' in href or '/channel/' in href:
+                     # Clean URL to get base channel URL
+                     if '/stat' in href:
+                         href = href.replace('/stat', '')
+                     
+                     if href not in results:
+                         results.append(href)
+                         if len(results) >= limit:
+                             break
+            
+            if not results and status_callback:
+                # Log a snippet of HTML for debugging
+                html_snippet = html_content[:300] if is_json else r_post.text[:300]
+                status_callback(f"⚠️ Strategy 3: 0 links found. HTML snippet: {html_snippet}")
 
         except Exception as e:
             if status_callback: status_callback(f"⚠️ Strategy 3 Error: {str(e)}")
-            pass
+            raise
             
         return results
 
-    async def search_channels(
+    async def _discover_urls(
         self,
         keyword: str,
-        limit: int = 50,
-        category_tag: str = "",
+        limit: int,
         region: str = "tgstat.com",
-        safe_mode: bool = True,
-        business_mode: bool = True,
         status_callback: Optional[Callable[[str], None]] = None,
-        flood_callback: Optional[Callable[[int], None]] = None
-    ) -> AsyncGenerator[dict, None]:
+        refresh: bool = False
+    ) -> list[str]:
         """
-        Search for channels via category pages, ratings, and DDG fallback.
+        Find candidate channel page URLs for a keyword: category page, ratings
+        page, DDG site search and direct Tgstat search, in that order, each only
+        if the previous ones found too few. Each strategy's URLs are served from
+        the discovery cache while fresh; refresh=True ignores the cache. A
+        strategy that fails (HTTP or network error) isn't cached, and if no
+        strategy found anything because of such failures the search raises.
         """
         found_urls = set()
+        failures = []
+        
+        async def cached(strategy: str, key: str, search: Callable[[], Awaitable[list]]) -> list:
+            urls = None if refresh else self.discovery.get(key, region, strategy, limit)
+            if urls is not None:
+                if status_callback:
+                    status_callback(f"💾 {strategy}: {len(urls)} cached URLs")
+                return urls
+            try:
+                urls = await search()
+            except Exception as e:
+                failures.append(f"{strategy}: {e}")
+                return []
+            self.discovery.put(key, region, strategy, limit, urls)
+            return urls
         
         if status_callback:
             status_callback(f"Using region: {region}")
         
         # Strategy 1: Try to match keyword to a category
         keyword_lower = keyword.lower().strip()
-        category_slug = self.CATEGORY_SLUGS.get(keyword_lower)
+        category_slug = vocab.get_mapping(vocab.CATEGORY_SLUGS).get(keyword_lower)
         
         if category_slug:
             if status_callback:
                 status_callback(f"🔎 Strategy 1: Scraping category page '{category_slug}'...")
-            category_urls = await self._scrape_category_page(category_slug, limit, region, status_callback)
+            category_urls = await cached(
+                'category', keyword,
+                lambda: self._scrape_category_page(category_slug, limit, region, status_callback)
+            )
             for url in category_urls:
                 found_urls.add(url)
         else:
@@ -854,7 +1943,8 @@ class TgstatScraper:
         if len(found_urls) < 5:
             if status_callback:
                 status_callback(f"🔎 Strategy 2: Scraping ratings page...")
-            rating_urls = await self._scrape_ratings_page(limit, status_callback)
+            # The ratings page is the same for every keyword
+            rating_urls = await cached('ratings', "*", lambda: self._scrape_ratings_page(limit, status_callback))
             for url in rating_urls:
                 if url not in found_urls:
                     found_urls.add(url)
@@ -864,10 +1954,14 @@ class TgstatScraper:
             if status_callback:
                 status_callback(f"🔎 Strategy 3: DDG Site Search for '{keyword}'...")
             
-            ddg_results = await self._get_ddg_results(f'site:tgstat.com/channel "{keyword}"', limit)
+            async def ddg_search() -> list:
+                results = await self._get_ddg_results(f'site:tgstat.com/channel "{keyword}"', limit)
+                return [res.get('href', '') for res in results if res.get('href')]
+            
+            ddg_results = await cached('ddg', keyword, ddg_search)
             if ddg_results:
-                for res in ddg_results:
-                    found_urls.add(res.get('href', ''))
+                for href in ddg_results:
+                    found_urls.add(href)
                 if status_callback:
                     status_callback(f"✅ Strategy 3: Found {len(ddg_results)} DDG results")
             else:
@@ -878,19 +1972,87 @@ class TgstatScraper:
         if len(found_urls) < 3:
             if status_callback:
                 status_callback(f"🔎 Strategy 4: Direct Tgstat Search...")
-            direct_urls = await self._search_direct_tgstat(keyword, limit, status_callback)
+            direct_urls = await cached(
+                'direct', keyword,
+                lambda: self._search_direct_tgstat(keyword, limit, status_callback)
+            )
             for href in direct_urls:
                 if href not in found_urls:
                     found_urls.add(href)
 
         if not found_urls:
+            if failures:
+                raise RuntimeError(f"Discovery failed for '{keyword}': {'; '.join(failures)}")
             if status_callback:
                 status_callback(f"⚠️ No results found for '{keyword}' via any strategy")
-            return
+            return []
             
         if status_callback:
              status_callback(f"✅ Found {len(found_urls)} potential URLs. Scraping details...")
-
+        return list(found_urls)
+    
+    async def search_keywords(
+        self,
+        keywords: list[str],
+        limit: int = 50,
+        category_tag: str = "",
+        region: str = "tgstat.com",
+        safe_mode: bool = True,
+        business_mode: bool = True,
+        concurrency: int = KEYWORD_CONCURRENCY,
+        refresh: bool = False,
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None,
+        progress_callback: Optional[Callable[[str, dict], None]] = None,
+        checkpoint: Optional[CrawlCheckpoint] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Search several keywords concurrently (see keyword_runner.py). All
+        discovery and detail requests share this scraper's rate limiter, and a
+        channel found by several keywords is fetched once. Yields at most
+        `limit` leads per keyword; progress_callback gets (keyword, stats).
+        refresh=True bypasses the discovery cache. A checkpoint records the
+        frontier and fetched URLs, and continues from them when resuming.
+        """
+        async def discover(keyword: str) -> list[str]:
+            return await self._discover_urls(keyword, limit, region, status_callback, refresh=refresh)
+        
+        async def fetch(url: str) -> Optional[dict]:
+            if status_callback:
+                status_callback(f"Processing: {url}...")
+            details = await self._fetch_channel_details(url)
+            return self._filter_and_save(details, category_tag, safe_mode, business_mode, status_callback)
+        
+        async for lead in run_keywords(
+            discover,
+            fetch,
+            keywords,
+            limit,
+            concurrency=concurrency,
+            progress_callback=progress_callback,
+            checkpoint=checkpoint
+        ):
+            yield lead
+    
+    async def search_channels(
+        self,
+        keyword: str,
+        limit: int = 50,
+        category_tag: str = "",
+        region: str = "tgstat.com",
+        safe_mode: bool = True,
+        business_mode: bool = True,
+        refresh: bool = False,
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Search for channels via category pages, ratings, and DDG fallback.
+        """
+        found_urls = await self._discover_urls(keyword, limit, region, status_callback, refresh=refresh)
+        if not found_urls:
+            return
+        
         count = 0
         for url in found_urls:
             if count >= limit:
@@ -900,109 +2062,210 @@ class TgstatScraper:
                 status_callback(f"Processing: {url}...")
                 
             try:
-                # Random delay
-                delay = get_random_delay()
-                await asyncio.sleep(delay)
-                
-                # Scrape page
-                async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as client:
-                    resp = await client.get(url, headers=self.headers)
-                    
-                if resp.status_code != 200:
-                    continue
-                    
-                # Parse Content
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                
-                # Extract Data
-                # Title
-                title = "Unknown"
-                h1 = soup.find('h1')
-                if h1:
-                    title = h1.get_text(strip=True)
-                else:
-                    # Title might be in metadata
-                    meta_title = soup.find('meta', property='og:title')
-                    if meta_title:
-                        title = meta_title.get('content')
-                
-                # Username
-                username = None
-                if '@' in url:
-                    username = url.split('@')[-1].split('/')[0]
-                
-                # Fallback username finding
-                if not username:
-                     # Try finding t.me link
-                     tme_link = soup.find('a', href=re.compile(r't\.me/'))
-                     if tme_link:
-                         username = tme_link['href'].split('t.me/')[-1].strip('/')
-                
-                if not username:
-                    # Skip if no username found (crucial for leads)
-                    continue
-
-                # Members Count
-                members_count = 0
-                # Try to find specific stat block
-                # Usually a number followed by "subscribers" or in a 'position-relative' block
-                text_content = soup.get_text()
-                sub_matches = re.findall(r'([\d\s]+)\s+subscribers', text_content, re.IGNORECASE)
-                if sub_matches:
-                    try:
-                        # Take the first one that looks like a number
-                        members_count = int(sub_matches[0].replace(' ', '').strip())
-                    except:
-                        pass
-                
-                # Bio
-                bio_text = ""
-                meta_desc = soup.find('meta', {'name': 'description'})
-                if meta_desc:
-                    bio_text = meta_desc.get('content', '')
-                
-                # Safe mode filter
-                if safe_mode and not self._is_safe_channel(title, bio_text):
-                    if status_callback:
-                        status_callback(f"🚫 Skipping unsafe channel: {username}")
-                    continue
-                
-                # Business mode filter
-                if business_mode and not self._is_business_channel(title, bio_text, members_count):
-                    if status_callback:
-                        status_callback(f"👤 Skipping personal channel: {username}")
+                # Pages are spaced by the scraper's rate limiter
+                details = await self._fetch_channel_details(url)
+                lead = self._filter_and_save(details, category_tag, safe_mode, business_mode, status_callback)
+                if lead is None:
                     continue
                 
-                # Admin Contact
-                admin_contact = extract_admin_contacts(bio_text)
-                
-                # ID Generation
-                channel_id = abs(hash(username)) % (10**10)
-
-                # Save
-                upsert_lead(
-                    channel_id=channel_id,
-                    username=username,
-                    title=title,
-                    category_tag=category_tag,
-                    members_count=members_count,
-                    bio_text=bio_text,
-                    admin_contact=admin_contact
-                )
-                
-                yield {
-                    'channel_id': channel_id,
-                    'username': username,
-                    'title': title,
-                    'category_tag': category_tag,
-                    'members_count': members_count,
-                    'bio_text': bio_text,
-                    'admin_contact': admin_contact
-                }
-                
+                yield lead
                 count += 1
                     
             except Exception as e:
                 # Log but continue
                 pass
+    
+    async def crawl_mentions(
+        self,
+        seeds: list[dict],
+        category_tag: str = "",
+        region: str = "tgstat.com",
+        max_depth: int = crawl.MAX_DEPTH,
+        budget: int = crawl.CRAWL_BUDGET,
+        safe_mode: bool = True,
+        business_mode: bool = True,
+        status_callback: Optional[Callable[[str], None]] = None,
+        flood_callback: Optional[Callable[[int], None]] = None
+    ) -> AsyncGenerator[dict, None]:
+        """
+        Snowball discovery: follow the @handles and t.me links in the seeds'
+        bios to their Tgstat channel pages (see crawl.py). Channels already in
+        the leads table are skipped. Yields the new leads that pass the filters.
+        """
+        async def fetch(username: str) -> Optional[dict]:
+            try:
+                details = await self._fetch_channel_details(f"https://{region}/channel/@{username}")
+            except Exception:
+                return None
+            return self._filter_and_save(details, category_tag, safe_mode, business_mode, status_callback)
+        
+        async for lead in crawl.snowball(
+            fetch,
+            seeds,
+            known_usernames=get_known_usernames(),
+            category_tag=category_tag,
+            max_depth=max_depth,
+            budget=budget,
+            status_callback=status_callback,
+            flood_callback=flood_callback
+        ):
+            yield lead
+    
+    async def scrape_channel(
+        self,
+        username: str,
+        category_tag: str = "",
+        region: str = "tgstat.com",
+        safe_mode: bool = True,
+        business_mode: bool = True,
+        status_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[dict]:
+        """
+        Fetch one channel's Tgstat page and store it as a lead if it passes the
+        filters. Returns None otherwise; request errors are raised.
+        """
+        details = await self._fetch_channel_details(f"https://{region}/channel/@{username.lstrip('@')}")
+        return self._filter_and_save(details, category_tag, safe_mode, business_mode, status_callback)
+    
+    async def _fetch_channel_details(self, url: str) -> Optional[dict]:
+        """
+        Fetch a Tgstat channel page and parse username, title, members and bio.
+        Returns None if the page doesn't exist (404) or has no username; other
+        HTTP errors (429, 5xx) are raised so callers can retry the page.
+        """
+        resp = await self._request("GET", url, headers=self.headers, timeout=15.0)
+        
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+            
+        # Parse Content
+        soup = _parse_html(resp.text)
+        
+        # Extract Data
+        # Title
+        title = "Unknown"
+        h1 = soup.find('h1')
+        if h1:
+            title = h1.get_text(strip=True)
+        else:
+            # Title might be in metadata
+            meta_title = soup.find('meta', property='og:title')
+            if meta_title:
+                title = meta_title.get('content')
+        
+        # Username
+        username = None
+        if '@' in url:
+            username = url.split('@')[-1].split('/')[0]
+        
+        # Fallback username finding
+        if not username:
+             # Try finding t.me link
+             tme_link = soup.find('a', href=re.compile(r't\.me/'))
+             if tme_link:
+                 username = tme_link['href'].split('t.me/')[-1].strip('/')
+        
+        if not username:
+            # Skip if no username found (crucial for leads)
+            return None
+
+        # Members Count
+        members_count = 0
+        # Try to find specific stat block
+        # Usually a number followed by "subscribers" or in a 'position-relative' block
+        text_content = soup.get_text()
+        sub_matches = re.findall(r'([\d\s]+)\s+subscribers', text_content, re.IGNORECASE)
+        if sub_matches:
+            try:
+                # Take the first one that looks like a number
+                members_count = int(sub_matches[0].replace(' ', '').strip())
+            except:
+                pass
+        
+        # Bio
+        bio_text = ""
+        meta_desc = soup.find('meta', {'name': 'description'})
+        if meta_desc:
+            bio_text = meta_desc.get('content', '')
+        
+        return {
+            'username': username,
+            'title': title,
+            'members_count': members_count,
+            'bio_text': bio_text
+        }
+    
+    def _filter_and_save(
+        self,
+        details: Optional[dict],
+        category_tag: str,
+        safe_mode: bool,
+        business_mode: bool,
+        status_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[dict]:
+        """Apply the Safe/Business filters to parsed channel details and store the lead."""
+        if details is None:
+            return None
+        username = details['username']
+        title = details['title']
+        members_count = details['members_count']
+        bio_text = details['bio_text']
+        
+        # Safe mode filter
+        if safe_mode and not self._is_safe_channel(title, bio_text):
+            if status_callback:
+                status_callback(f"🚫 Skipping unsafe channel: {username}")
+            return None
+        
+        # Business mode filter
+        if business_mode and not self._is_business_channel(title, bio_text, members_count):
+            if status_callback:
+                status_callback(f"👤 Skipping personal channel: {username}")
+            return None
+        
+        # Admin Contact
+        admin_contact = extract_admin_contacts(bio_text)
+        
+        # ID Generation
+        channel_id = tgstat_channel_id(username)
+
+        # Save
+        lead_score = upsert_lead(
+            channel_id=channel_id,
+            username=username,
+            title=title,
+            category_tag=category_tag,
+            members_count=members_count,
+            bio_text=bio_text,
+            admin_contact=admin_contact
+        )
+        
+        return {
+            'channel_id': channel_id,
+            'username': username,
+            'title': title,
+            'category_tag': category_tag,
+            'members_count': members_count,
+            'bio_text': bio_text,
+            'admin_contact': admin_contact,
+            'lead_score': lead_score
+        }
+
+
+def tgstat_channel_id(username: str) -> int:
+    """
+    Stable pseudo channel ID for a channel known only by username (Tgstat pages
+    don't show the real ID). hash() is salted per process, so it can't be used.
+    """
+    digest = hashlib.sha1(username.lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % (10**10)
 
+def classify_channel(title: str, bio: str = "") -> tuple[int, int, int]:
+    """
+    Score a channel against the filter lists.
+    Returns (is_safe, business_score, personal_score) as stored in the leads table.
+    """
+    scores = vocab.get_classifier().scores(f"{title} {bio}")
+    is_safe = 0 if scores['blocked'] else 1
+    return is_safe, scores['business'], scores['personal']
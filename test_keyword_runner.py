@@ -0,0 +1,64 @@
+"""
+Tests for run_keywords (keyword_runner.py): failed pages and discoveries
+only cost their own candidates, while an error in the progress callback,
+raised from the coordinator or from a worker, ends the run with that error
+instead of leaving it waiting.
+"""
+
+import asyncio
+
+import pytest
+
+from keyword_runner import run_keywords
+
+PAGES = {
+    "crypto": ["/a", "/b", "/c"],
+    "forex": ["/c", "/d"],
+}
+
+
+async def discover(keyword):
+    if keyword == "broken":
+        raise ConnectionError("search page down")
+    return PAGES[keyword]
+
+
+async def fetch(url):
+    if url == "/d":
+        raise ConnectionError("page down")
+    return {'url': url}
+
+
+def collect(keywords, progress_callback=None, limit=10):
+    async def run():
+        return [
+            lead async for lead in run_keywords(
+                discover, fetch, keywords, limit, concurrency=2, progress_callback=progress_callback
+            )
+        ]
+    # A hang is a failure too
+    return asyncio.run(asyncio.wait_for(run(), 10))
+
+
+def test_failures_only_cost_their_candidates():
+    progress = {}
+
+    leads = collect(["crypto", "forex", "broken"], lambda keyword, stats: progress.__setitem__(keyword, stats))
+
+    assert sorted(lead['url'] for lead in leads) == ["/a", "/b", "/c"]
+    assert all(stats['state'] == 'done' for stats in progress.values())
+    # /c was found by crypto first, so forex only fetches /d
+    assert progress["forex"]['candidates'] == 1
+    assert progress["forex"]['failed'] == 1
+    assert progress["broken"]['failed'] == 1
+
+
+@pytest.mark.parametrize("failing_state", ["discovering", "done"])
+def test_progress_callback_error_ends_the_run(failing_state):
+    # 'discovering' is reported by the coordinator, 'done' by a worker
+    def progress_callback(keyword, stats):
+        if stats['state'] == failing_state:
+            raise RuntimeError(f"progress display failed on {failing_state}")
+
+    with pytest.raises(RuntimeError, match=f"failed on {failing_state}"):
+        collect(["crypto", "forex"], progress_callback)
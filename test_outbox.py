@@ -0,0 +1,200 @@
+"""
+Tests for the Supabase outbox (outbox.py): failed batches are split so good
+leads go through, a lead Supabase keeps rejecting is parked, an outage
+parks nothing, and a lead written again mid-push stays queued. The last test
+syncs through supabase-py against fake_postgrest.py.
+"""
+
+import sqlite3
+
+import pytest
+
+import outbox
+import scraper
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh local SQLite database with an outbox table."""
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+    monkeypatch.setattr(scraper, "DB_PATH", tmp_path / "leads.db")
+    scraper.init_database()
+    conn = sqlite3.connect(scraper.DB_PATH)
+    outbox.init_tables(conn.cursor())
+    conn.commit()
+    conn.close()
+    yield scraper.DB_PATH
+    scraper.close_database(0)
+
+
+def queue_leads(path, channel_ids):
+    """Store leads locally and queue them, as upsert_leads does with Supabase."""
+    scraper.upsert_leads([
+        scraper.lead_record(channel_id, f"user_{channel_id}", f"Channel {channel_id}", "test", 100, "bio", None)
+        for channel_id in channel_ids
+    ])
+    conn = sqlite3.connect(path)
+    outbox.enqueue(conn.cursor(), list(channel_ids))
+    conn.commit()
+    conn.close()
+
+
+def outbox_rows(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = {row['channel_id']: dict(row) for row in conn.execute("SELECT * FROM lead_outbox")}
+    conn.close()
+    return rows
+
+
+def make_due(path):
+    """Skip the backoff of every queued lead."""
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE lead_outbox SET next_attempt = 0")
+    conn.commit()
+    conn.close()
+
+
+class FakeSupabase:
+    """push() stand-in that rejects batches containing a poisoned lead, or everything while down."""
+
+    def __init__(self, poisoned=()):
+        self.poisoned = set(poisoned)
+        self.down = False
+        self.stored = {}
+        self.calls = 0
+
+    def push(self, rows):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("Supabase is down")
+        bad = [row['channel_id'] for row in rows if row['channel_id'] in self.poisoned]
+        if bad:
+            raise ValueError(f"violates check constraint: {bad}")
+        for row in rows:
+            self.stored[row['channel_id']] = row
+
+
+def test_failed_batch_is_split_so_good_leads_go_through(db):
+    queue_leads(db, range(1, 21))
+    supabase = FakeSupabase(poisoned={7})
+
+    pushed, error = outbox.push_batch(db, supabase.push)
+
+    assert pushed == 19
+    assert "violates check constraint" in error
+    assert set(supabase.stored) == set(range(1, 21)) - {7}
+    rows = outbox_rows(db)
+    assert list(rows) == [7]
+    assert rows[7]['attempts'] == 1
+    assert rows[7]['rejections'] == 1
+
+
+def test_lead_rejected_on_its_own_is_parked(db):
+    queue_leads(db, range(1, 5))
+    supabase = FakeSupabase(poisoned={3})
+
+    for _ in range(outbox.MAX_REJECTIONS):
+        outbox.push_batch(db, supabase.push)
+        make_due(db)
+
+    status = outbox.status(db)
+    assert status['pending'] == 1
+    assert status['parked'] == 1
+    assert "violates check constraint" in status['parked_error']
+    # Parked leads aren't pushed again...
+    calls = supabase.calls
+    assert outbox.push_batch(db, supabase.push) == (0, None)
+    assert supabase.calls == calls
+    # ...until retried, here after the data was fixed
+    supabase.poisoned.clear()
+    assert outbox.retry_parked(db) == 1
+    assert outbox.push_batch(db, supabase.push) == (1, None)
+    assert outbox_rows(db) == {}
+
+
+def test_writing_a_parked_lead_again_unparks_it(db):
+    queue_leads(db, [1])
+    supabase = FakeSupabase(poisoned={1})
+    for _ in range(outbox.MAX_REJECTIONS):
+        outbox.push_batch(db, supabase.push)
+        make_due(db)
+    assert outbox.status(db)['parked'] == 1
+
+    queue_leads(db, [1])
+
+    assert outbox.status(db)['parked'] == 0
+    assert outbox_rows(db)[1]['rejections'] == 0
+
+
+def test_outage_parks_nothing_and_caps_splitting(db):
+    queue_leads(db, range(1, 101))
+    supabase = FakeSupabase()
+    supabase.down = True
+
+    pushed, error = outbox.push_batch(db, supabase.push)
+
+    assert (pushed, error) == (0, "Supabase is down")
+    # The first attempt, at most MAX_SPLIT_FAILURES more failed halves and the health probe
+    assert supabase.calls <= outbox.MAX_SPLIT_FAILURES + 2
+    rows = outbox_rows(db)
+    assert len(rows) == 100
+    assert all(row['rejections'] == 0 and row['attempts'] == 1 for row in rows.values())
+    # Nothing is due again before its backoff
+    assert outbox.push_batch(db, supabase.push) == (0, None)
+
+    supabase.down = False
+    make_due(db)
+    assert outbox.push_batch(db, supabase.push) == (100, None)
+    assert outbox.status(db)['pending'] == 0
+
+
+def test_lead_written_again_during_push_stays_queued(db):
+    queue_leads(db, [1, 2])
+    supabase = FakeSupabase()
+
+    def push(rows):
+        supabase.push(rows)
+        # Lead 2 is scraped again while its old row is in flight
+        queue_leads(db, [2])
+
+    assert outbox.push_batch(db, push) == (2, None)
+    rows = outbox_rows(db)
+    assert list(rows) == [2]
+    assert rows[2]['version'] == 2
+
+
+def test_syncer_pushes_to_postgrest_after_outage(tmp_path, monkeypatch):
+    pytest.importorskip("supabase")
+    from fake_postgrest import FakePostgrest
+
+    backend = FakePostgrest()
+    url = backend.start()
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+    monkeypatch.setattr(scraper, "DB_PATH", tmp_path / "leads.db")
+    try:
+        scraper.init_database(url, "test-key")
+        scraper._stop_sync()  # synced by hand below
+        backend.down = True
+        assert scraper.upsert_leads([
+            scraper.lead_record(channel_id, f"user_{channel_id}", f"Channel {channel_id}", "test", 100, "bio", None)
+            for channel_id in range(1, 11)
+        ])
+
+        pushed, error = outbox.push_batch(scraper.DB_PATH, scraper._push_leads)
+        assert pushed == 0 and error
+        assert outbox.status(scraper.DB_PATH)['pending'] == 10
+        # Reads fall back to the local copy while Supabase is down
+        assert len(scraper.get_all_leads()) == 10
+
+        backend.down = False
+        make_due(scraper.DB_PATH)
+        assert outbox.push_batch(scraper.DB_PATH, scraper._push_leads) == (10, None)
+        assert sorted(row['channel_id'] for row in backend.rows("leads")) == list(range(1, 11))
+        assert outbox.status(scraper.DB_PATH)['pending'] == 0
+    finally:
+        scraper.init_database()
+        scraper.close_database(0)
+        backend.stop()
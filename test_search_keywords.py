@@ -0,0 +1,95 @@
+"""
+Tests for TelegramScraper.search_keywords progress against fake_telethon.py:
+every chat a keyword found ends up fetched or failed, including detail
+batches given up after repeated FloodWaits and chats left out to stay within
+the request budget.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("telethon")
+
+import scraper
+from entity_cache import EntityCache
+from fake_telethon import FakeTelegramClient
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.channels import GetFullChannelRequest
+
+
+class FloodingDetailsClient(FakeTelegramClient):
+    """Searches succeed; every full-channel request hits a zero-second FloodWait."""
+
+    def _handle(self, request):
+        if isinstance(request, GetFullChannelRequest):
+            self.requests += 1
+            self.floods += 1
+            raise FloodWaitError(request, capture=0)
+        return super()._handle(request)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+    monkeypatch.setattr(scraper, "DB_PATH", tmp_path / "leads.db")
+    scraper.init_database()
+    yield scraper.DB_PATH
+    scraper.close_database(0)
+
+
+def make_scraper(tmp_path, client):
+    telegram = scraper.TelegramScraper(
+        api_id=1, api_hash="fake", phone="",
+        entity_cache=EntityCache(tmp_path / "cache.db"),
+        min_delay=0.0, max_delay=0.0
+    )
+    telegram.client = client
+    return telegram
+
+
+def search(telegram, keywords, limit):
+    progress, statuses = {}, []
+
+    async def run():
+        return [
+            lead async for lead in telegram.search_keywords(
+                keywords, limit=limit,
+                status_callback=statuses.append,
+                progress_callback=lambda keyword, stats: progress.__setitem__(keyword, stats)
+            )
+        ]
+    return asyncio.run(run()), progress, statuses
+
+
+def test_dropped_detail_batches_count_as_failed(db, tmp_path):
+    client = FloodingDetailsClient(channels=200, latency=0)
+    telegram = make_scraper(tmp_path, client)
+
+    leads, progress, statuses = search(telegram, ["crypto", "forex"], limit=15)
+
+    assert leads == []
+    for keyword in ("crypto", "forex"):
+        stats = progress[keyword]
+        assert stats['state'] == 'done'
+        assert stats['candidates'] == 15
+        assert stats['fetched'] == 0
+        assert stats['failed'] == 15
+    assert any("Giving up on details" in status for status in statuses)
+
+
+def test_chats_over_the_request_budget_count_as_failed(db, tmp_path):
+    client = FakeTelegramClient(channels=200, latency=0)
+    telegram = make_scraper(tmp_path, client)
+    # One search, then details for 6 of its 15 chats
+    telegram.set_max_requests(7)
+
+    leads, progress, statuses = search(telegram, ["crypto"], limit=15)
+
+    stats = progress["crypto"]
+    assert stats['state'] == 'done'
+    assert stats['candidates'] == 15
+    assert stats['fetched'] == len(leads) == 6
+    assert stats['failed'] == 9
+    assert any("Request budget left for 6 of 10 chats" in status for status in statuses)
@@ -0,0 +1,95 @@
+"""
+Tests for the work queue (work_queue.py): an expired lease is claimed by
+another worker and the old holder can no longer complete, fail or renew it,
+a renewed lease keeps the item, expiry on the last attempt dead-letters, and
+failed items are retried until dead, then queued again by retry_dead.
+"""
+
+import asyncio
+
+import pytest
+
+from work_queue import DEAD, DONE, KEYWORD, LOST, READY, WorkQueue, run_worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(tmp_path / "work_queue.db")
+
+
+def test_expired_lease_is_claimed_by_another_worker(queue):
+    queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}])
+    [first] = queue.claim("jobs", "worker-a", visibility=0)
+
+    [second] = queue.claim("jobs", "worker-b")
+
+    assert second.item_id == first.item_id
+    assert second.lease != first.lease
+    assert second.attempts == 2
+    # The first worker's lease is gone
+    assert not queue.renew(first)
+    assert not queue.complete(first, {'leads': 1})
+    assert queue.fail(first, "too late") is None
+    assert queue.complete(second, {'leads': 2})
+    assert queue.counts("jobs") == {"jobs": {DONE: 1}}
+
+
+def test_renewed_lease_is_not_claimed(queue):
+    queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}])
+    [item] = queue.claim("jobs", "worker-a", visibility=0)
+
+    assert queue.renew(item, visibility=60)
+
+    assert queue.claim("jobs", "worker-b") == []
+    assert queue.complete(item)
+
+
+def test_lease_expiring_on_last_attempt_dead_letters(queue):
+    queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}], max_attempts=2)
+    queue.claim("jobs", "worker-a", visibility=0)
+    [item] = queue.claim("jobs", "worker-b", visibility=0)
+    assert item.attempts == 2
+
+    assert queue.claim("jobs", "worker-c") == []
+
+    [dead] = queue.dead_letters("jobs")
+    assert dead['payload'] == {'keyword': "crypto"}
+    assert dead['last_error'] == "Lease expired on the last attempt"
+    assert not queue.complete(item)
+
+
+def test_failed_item_is_retried_until_dead(queue):
+    queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}], max_attempts=3)
+
+    states = []
+    for _ in range(3):
+        [item] = queue.claim("jobs", "worker-a")
+        states.append(queue.fail(item, "FloodWait", delay=0))
+    assert states == [READY, READY, DEAD]
+    assert queue.claim("jobs", "worker-a") == []
+    assert queue.dead_letters("jobs")[0]['last_error'] == "FloodWait"
+
+    assert queue.retry_dead("jobs") == 1
+    [item] = queue.claim("jobs", "worker-a")
+    assert item.attempts == 1
+    # A finished item is only queued again when asked to
+    assert queue.complete(item)
+    assert queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}]) == 0
+    assert queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}], again=True) == 1
+
+
+def test_worker_reports_a_lease_lost_while_processing(queue):
+    queue.enqueue("jobs", KEYWORD, [{'keyword': "crypto"}, {'keyword': "forex"}])
+
+    async def handle(item):
+        if item.payload['keyword'] == "crypto":
+            # Another worker takes the item over while this one is stalled
+            [stolen] = queue.claim("jobs", "worker-b", visibility=60)
+            queue.complete(stolen)
+        return {'leads': 0}
+
+    # Leases expire at once and are never renewed in time
+    finished = asyncio.run(run_worker(queue, "jobs", handle, visibility=0, poll_interval=0.01, drain=True))
+
+    assert finished == {LOST: 1, DONE: 1}
+    assert queue.counts("jobs") == {"jobs": {DONE: 2}}
@@ -0,0 +1,160 @@
+"""
+Tests for the single writer (writer.py): batches are committed and
+acknowledged, a failing batch is reported to its own worker only, a
+malformed message drops just that connection, and a worker reconnects to a
+restarted writer process (with its new key) after failing the batches the
+old one never acknowledged.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import scraper
+from writer import WriterClient, WriterError, WriterServer
+
+CLI = Path(__file__).parent / "cli.py"
+
+
+def record(channel_id, title=None):
+    return scraper.lead_record(channel_id, f"user_{channel_id}", title or f"Channel {channel_id}", "test", 100, "bio", None)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+def stored_ids():
+    return sorted(lead['channel_id'] for lead in scraper.get_all_leads())
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+    monkeypatch.setattr(scraper, "DB_PATH", tmp_path / "leads.db")
+    scraper.init_database()
+    return scraper.DB_PATH
+
+
+@pytest.fixture
+def server(db, tmp_path):
+    server = WriterServer(str(tmp_path / "writer.sock"))
+    threading.Thread(target=server.serve, daemon=True).start()
+    wait_for(lambda: os.path.exists(server.address))
+    yield server
+    server.close()
+
+
+def test_batches_are_committed_and_acknowledged(server):
+    client = WriterClient(server.address, batch_size=4)
+    for channel_id in range(1, 11):
+        client.submit(record(channel_id))
+    client.flush(10)
+
+    assert stored_ids() == list(range(1, 11))
+    assert server.stats['leads'] == 10
+    assert server.stats['batches'] == 3
+    client.close()
+
+
+def test_failed_batch_is_reported_to_its_worker_only(server):
+    good = WriterClient(server.address, batch_size=5)
+    bad = WriterClient(server.address, batch_size=5)
+    broken = record(100)
+    del broken['title']
+    bad.submit(broken)
+    for channel_id in range(1, 6):
+        good.submit(record(channel_id))
+
+    with pytest.raises(WriterError, match="1 leads not stored"):
+        bad.flush(10)
+    good.flush(10)
+
+    assert stored_ids() == list(range(1, 6))
+    good.close()
+    bad.close()
+
+
+def test_malformed_message_drops_the_connection(server):
+    client = WriterClient(server.address, batch_size=100)
+    client.submit(record(1))
+    with client._cond:
+        client._send()
+        client._conn.send(("batch", 99))  # missing the records
+
+    # The batch that was queued may or may not have been acked before the drop
+    try:
+        client.flush(10)
+    except WriterError as e:
+        assert "writer connection closed" in str(e)
+    assert server.stats['bad_messages'] == 1
+
+    # The next batch reconnects
+    client.submit(record(2))
+    client.flush(10)
+    assert stored_ids() == [1, 2]
+    assert server.stats['connections'] == 2
+    client.close()
+
+
+def read_key(address):
+    try:
+        return Path(address + ".key").read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def start_writer(db, address, old_key=None):
+    """Start `cli.py writer` and wait until it listens with a key other than old_key."""
+    process = subprocess.Popen(
+        [sys.executable, str(CLI), "--db", str(db), "writer", "--address", address],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # The writer removes a stale socket, writes its key, then binds: check in that order
+    wait_for(lambda: read_key(address) not in (None, old_key) and os.path.exists(address))
+    return process
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="kills the writer with SIGKILL")
+def test_worker_reconnects_to_a_restarted_writer(db, tmp_path):
+    address = str(tmp_path / "writer.sock")
+    writer = start_writer(db, address)
+    try:
+        client = WriterClient(address, batch_size=2)
+        client.submit(record(1))
+        client.submit(record(2))
+        client.flush(10)
+        first_key = read_key(address)
+
+        # The writer dies; batches it never acknowledged fail on flush
+        writer.send_signal(signal.SIGKILL)
+        writer.wait(10)
+        client.submit(record(3))
+        client.submit(record(4))
+        with pytest.raises(WriterError):
+            client.flush(10)
+
+        # A new writer (with a new key) takes over the stale socket, and the
+        # worker reconnects with the next batch it sends
+        writer = start_writer(db, address, old_key=first_key)
+        client.submit(record(3))
+        client.submit(record(4))
+        client.flush(10)
+        client.close()
+    finally:
+        writer.terminate()
+        writer.wait(10)
+
+    assert stored_ids() == [1, 2, 3, 4]
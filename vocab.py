@@ -0,0 +1,137 @@
+"""
+Telegram Lead Scraper - Filter Vocabularies
+Loads the versioned keyword lists and mappings in vocab/*.json once, compiles
+them into matchers cached by file hash, and reloads a file only when it changes
+on disk, so long-running workers pick up edits without a restart.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from matcher import KeywordMatcher, VocabularyMatcher
+
+VOCAB_DIR = Path(__file__).parent / "vocab"
+# Minimum seconds between stat() checks of a vocabulary file
+CHECK_INTERVAL = 2.0
+
+BLOCKED = "blocked_keywords"
+PERSONAL = "personal_keywords"
+BUSINESS = "business_keywords"
+CATEGORY_SLUGS = "category_slugs"
+PERSIAN_KEYWORDS = "persian_keywords"
+
+
+class Vocabulary(NamedTuple):
+    """One loaded vocabulary file."""
+    name: str
+    version: int
+    digest: str
+    keywords: list[str]
+    mapping: dict[str, str]
+
+
+class _Entry(NamedTuple):
+    vocabulary: Vocabulary
+    mtime_ns: int
+    size: int
+    checked_at: float
+
+
+_lock = threading.Lock()
+_entries: dict[str, _Entry] = {}
+# Compiled matchers keyed by the digests of the files they were built from
+_matchers: dict[tuple, object] = {}
+
+
+def _parse(name: str, raw: bytes, digest: str) -> Vocabulary:
+    """Parse a vocabulary file. Lists are stored as named groups, maps as "mapping"."""
+    data = json.loads(raw.decode("utf-8"))
+    keywords = [keyword for group in data.get("groups", {}).values() for keyword in group]
+    keywords.extend(data.get("keywords", []))
+    return Vocabulary(
+        name=name,
+        version=int(data.get("version", 1)),
+        digest=digest,
+        keywords=keywords,
+        mapping=dict(data.get("mapping", {})),
+    )
+
+
+def load_vocabulary(name: str, vocab_dir: Optional[Path] = None) -> Vocabulary:
+    """
+    Return the named vocabulary, re-reading the file only if its mtime or size
+    changed since the last check (checked at most every CHECK_INTERVAL seconds).
+    A file whose content hash is unchanged keeps its existing Vocabulary.
+    """
+    path = (vocab_dir or VOCAB_DIR) / f"{name}.json"
+    key = str(path)
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry and now - entry.checked_at < CHECK_INTERVAL:
+        return entry.vocabulary
+
+    with _lock:
+        entry = _entries.get(key)
+        stat = path.stat()
+        if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            _entries[key] = entry._replace(checked_at=now)
+            return entry.vocabulary
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry.vocabulary.digest == digest:
+            vocabulary = entry.vocabulary
+        else:
+            vocabulary = _parse(name, raw, digest)
+            if entry:
+                print(f"[INFO] Reloaded vocabulary '{name}' (version {vocabulary.version})")
+        _entries[key] = _Entry(vocabulary, stat.st_mtime_ns, stat.st_size, now)
+        return vocabulary
+
+
+def get_keywords(name: str) -> list[str]:
+    """Return the flattened keyword list of a vocabulary."""
+    return load_vocabulary(name).keywords
+
+
+def get_mapping(name: str) -> dict[str, str]:
+    """Return the mapping of a vocabulary (e.g. keyword -> category slug)."""
+    return load_vocabulary(name).mapping
+
+
+def get_matcher(name: str) -> KeywordMatcher:
+    """Return a compiled matcher for one keyword vocabulary."""
+    vocabulary = load_vocabulary(name)
+    key = (name, vocabulary.digest)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(vocabulary.keywords)
+        with _lock:
+            # Drop matchers compiled from older versions of this file
+            for stale in [k for k in _matchers if k[0] == name]:
+                del _matchers[stale]
+            _matchers[key] = matcher
+    return matcher
+
+
+def get_classifier() -> VocabularyMatcher:
+    """Return the one-pass blocked/personal/business matcher used for lead scoring."""
+    names = (BLOCKED, PERSONAL, BUSINESS)
+    vocabularies = [load_vocabulary(name) for name in names]
+    key = ("classifier", tuple(v.digest for v in vocabularies))
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = VocabularyMatcher({
+            "blocked": vocabularies[0].keywords,
+            "personal": vocabularies[1].keywords,
+            "business": vocabularies[2].keywords,
+        })
+        with _lock:
+            for stale in [k for k in _matchers if k[0] == "classifier"]:
+                del _matchers[stale]
+            _matchers[key] = matcher
+    return matcher
@@ -0,0 +1,409 @@
+"""
+Telegram Lead Scraper - Work Queue
+SQLite-backed queue of scrape work (keywords and channels) shared by worker
+processes on one host. A worker claims items under a lease and
+keeps renewing it while it works; an item whose lease runs out (its worker
+crashed or hung) becomes visible to the other workers again. Failed items
+are retried with exponential backoff and dead-lettered after max_attempts.
+
+Workers on several hosts are out of scope: they would need a networked
+backend behind claim/renew/complete/fail (e.g. a server database), and
+leads.db has the same one-host limit.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional
+
+from scheduler import flood_wait_seconds
+
+QUEUE_PATH = Path(__file__).parent / "work_queue.db"
+
+# Item states
+READY = "ready"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+# Reported by run_worker for items whose lease ran out while they were processed
+LOST = "lost"
+
+# Item kinds
+KEYWORD = "keyword"
+CHANNEL = "channel"
+
+# Seconds a claimed item stays invisible to other workers without a renewal
+VISIBILITY_TIMEOUT = 120
+# Attempts before an item is dead-lettered
+MAX_ATTEMPTS = 5
+# Retry backoff: RETRY_DELAY seconds, doubled per attempt, at most MAX_RETRY_DELAY
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 3600
+# Seconds an idle worker waits before polling the queue again
+POLL_INTERVAL = 2.0
+
+
+class WorkItem(NamedTuple):
+    """A claimed item. lease identifies this claim; a later claim of the same item gets a new one."""
+    item_id: int
+    queue: str
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    lease: str
+
+
+class WorkQueue:
+    """
+    Queue items live in one SQLite file (WAL mode), so the workers must run
+    on the host that has the file on local disk: WAL relies on shared memory
+    and doesn't work over a network filesystem. Claims run in an IMMEDIATE transaction, so two workers
+    never lease the same item at once. complete/fail/renew only apply while
+    the caller's lease is current.
+    """
+
+    def __init__(self, path: Path = QUEUE_PATH):
+        self.path = path
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'ready',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                result TEXT,
+                created_at REAL,
+                updated_at REAL,
+                UNIQUE (queue, item_key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_ready ON work_items (queue, state, available_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_budgets (
+                name TEXT PRIMARY KEY,
+                next_slot REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; transactions are started explicitly where they matter
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _update(self, sql: str, params: tuple) -> int:
+        conn = self._connect()
+        count = conn.execute(sql, params).rowcount
+        conn.close()
+        return count
+
+    # --- Producers ---
+
+    def enqueue(
+        self,
+        queue: str,
+        kind: str,
+        payloads: Iterable[dict],
+        max_attempts: int = MAX_ATTEMPTS,
+        again: bool = False
+    ) -> int:
+        """
+        Add items; returns how many were added. An item equal to one already
+        in the queue is ignored, unless again=True and that one is done or
+        dead, in which case it is queued once more.
+        """
+        now = time.time()
+        rows = [
+            (queue, kind, f"{kind}:{json.dumps(payload, sort_keys=True)}", json.dumps(payload), max_attempts, now, now, now)
+            for payload in payloads
+        ]
+        conflict = (
+            "DO UPDATE SET state = 'ready', attempts = 0, available_at = excluded.available_at, "
+            "last_error = NULL, result = NULL, updated_at = excluded.updated_at "
+            "WHERE work_items.state IN ('done', 'dead')"
+        ) if again else "DO NOTHING"
+        conn = self._connect()
+        conn.execute("BEGIN")
+        added = 0
+        for row in rows:
+            added += conn.execute(
+                f"""
+                INSERT INTO work_items (queue, kind, item_key, payload, max_attempts, available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(queue, item_key) {conflict}
+                """,
+                row
+            ).rowcount
+        conn.execute("COMMIT")
+        conn.close()
+        return added
+
+    # --- Workers ---
+
+    def claim(self, queue: str, owner: str, limit: int = 1, visibility: float = VISIBILITY_TIMEOUT) -> list[WorkItem]:
+        """
+        Lease up to `limit` ready items (or items whose lease expired) for
+        `visibility` seconds, oldest first. An expired item that has used up
+        its attempts is dead-lettered instead.
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                UPDATE work_items SET state = 'dead', last_error = 'Lease expired on the last attempt', updated_at = ?
+                WHERE queue = ? AND state = 'leased' AND lease_expires <= ? AND attempts >= max_attempts
+                """,
+                (now, queue, now)
+            )
+            rows = conn.execute(
+                """
+                SELECT item_id, kind, payload, attempts, max_attempts FROM work_items
+                WHERE queue = ? AND (
+                    (state = 'ready' AND available_at <= ?) OR (state = 'leased' AND lease_expires <= ?)
+                )
+                ORDER BY available_at, item_id LIMIT ?
+                """,
+                (queue, now, now, limit)
+            ).fetchall()
+            items = []
+            for row in rows:
+                lease = uuid.uuid4().hex
+                conn.execute(
+                    """
+                    UPDATE work_items SET state = 'leased', attempts = attempts + 1, lease = ?,
+                        lease_owner = ?, lease_expires = ?, updated_at = ?
+                    WHERE item_id = ?
+                    """,
+                    (lease, owner, now + visibility, now, row['item_id'])
+                )
+                items.append(WorkItem(
+                    row['item_id'], queue, row['kind'], json.loads(row['payload']),
+                    row['attempts'] + 1, row['max_attempts'], lease
+                ))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return items
+
+    def renew(self, item: WorkItem, visibility: float = VISIBILITY_TIMEOUT) -> bool:
+        """Extend the lease. False if it was lost (expired and claimed by another worker)."""
+        now = time.time()
+        return self._update(
+            "UPDATE work_items SET lease_expires = ?, updated_at = ? WHERE item_id = ? AND state = 'leased' AND lease = ?",
+            (now + visibility, now, item.item_id, item.lease)
+        ) == 1
+
+    def complete(self, item: WorkItem, result: Optional[dict] = None) -> bool:
+        """Mark the item done. False if the lease was lost."""
+        return self._update(
+            "UPDATE work_items SET state = 'done', result = ?, lease = NULL, updated_at = ? "
+            "WHERE item_id = ? AND state = 'leased' AND lease = ?",
+            (json.dumps(result) if result is not None else None, time.time(), item.item_id, item.lease)
+        ) == 1
+
+    def fail(self, item: WorkItem, error: str, delay: Optional[float] = None) -> Optional[str]:
+        """
+        Record a failed attempt: the item is retried after `delay` seconds
+        (default: the backoff for its attempt count) or dead-lettered when out
+        of attempts. Returns the new state, or None if the lease was lost.
+        """
+        if delay is None:
+            delay = min(RETRY_DELAY * 2 ** (item.attempts - 1), MAX_RETRY_DELAY)
+        # Jitter, so items that failed together aren't all retried together
+        delay *= random.uniform(1.0, 1.2)
+        state = DEAD if item.attempts >= item.max_attempts else READY
+        now = time.time()
+        updated = self._update(
+            "UPDATE work_items SET state = ?, available_at = ?, last_error = ?, lease = NULL, updated_at = ? "
+            "WHERE item_id = ? AND state = 'leased' AND lease = ?",
+            (state, now + delay, error[:500], now, item.item_id, item.lease)
+        )
+        return state if updated else None
+
+    def release(self, item: WorkItem) -> bool:
+        """Give an item back unprocessed (e.g. on shutdown) without using up an attempt."""
+        return self._update(
+            "UPDATE work_items SET state = 'ready', attempts = attempts - 1, available_at = ?, lease = NULL, updated_at = ? "
+            "WHERE item_id = ? AND state = 'leased' AND lease = ?",
+            (time.time(), time.time(), item.item_id, item.lease)
+        ) == 1
+
+    # --- Inspection and maintenance ---
+
+    def counts(self, queue: Optional[str] = None) -> dict[str, dict[str, int]]:
+        """{queue: {state: items}}, for one queue or all of them."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT queue, state, COUNT(*) AS items FROM work_items WHERE ? IS NULL OR queue = ? GROUP BY queue, state",
+            (queue, queue)
+        ).fetchall()
+        conn.close()
+        counts: dict[str, dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row['queue'], {})[row['state']] = row['items']
+        return counts
+
+    def dead_letters(self, queue: str, limit: int = 50) -> list[dict]:
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT item_id, kind, payload, attempts, last_error, updated_at FROM work_items "
+            "WHERE queue = ? AND state = 'dead' ORDER BY updated_at DESC LIMIT ?",
+            (queue, limit)
+        ).fetchall()
+        conn.close()
+        return [{**dict(row), 'payload': json.loads(row['payload'])} for row in rows]
+
+    def retry_dead(self, queue: str) -> int:
+        """Queue the dead-lettered items again with fresh attempts. Returns how many."""
+        return self._update(
+            "UPDATE work_items SET state = 'ready', attempts = 0, available_at = ?, updated_at = ? "
+            "WHERE queue = ? AND state = 'dead'",
+            (time.time(), time.time(), queue)
+        )
+
+    def purge_done(self, queue: str, older_than: float = 7 * 24 * 3600) -> int:
+        """Delete finished items older than `older_than` seconds. Returns how many."""
+        return self._update(
+            "DELETE FROM work_items WHERE queue = ? AND state = 'done' AND updated_at < ?",
+            (queue, time.time() - older_than)
+        )
+
+
+class SharedRateLimiter:
+    """
+    keyword_runner.RateLimiter whose schedule is stored in the queue
+    database, so every worker using the same budget name (e.g. one per
+    outgoing IP) spaces its requests against that one budget.
+    """
+
+    def __init__(self, queue: WorkQueue, name: str, min_interval: float, max_interval: float):
+        self.queue = queue
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+    def _reserve(self) -> float:
+        """Take the next free slot and return its (wall clock) time."""
+        now = time.time()
+        conn = self.queue._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_slot FROM rate_budgets WHERE name = ?", (self.name,)).fetchone()
+            slot = max(now, row['next_slot'] if row else now)
+            conn.execute(
+                "INSERT INTO rate_budgets (name, next_slot) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET next_slot = excluded.next_slot",
+                (self.name, slot + random.uniform(self.min_interval, self.max_interval))
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return slot
+
+    async def wait(self) -> None:
+        """Wait for the next free slot of the shared budget."""
+        slot = self._reserve()
+        delay = slot - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run_worker(
+    queue: WorkQueue,
+    name: str,
+    handle: Callable[[WorkItem], Awaitable[Optional[dict]]],
+    owner: Optional[str] = None,
+    concurrency: int = 1,
+    visibility: float = VISIBILITY_TIMEOUT,
+    poll_interval: float = POLL_INTERVAL,
+    drain: bool = False,
+    item_callback: Optional[Callable[[WorkItem, str, Optional[dict], Optional[str]], None]] = None
+) -> Counter:
+    """
+    Process items of queue `name` with `handle`, up to `concurrency` at
+    once, renewing each lease while its item runs. An item whose handler
+    returns is completed with the returned dict; one that raises is failed
+    (after the FloodWait when it raised one). With drain=True the worker
+    stops once the queue has nothing ready, otherwise it runs until
+    cancelled; cancelled items are released. item_callback gets
+    (item, new state, result, error) as each item finishes. Returns the
+    count of items per final state.
+    """
+    owner = owner or uuid.uuid4().hex[:12]
+    finished: Counter = Counter()
+    running: set[asyncio.Task] = set()
+
+    async def keep_leased(item: WorkItem) -> None:
+        while True:
+            await asyncio.sleep(visibility / 3)
+            if not queue.renew(item, visibility):
+                return
+
+    async def process(item: WorkItem) -> None:
+        renewer = asyncio.create_task(keep_leased(item))
+        result, error, delay = None, None, None
+        try:
+            result = await handle(item)
+        except asyncio.CancelledError:
+            queue.release(item)
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            delay = flood_wait_seconds(e)
+        finally:
+            renewer.cancel()
+        # A lost lease means another worker has the item by now
+        if error is None:
+            state = DONE if queue.complete(item, result) else LOST
+        else:
+            state = queue.fail(item, error, delay) or LOST
+        finished[state] += 1
+        if item_callback:
+            item_callback(item, state, result, error)
+
+    try:
+        while True:
+            if len(running) < concurrency:
+                for item in queue.claim(name, owner, concurrency - len(running), visibility):
+                    running.add(asyncio.create_task(process(item)))
+            if not running:
+                if drain:
+                    break
+                await asyncio.sleep(poll_interval)
+                continue
+            done, _ = await asyncio.wait(running, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+            running -= done
+            for task in done:
+                task.result()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    return finished
@@ -0,0 +1,378 @@
+"""
+Telegram Lead Scraper - Single Writer
+One process owns the leads database and commits the leads that scrape
+workers stream to it over a local socket, many batches per transaction
+(group commit). Workers no longer contend for SQLite's write lock, and each
+batch is acknowledged only once its transaction has committed, so a worker
+knows which of its leads are durable instead of losing them to a printed
+"database is locked".
+"""
+
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Callable, Optional
+
+import scraper
+
+# Local socket (a named pipe on Windows) shared by the writer and its workers
+if sys.platform == "win32":
+    WRITER_ADDRESS = r"\\.\pipe\telegram-lead-writer"
+else:
+    WRITER_ADDRESS = str(Path(__file__).parent / "writer.sock")
+# Shared secret checked when a worker connects; messages are pickled, so only
+# trusted peers may send them. Unless this variable sets it, the writer makes a
+# random one at startup and saves it next to its socket, readable only by its user.
+AUTHKEY_ENV = "LEAD_WRITER_AUTHKEY"
+
+# Most leads committed in one transaction
+GROUP_SIZE = 2000
+# Leads a worker buffers before sending them as one batch
+BATCH_SIZE = 50
+# Seconds a worker holds a partial batch before sending it with the next lead
+LINGER = 1.0
+
+
+# Flush token of the work the current task belongs to; see WriterClient.track
+_token: ContextVar[Optional[int]] = ContextVar("writer_token", default=None)
+
+
+class WriterError(Exception):
+    """Leads that the writer didn't commit, or a writer that can't be reached."""
+
+
+def authkey_path(address: str) -> Path:
+    """The file holding the key of the writer at address."""
+    if address.startswith("\\\\"):
+        return Path(__file__).parent / "writer.key"
+    return Path(address + ".key")
+
+
+def create_authkey(address: str) -> bytes:
+    """A new random key for the writer at address, written to a file only this user can read."""
+    key = secrets.token_hex(32).encode()
+    path = authkey_path(address)
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as file:
+        file.write(key)
+    return key
+
+
+def read_authkey(address: str) -> bytes:
+    """The key of the writer at address: $LEAD_WRITER_AUTHKEY, or the file the writer created."""
+    if os.environ.get(AUTHKEY_ENV):
+        return os.environ[AUTHKEY_ENV].encode()
+    try:
+        return authkey_path(address).read_bytes()
+    except OSError as e:
+        raise WriterError(f"Can't read the writer's key ({e}); is the writer running?") from e
+
+
+class WriterServer:
+    """
+    Accepts worker connections and commits their batches with
+    scraper.upsert_leads into whatever database init_database() set up.
+    Batches that arrived while the previous transaction was committing are
+    committed together, up to group_size leads, so transactions grow with
+    the load. If a group fails its batches are committed one by one, and
+    only the failing ones are acknowledged with an error. Without an
+    authkey (or $LEAD_WRITER_AUTHKEY) a random one is created for workers to
+    read (see read_authkey); the socket is only accessible to this user.
+    """
+
+    def __init__(
+        self,
+        address: str = WRITER_ADDRESS,
+        authkey: Optional[bytes] = None,
+        group_size: int = GROUP_SIZE,
+        status_callback: Optional[Callable[[str], None]] = None
+    ):
+        self.address = address
+        self.authkey = authkey
+        self._key_file: Optional[Path] = None
+        self.group_size = group_size
+        self.status_callback = status_callback
+        self.stats: Counter = Counter()
+        self._batches: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._listener: Optional[Listener] = None
+
+    def _status(self, message: str) -> None:
+        if self.status_callback:
+            self.status_callback(message)
+
+    def _listen(self) -> Listener:
+        if not self.address.startswith("\\\\") and os.path.exists(self.address):
+            # A socket file left behind by a writer that died; refuse to replace a live one
+            try:
+                Client(self.address).close()
+            except OSError:
+                os.unlink(self.address)
+            else:
+                raise WriterError(f"A writer is already running at {self.address}")
+        if self.authkey is None and os.environ.get(AUTHKEY_ENV):
+            self.authkey = os.environ[AUTHKEY_ENV].encode()
+        elif self.authkey is None:
+            self.authkey = create_authkey(self.address)
+            self._key_file = authkey_path(self.address)
+        umask = os.umask(0o177)
+        try:
+            return Listener(self.address, authkey=self.authkey)
+        finally:
+            os.umask(umask)
+
+    def serve(self) -> None:
+        """Accept workers and commit their leads until close() or Ctrl+C."""
+        self._listener = self._listen()
+        self._status(f"Writer listening on {self.address}")
+        threading.Thread(target=self._accept, daemon=True).start()
+        try:
+            while not self._stop.is_set():
+                try:
+                    group = [self._batches.get(timeout=0.5)]
+                except queue.Empty:
+                    continue
+                leads = len(group[0][2])
+                while leads < self.group_size:
+                    try:
+                        batch = self._batches.get_nowait()
+                    except queue.Empty:
+                        break
+                    group.append(batch)
+                    leads += len(batch[2])
+                self._commit(group)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop serving. Batches received but not committed are never acknowledged, so their workers resend them."""
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if self._key_file is not None:
+            self._key_file.unlink(missing_ok=True)
+            self._key_file = None
+
+    def _accept(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._stop.is_set() or self._listener is None:
+                    return
+                continue  # a client that failed the handshake
+            self.stats['connections'] += 1
+            threading.Thread(target=self._receive, args=(conn,), daemon=True).start()
+
+    def _receive(self, conn: Connection) -> None:
+        """Queue the batches a worker sends: ('batch', seq, records)."""
+        try:
+            while True:
+                kind, seq, records = conn.recv()
+                if kind == "batch":
+                    self._batches.put((conn, seq, records))
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            # A message that doesn't unpickle or unpack: drop the worker, which
+            # sees the connection close and fails (then resends) its unacknowledged batches
+            self.stats['bad_messages'] += 1
+            self._status(f"Dropping a worker connection after a bad message: {str(e) or type(e).__name__}")
+        finally:
+            conn.close()
+
+    def _commit(self, group: list[tuple]) -> None:
+        try:
+            scraper.upsert_leads([record for _, _, records in group for record in records], raise_errors=True)
+            results = [None] * len(group)
+            self.stats['commits'] += 1
+        except Exception as e:
+            if len(group) == 1:
+                results = [str(e) or type(e).__name__]
+            else:
+                results = []
+                for batch in group:
+                    try:
+                        scraper.upsert_leads(batch[2], raise_errors=True)
+                        results.append(None)
+                        self.stats['commits'] += 1
+                    except Exception as batch_error:
+                        results.append(str(batch_error) or type(batch_error).__name__)
+        for (conn, seq, records), error in zip(group, results):
+            self.stats['batches'] += 1
+            if error is None:
+                self.stats['leads'] += len(records)
+            else:
+                self.stats['failed'] += len(records)
+                self._status(f"Batch of {len(records)} leads failed: {error}")
+            try:
+                conn.send(("ack", seq, error))
+            except (OSError, ValueError):
+                pass  # the worker is gone; it will redo the work it couldn't confirm
+
+
+class WriterClient:
+    """
+    A worker's connection to the writer, used through scraper.use_writer.
+    Leads are sent in batches of batch_size (or sooner once a partial batch
+    is linger seconds old); flush() sends the rest and waits until all of
+    them are acknowledged. If the connection is lost, the batches awaiting
+    an ack are reported by the next flush() and the next batch sent
+    reconnects (e.g. to a restarted writer). Safe to use from several threads.
+
+    Work units running side by side (a worker's queue items) call track()
+    first; their flush() then waits only for their own leads and reports
+    only their own errors, while batches still mix all units' leads.
+    """
+
+    def __init__(
+        self,
+        address: str = WRITER_ADDRESS,
+        authkey: Optional[bytes] = None,
+        batch_size: int = BATCH_SIZE,
+        linger: float = LINGER
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.batch_size = batch_size
+        self.linger = linger
+        self._buffer: list[dict] = []
+        self._buffer_tokens: Counter = Counter()  # token -> leads in the buffer
+        self._buffered_at = 0.0
+        self._seq = 0
+        self._next_token = 0
+        self._pending: dict[int, Counter] = {}  # batch seq -> leads per token awaiting an ack
+        self._errors: defaultdict[Optional[int], list[str]] = defaultdict(list)  # token -> errors since its last flush
+        self._broken: Optional[str] = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._connect()
+
+    def _connect(self) -> None:
+        """Open a connection and start reading its acks. Call with the lock held (or from __init__)."""
+        # The key is read again on each connect, as a restarted writer has a new one
+        authkey = self.authkey or read_authkey(self.address)
+        try:
+            conn = Client(self.address, authkey=authkey)
+        except (OSError, AuthenticationError) as e:
+            raise WriterError(f"Can't reach the writer at {self.address}: {e}") from e
+        self._conn = conn
+        self._broken = None
+        threading.Thread(target=self._receive_acks, args=(conn,), daemon=True).start()
+
+    def track(self) -> int:
+        """
+        Start a new flush token for the current context: leads submitted from
+        it (and from tasks it starts) are waited for by flush() in it.
+        """
+        with self._cond:
+            self._next_token += 1
+            token = self._next_token
+        _token.set(token)
+        return token
+
+    def submit(self, record: dict) -> None:
+        """Queue one lead record (see scraper.lead_record)."""
+        with self._cond:
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append(record)
+            self._buffer_tokens[_token.get()] += 1
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._buffered_at >= self.linger:
+                self._send()
+
+    def _send(self) -> None:
+        """Send the buffered records as one batch. Call with the lock held."""
+        batch, self._buffer = self._buffer, []
+        tokens, self._buffer_tokens = self._buffer_tokens, Counter()
+        if not batch:
+            return
+        if self._broken and not self._closed:
+            try:
+                self._connect()
+            except WriterError as e:
+                self._broken = str(e)
+        if self._broken:
+            self._fail(tokens, "not sent", self._broken)
+            return
+        self._seq += 1
+        self._pending[self._seq] = tokens
+        try:
+            self._conn.send(("batch", self._seq, batch))
+        except (OSError, ValueError) as e:
+            self._disconnected(f"writer connection lost ({e})")
+
+    def _disconnected(self, reason: str) -> None:
+        """Fail every batch still awaiting an ack. Call with the lock held."""
+        self._broken = reason
+        self._conn.close()
+        self._fail(sum(self._pending.values(), Counter()), "not acknowledged", reason)
+        self._pending.clear()
+        self._cond.notify_all()
+
+    def _fail(self, tokens: Counter, what: str, reason: str) -> None:
+        """Record an error for each token's leads. Call with the lock held."""
+        for token, leads in tokens.items():
+            self._errors[token].append(f"{leads} leads {what}: {reason}")
+
+    def _receive_acks(self, conn: Connection) -> None:
+        while True:
+            try:
+                kind, seq, error = conn.recv()
+            except (EOFError, OSError):
+                with self._cond:
+                    if conn is self._conn and not self._broken:
+                        self._disconnected("writer connection closed")
+                return
+            with self._cond:
+                tokens = self._pending.pop(seq, Counter())
+                if error is not None:
+                    self._fail(tokens, "not stored", error)
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Send any buffered leads and wait until the current token's leads (see
+        track) are acknowledged, or every lead's outside any token. Raises
+        WriterError for those leads that weren't committed since the last
+        flush, or when the acks don't arrive within timeout seconds.
+        """
+        token = _token.get()
+
+        def waiting() -> int:
+            return sum(
+                sum(tokens.values()) if token is None else tokens[token]
+                for tokens in self._pending.values()
+            )
+
+        with self._cond:
+            self._send()
+            if not self._cond.wait_for(lambda: not waiting(), timeout):
+                raise WriterError(f"{waiting()} leads not acknowledged within {timeout}s")
+            if token is None:
+                errors = [error for token_errors in self._errors.values() for error in token_errors]
+                self._errors.clear()
+            else:
+                errors = self._errors.pop(token, [])
+        if errors:
+            raise WriterError("; ".join(errors))
+
+    def close(self) -> None:
+        """Flush and disconnect."""
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._broken = self._broken or "client closed"
+            self._conn.close()